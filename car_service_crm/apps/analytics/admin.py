@@ -11,5 +11,6 @@ class RevenueReportAdmin(admin.ModelAdmin):
 @admin.register(StaffPerformance)
 class StaffPerformanceAdmin(admin.ModelAdmin):
     list_display = ('staff', 'month', 'completed_bookings', 'total_revenue', 'average_rating')
+    list_select_related = ('staff',)
     list_filter = ('month', 'staff')
     ordering = ('-month', 'staff')
\ No newline at end of file
@@ -0,0 +1,162 @@
+# apps/analytics/exports.py
+"""
+Flat CSV / JSON Lines extracts of bookings, feedback and communication logs.
+
+Rows are read with values_list() through a server-side iterator, so no model
+instances are built and at most CHUNK_SIZE rows are held at a time; each
+chunk is encoded and handed on as one string. Memory use therefore does not
+depend on the size of the export, whether the output goes to a
+StreamingHttpResponse (staff export view) or a gzip file (export_data).
+"""
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.bookings.models import Booking, Feedback
+from apps.communication.models import CommunicationLog
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Dataset:
+    """
+    An exportable table: `columns` maps output names to values_list() lookups,
+    `date_field` is the range-filtered column and `statuses` the values its
+    status filter accepts (none if it has no status).
+    """
+
+    def __init__(self, name, label, model, date_field, columns, status_field=None, statuses=()):
+        self.name = name
+        self.label = label
+        self.model = model
+        self.date_field = date_field
+        self.columns = columns
+        self.status_field = status_field
+        self.statuses = statuses
+
+    @property
+    def header(self):
+        return [name for name, _lookup in self.columns]
+
+    def queryset(self, date_from=None, date_to=None, status=None):
+        queryset = self.model.objects.order_by(self.date_field, 'pk')
+        if date_from:
+            queryset = queryset.filter(**{
+                f'{self.date_field}__gte': timezone.make_aware(datetime.combine(date_from, time.min)),
+            })
+        if date_to:
+            # The next midnight, so the column is not wrapped in a date cast
+            queryset = queryset.filter(**{
+                f'{self.date_field}__lt': timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)),
+            })
+        if status:
+            queryset = queryset.filter(**{self.status_field: status})
+        return queryset.values_list(*[lookup for _name, lookup in self.columns])
+
+    def rows(self, chunk_size=CHUNK_SIZE, **filters):
+        return self.queryset(**filters).iterator(chunk_size=chunk_size)
+
+
+DATASETS = {dataset.name: dataset for dataset in [
+    Dataset('bookings', _('Bookings'), Booking, 'scheduled_date', [
+        ('id', 'pk'),
+        ('scheduled_date', 'scheduled_date'),
+        ('status', 'status'),
+        ('service', 'service__name'),
+        ('price', 'service__price'),
+        ('customer_email', 'customer__email'),
+        ('customer_first_name', 'customer__first_name'),
+        ('customer_last_name', 'customer__last_name'),
+        ('license_plate', 'vehicle__license_plate'),
+        ('assigned_staff_email', 'assigned_staff__email'),
+        ('feedback_submitted', 'feedback_submitted'),
+        ('created_at', 'created_at'),
+    ], status_field='status', statuses=Booking.STATUS_CHOICES),
+    Dataset('feedback', _('Feedback'), Feedback, 'created_at', [
+        ('id', 'pk'),
+        ('booking_id', 'booking_id'),
+        ('scheduled_date', 'booking__scheduled_date'),
+        ('service', 'booking__service__name'),
+        ('customer_email', 'booking__customer__email'),
+        ('rating', 'rating'),
+        ('comments', 'comments'),
+        ('created_at', 'created_at'),
+    ]),
+    Dataset('communication', _('Communication logs'), CommunicationLog, 'sent_at', [
+        ('id', 'pk'),
+        ('sent_at', 'sent_at'),
+        ('message_type', 'message_type'),
+        ('status', 'status'),
+        ('recipient_email', 'recipient__email'),
+        ('booking_id', 'booking_id'),
+        ('template', 'template__name'),
+        ('subject', 'subject'),
+    ], status_field='status', statuses=CommunicationLog._meta.get_field('status').choices),
+]}
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+class _Line:
+    """File-like object whose write() returns what it was given, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(dataset, rows, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Line())
+    yield writer.writerow(dataset.header)
+    for chunk in _chunked(rows, chunk_size):
+        yield ''.join(writer.writerow([_plain(value) for value in row]) for row in chunk)
+
+
+def iter_jsonl(dataset, rows, chunk_size=CHUNK_SIZE):
+    header = dataset.header
+    for chunk in _chunked(rows, chunk_size):
+        yield ''.join(
+            json.dumps(dict(zip(header, map(_plain, row))), ensure_ascii=False) + '\n' for row in chunk
+        )
+
+
+def iter_export(dataset, fmt, chunk_size=CHUNK_SIZE, **filters):
+    """
+    Yield the export of `dataset` in `fmt` ('csv' or 'jsonl') as text chunks
+    of up to `chunk_size` rows.
+    """
+    encode = iter_csv if fmt == 'csv' else iter_jsonl
+    return encode(dataset, dataset.rows(chunk_size, **filters), chunk_size)
+
+
+def export_filename(dataset, fmt, date_from=None, date_to=None, status=None):
+    parts = [dataset.name]
+    if date_from or date_to:
+        parts.append(f"{date_from or 'start'}_{date_to or 'end'}")
+    if status:
+        parts.append(status.lower())
+    return f"{'-'.join(str(part) for part in parts)}.{fmt}"
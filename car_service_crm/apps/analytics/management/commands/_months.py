@@ -0,0 +1,23 @@
+# apps/analytics/management/commands/_months.py
+import argparse
+from datetime import date, datetime
+
+
+def parse_month(value):
+    """
+    argparse type for YYYY-MM month arguments; returns the first day of the month.
+    """
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid month "{value}", expected YYYY-MM.')
+
+
+def iter_months(start, end):
+    """
+    Yield the first day of every month from `start` to `end` inclusive.
+    """
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
@@ -0,0 +1,110 @@
+# apps/analytics/management/commands/backfill_reports.py
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ._months import iter_months, parse_month
+
+
+def _init_worker():
+    # Under the spawn start method the child starts from a bare interpreter;
+    # under fork it inherits the parent's connections, which must not be shared.
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'car_service_crm.settings')
+        django.setup()
+    connections.close_all()
+
+
+def build_month(month_iso):
+    """
+    Rebuild one month's reports and return (month_iso, seconds). Module-level
+    so it can be pickled into worker processes.
+    """
+    from apps.analytics.reports import generate_monthly_reports
+    started = time.perf_counter()
+    generate_monthly_reports(date.fromisoformat(month_iso))
+    return month_iso, time.perf_counter() - started
+
+
+class Checkpoint:
+    """
+    JSON file recording the months already built, so an interrupted backfill
+    can resume. Rewritten atomically after every month.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.done = set(json.load(f).get('done', []))
+
+    def mark(self, month_iso):
+        self.done.add(month_iso)
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'done': sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.done = set()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = 'Build RevenueReport and StaffPerformance for a range of past months in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=parse_month, required=True, metavar='YYYY-MM')
+        parser.add_argument('--to', dest='end', type=parse_month, required=True, metavar='YYYY-MM')
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes.')
+        parser.add_argument('--checkpoint', default='backfill_reports.checkpoint.json',
+                            help='File recording finished months; pass an empty string to disable.')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and rebuild every month.')
+
+    def handle(self, *args, **options):
+        if options['start'] > options['end']:
+            raise CommandError('--from must not be after --to.')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        checkpoint = Checkpoint(options['checkpoint'])
+        if options['restart']:
+            checkpoint.clear()
+        months = [m.isoformat() for m in iter_months(options['start'], options['end'])]
+        pending = [m for m in months if m not in checkpoint.done]
+        if len(pending) < len(months):
+            self.stdout.write(f'Resuming: {len(months) - len(pending)} of {len(months)} month(s) already built.')
+
+        started = time.perf_counter()
+        for month_iso, elapsed in self._run(pending, options['workers']):
+            checkpoint.mark(month_iso)
+            self.stdout.write(f'{month_iso[:7]}: {elapsed:.2f}s')
+
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Built {len(pending)} month(s) in {time.perf_counter() - started:.2f}s.'
+        ))
+
+    def _run(self, months, workers):
+        if workers == 1 or len(months) <= 1:
+            for month_iso in months:
+                yield build_month(month_iso)
+            return
+
+        # Each worker opens its own connection; the parent's must not be inherited
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(build_month, month_iso) for month_iso in months]
+            for future in as_completed(futures):
+                yield future.result()
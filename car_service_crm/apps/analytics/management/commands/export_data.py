@@ -0,0 +1,65 @@
+# apps/analytics/management/commands/export_data.py
+import argparse
+import gzip
+import os
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.exports import DATASETS, FORMATS, export_filename, iter_export
+from ._months import parse_month
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid date "{value}", expected YYYY-MM-DD.')
+
+
+class Command(BaseCommand):
+    help = 'Write a gzip-compressed CSV or JSON Lines extract of bookings, feedback or communication logs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--month', type=parse_month, metavar='YYYY-MM', help='Shorthand for --from/--to covering one month.')
+        parser.add_argument('--from', dest='date_from', type=parse_date, metavar='YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', type=parse_date, metavar='YYYY-MM-DD')
+        parser.add_argument('--status')
+        parser.add_argument('--output', metavar='PATH',
+                            help='File to write (default: a name built from the filters, plus .gz, in the current directory).')
+
+    def handle(self, *args, **options):
+        dataset = DATASETS[options['dataset']]
+        date_from, date_to = options['date_from'], options['date_to']
+        if options['month']:
+            if date_from or date_to:
+                raise CommandError('--month cannot be combined with --from/--to.')
+            date_from = options['month']
+            date_to = (date_from + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        if date_from and date_to and date_from > date_to:
+            raise CommandError('--from must not be after --to.')
+        status = options['status']
+        if status and status not in dict(dataset.statuses):
+            choices = ', '.join(dict(dataset.statuses)) or 'none'
+            raise CommandError(f'Invalid --status for {dataset.name}; choices: {choices}.')
+
+        filters = {'date_from': date_from, 'date_to': date_to, 'status': status}
+        path = options['output'] or export_filename(dataset, options['format'], **filters) + '.gz'
+        started = time.perf_counter()
+        # Write to a temporary name so an interrupted export never looks complete
+        tmp_path = f'{path}.tmp'
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+                for chunk in iter_export(dataset, options['format'], **filters):
+                    f.write(chunk)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {path} ({os.path.getsize(path) // 1024} KB) in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,41 @@
+# apps/analytics/management/commands/reconcile_reports.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.models import RevenueReport
+from apps.analytics.reports import generate_monthly_reports
+from apps.analytics.rollups import reconcile_month
+from apps.bookings.models import Booking
+from ._months import parse_month
+
+
+class Command(BaseCommand):
+    help = 'Verify the incrementally maintained revenue and staff rollups against a full recompute.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', action='append', dest='months', type=parse_month, metavar='YYYY-MM',
+                            help='Month to check; may be repeated. Defaults to every month with data.')
+        parser.add_argument('--fix', action='store_true', help='Rebuild months that are out of sync.')
+
+    def handle(self, *args, **options):
+        if options['months']:
+            months = sorted(set(options['months']))
+        else:
+            months = set(RevenueReport.objects.values_list('month', flat=True))
+            months.update(Booking.objects.filter(status=Booking.STATUS_COMPLETED).dates('created_at', 'month'))
+            months = sorted(months)
+
+        out_of_sync = 0
+        for month in months:
+            mismatches = reconcile_month(month)
+            if not mismatches:
+                continue
+            out_of_sync += 1
+            for line in mismatches:
+                self.stdout.write(line)
+            if options['fix']:
+                generate_monthly_reports(month)
+                self.stdout.write(f'Rebuilt {month:%Y-%m}')
+
+        if out_of_sync and not options['fix']:
+            raise CommandError(f'{out_of_sync} of {len(months)} month(s) out of sync; rerun with --fix to rebuild them.')
+        self.stdout.write(self.style.SUCCESS(f'Checked {len(months)} month(s); {out_of_sync} out of sync.'))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='revenuereport',
+            name='month',
+            field=models.DateField(help_text='First day of the month for the report', unique=True, verbose_name='Month'),
+        ),
+        migrations.AddConstraint(
+            model_name='staffperformance',
+            constraint=models.UniqueConstraint(fields=('staff', 'month'), name='unique_staff_performance_month'),
+        ),
+    ]
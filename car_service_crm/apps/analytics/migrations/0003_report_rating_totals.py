@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_report_unique_months'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revenuereport',
+            name='rating_count',
+            field=models.IntegerField(default=0, verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='revenuereport',
+            name='rating_sum',
+            field=models.IntegerField(default=0, verbose_name='Rating Sum'),
+        ),
+        migrations.AddField(
+            model_name='staffperformance',
+            name='rating_count',
+            field=models.IntegerField(default=0, verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='staffperformance',
+            name='rating_sum',
+            field=models.IntegerField(default=0, verbose_name='Rating Sum'),
+        ),
+    ]
@@ -5,11 +5,15 @@ from django.utils.translation import gettext_lazy as _
 class RevenueReport(models.Model):
     """
     Model to store monthly revenue reports.
+    Kept current incrementally by analytics.rollups; rating_sum and
+    rating_count are the running totals behind average_rating.
     """
-    month = models.DateField(verbose_name=_('Month'), help_text=_('First day of the month for the report'))
+    month = models.DateField(unique=True, verbose_name=_('Month'), help_text=_('First day of the month for the report'))
     total_revenue = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('Total Revenue'))
     total_bookings = models.IntegerField(verbose_name=_('Total Bookings'))
     average_rating = models.FloatField(null=True, blank=True, verbose_name=_('Average Customer Rating'))
+    rating_sum = models.IntegerField(default=0, verbose_name=_('Rating Sum'))
+    rating_count = models.IntegerField(default=0, verbose_name=_('Rating Count'))
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -35,12 +39,17 @@ class StaffPerformance(models.Model):
     completed_bookings = models.IntegerField(verbose_name=_('Completed Bookings'))
     total_revenue = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('Total Revenue Generated'))
     average_rating = models.FloatField(null=True, blank=True, verbose_name=_('Average Feedback Rating'))
+    rating_sum = models.IntegerField(default=0, verbose_name=_('Rating Sum'))
+    rating_count = models.IntegerField(default=0, verbose_name=_('Rating Count'))
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = _('Staff Performance')
         verbose_name_plural = _('Staff Performances')
         ordering = ['-month', 'staff']
+        constraints = [
+            models.UniqueConstraint(fields=['staff', 'month'], name='unique_staff_performance_month'),
+        ]
 
     def __str__(self):
         return f"Performance for {self.staff.get_full_name()} - {self.month.strftime('%Y-%m')}"
\ No newline at end of file
@@ -0,0 +1,120 @@
+# apps/analytics/reports.py
+"""
+Monthly report engine.
+
+All staff and month totals come from one GROUP BY over the month's completed
+bookings; StaffPerformance rows are then upserted in a single statement.
+Day-to-day the rollups are maintained incrementally by rollups.py; a full
+rebuild is only needed for backfills and reconciliation.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from apps.fragments.cache import bump
+from apps.users.models import User
+from .models import RevenueReport, StaffPerformance
+
+
+def month_bounds(month):
+    """
+    Return an aware [start, end) datetime range covering the month of `month`.
+    Range filters let the (status, created_at) index serve report queries,
+    unlike __month/__year lookups which wrap the column in a function.
+    """
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    if month.month == 12:
+        end = timezone.make_aware(datetime(month.year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(month.year, month.month + 1, 1))
+    return start, end
+
+
+def completed_bookings_for_month(month):
+    month_start, month_end = month_bounds(month)
+    return Booking.objects.filter(
+        status=Booking.STATUS_COMPLETED,
+        created_at__gte=month_start,
+        created_at__lt=month_end,
+    )
+
+
+def _average(rating_sum, rating_count):
+    return rating_sum / rating_count if rating_count else 0
+
+
+def compute_monthly_reports(month):
+    """
+    Recompute `month` from its completed bookings without saving anything.
+    Returns an unsaved RevenueReport and a list of unsaved StaffPerformance
+    rows, one per staff member (zeroed for staff without completed bookings).
+    """
+    month = date(month.year, month.month, 1)
+    rows = (
+        completed_bookings_for_month(month)
+        .order_by()
+        .values('assigned_staff')
+        .annotate(
+            revenue=Sum('service__price'),
+            bookings=Count('id'),
+            rating_sum=Sum('feedback__rating'),
+            rating_count=Count('feedback__rating'),
+        )
+    )
+    per_staff = {row['assigned_staff']: row for row in rows}
+
+    rating_sum = sum(row['rating_sum'] or 0 for row in per_staff.values())
+    rating_count = sum(row['rating_count'] for row in per_staff.values())
+    report = RevenueReport(
+        month=month,
+        total_revenue=sum((row['revenue'] or Decimal('0') for row in per_staff.values()), Decimal('0')),
+        total_bookings=sum(row['bookings'] for row in per_staff.values()),
+        average_rating=_average(rating_sum, rating_count),
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+    )
+
+    performances = []
+    for staff_id in User.objects.filter(role=User.ROLE_STAFF).order_by().values_list('pk', flat=True):
+        row = per_staff.get(staff_id, {})
+        performances.append(StaffPerformance(
+            staff_id=staff_id,
+            month=month,
+            completed_bookings=row.get('bookings', 0),
+            total_revenue=row.get('revenue') or 0,
+            average_rating=_average(row.get('rating_sum') or 0, row.get('rating_count', 0)),
+            rating_sum=row.get('rating_sum') or 0,
+            rating_count=row.get('rating_count', 0),
+        ))
+    return report, performances
+
+
+def generate_monthly_reports(month):
+    """
+    Rebuild the RevenueReport and every staff member's StaffPerformance for
+    `month` from scratch. Both tables are upserted, so regenerating a month
+    overwrites it in place. Returns the RevenueReport.
+    """
+    report, performances = compute_monthly_reports(month)
+    with transaction.atomic():
+        RevenueReport.objects.bulk_create(
+            [report],
+            update_conflicts=True,
+            unique_fields=['month'],
+            update_fields=['total_revenue', 'total_bookings', 'average_rating', 'rating_sum', 'rating_count'],
+        )
+        StaffPerformance.objects.bulk_create(
+            performances,
+            update_conflicts=True,
+            unique_fields=['staff', 'month'],
+            update_fields=['completed_bookings', 'total_revenue', 'average_rating', 'rating_sum', 'rating_count'],
+        )
+    # bulk_create sends no signals, so drop the cached report tables here;
+    # only after commit, or a concurrent request could re-cache the old rows
+    # under the new version
+    transaction.on_commit(lambda: bump('analytics'))
+    return report
@@ -0,0 +1,123 @@
+# apps/analytics/rollups.py
+"""
+Incremental maintenance of RevenueReport and StaffPerformance.
+
+A completed booking contributes its service price, one booking and (once
+feedback exists) its rating to the rollups for the month it was created in.
+signals.py applies the difference between a booking's contribution before and
+after each change as F() deltas, so the rollups stay current without
+rescanning the month. reconcile_month() checks them against a full recompute.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from .models import RevenueReport, StaffPerformance
+from .reports import compute_monthly_reports
+
+Contribution = namedtuple('Contribution', 'month staff_id revenue rating')
+
+
+def month_of(moment):
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def booking_contribution(booking_id):
+    """
+    Return the Contribution of a booking as currently stored, or None if it is
+    not completed.
+    """
+    row = (
+        Booking.objects.filter(pk=booking_id, status=Booking.STATUS_COMPLETED)
+        .values('created_at', 'assigned_staff', 'service__price', 'feedback__rating')
+        .first()
+    )
+    if row is None:
+        return None
+    return Contribution(month_of(row['created_at']), row['assigned_staff'], row['service__price'], row['feedback__rating'])
+
+
+def _apply_delta(model, lookup, count_field, bookings, revenue, rating_sum, rating_count):
+    new_rating_sum = F('rating_sum') + rating_sum
+    new_rating_count = F('rating_count') + rating_count
+    # Make sure the row exists, then adjust it in a single UPDATE so
+    # concurrent deltas cannot overwrite each other.
+    model.objects.bulk_create(
+        [model(**lookup, **{count_field: 0}, total_revenue=0, average_rating=0)],
+        ignore_conflicts=True,
+    )
+    model.objects.filter(**lookup).update(**{
+        count_field: F(count_field) + bookings,
+        'total_revenue': F('total_revenue') + revenue,
+        'rating_sum': new_rating_sum,
+        'rating_count': new_rating_count,
+        'average_rating': Coalesce(
+            Cast(new_rating_sum, FloatField()) / NullIf(new_rating_count, Value(0)),
+            Value(0.0),
+        ),
+    })
+
+
+def apply_delta(month, staff_id, bookings=0, revenue=Decimal('0'), rating_sum=0, rating_count=0):
+    """
+    Add the given deltas to the month's RevenueReport and, if `staff_id` is
+    set, to that staff member's StaffPerformance.
+    """
+    if not (bookings or revenue or rating_sum or rating_count):
+        return
+    with transaction.atomic():
+        _apply_delta(RevenueReport, {'month': month}, 'total_bookings',
+                     bookings, revenue, rating_sum, rating_count)
+        if staff_id is not None:
+            _apply_delta(StaffPerformance, {'month': month, 'staff_id': staff_id}, 'completed_bookings',
+                         bookings, revenue, rating_sum, rating_count)
+
+
+def apply_contribution(contribution, sign, include_rating=True):
+    """
+    Add (sign=1) or remove (sign=-1) a booking's contribution.
+    """
+    if contribution is None:
+        return
+    has_rating = include_rating and contribution.rating is not None
+    apply_delta(
+        contribution.month,
+        contribution.staff_id,
+        bookings=sign,
+        revenue=sign * (contribution.revenue or Decimal('0')),
+        rating_sum=sign * contribution.rating if has_rating else 0,
+        rating_count=sign if has_rating else 0,
+    )
+
+
+def reconcile_month(month):
+    """
+    Compare the stored rollups for `month` with a full recompute.
+    Returns a list of human-readable mismatches; empty means in sync.
+    """
+    expected_report, expected_performances = compute_monthly_reports(month)
+    month = expected_report.month
+    mismatches = []
+
+    fields = ('total_revenue', 'total_bookings', 'rating_sum', 'rating_count')
+    stored = RevenueReport.objects.filter(month=month).first()
+    for field in fields:
+        actual = getattr(stored, field) if stored else 0
+        if actual != getattr(expected_report, field):
+            mismatches.append(f"{month:%Y-%m} {field}: stored {actual}, expected {getattr(expected_report, field)}")
+
+    fields = ('total_revenue', 'completed_bookings', 'rating_sum', 'rating_count')
+    expected = {p.staff_id: p for p in expected_performances}
+    stored = {p.staff_id: p for p in StaffPerformance.objects.filter(month=month)}
+    for staff_id in sorted(expected.keys() | stored.keys()):
+        for field in fields:
+            actual = getattr(stored[staff_id], field) if staff_id in stored else 0
+            wanted = getattr(expected[staff_id], field) if staff_id in expected else 0
+            if actual != wanted:
+                mismatches.append(f"{month:%Y-%m} staff {staff_id} {field}: stored {actual}, expected {wanted}")
+    return mismatches
@@ -0,0 +1,62 @@
+# apps/analytics/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.bookings.models import Booking, Feedback
+from .rollups import apply_contribution, apply_delta, booking_contribution
+
+
+@receiver(pre_save, sender=Booking)
+def capture_booking_contribution(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    instance._rollup_before = booking_contribution(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_rollups(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_rollup_before', None)
+    after = booking_contribution(instance.pk) if instance.status == Booking.STATUS_COMPLETED else None
+    if before != after:
+        apply_contribution(before, -1)
+        apply_contribution(after, 1)
+    instance._rollup_before = after
+
+
+@receiver(pre_delete, sender=Booking)
+def remove_booking_contribution(sender, instance, **kwargs):
+    # The rating is removed separately when the cascade deletes the Feedback
+    apply_contribution(booking_contribution(instance.pk), -1, include_rating=False)
+
+
+@receiver(pre_save, sender=Feedback)
+def capture_feedback_rating(sender, instance, raw, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._rollup_rating = Feedback.objects.filter(pk=instance.pk).values_list('rating', flat=True).first()
+
+
+@receiver(post_save, sender=Feedback)
+def update_feedback_rollups(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old_rating = None if created else getattr(instance, '_rollup_rating', None)
+    if old_rating == instance.rating:
+        return
+    contribution = booking_contribution(instance.booking_id)
+    if contribution is not None:
+        apply_delta(
+            contribution.month,
+            contribution.staff_id,
+            rating_sum=instance.rating - (old_rating or 0),
+            rating_count=0 if old_rating is not None else 1,
+        )
+
+
+@receiver(post_delete, sender=Feedback)
+def remove_feedback_rating(sender, instance, **kwargs):
+    contribution = booking_contribution(instance.booking_id)
+    if contribution is not None:
+        apply_delta(contribution.month, contribution.staff_id, rating_sum=-instance.rating, rating_count=-1)
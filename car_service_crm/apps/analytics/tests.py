@@ -1,3 +1,262 @@
+# apps/analytics/tests.py
+from datetime import date, timedelta
+from decimal import Decimal
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.bookings.models import Booking, Feedback
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+from apps.communication.models import CommunicationLog
+from .exports import DATASETS, iter_export
+from .models import RevenueReport, StaffPerformance
+from .reports import generate_monthly_reports
+from .rollups import reconcile_month
+
+
+class MonthlyReportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.month = timezone.localdate().replace(day=1)
+        customer = User.objects.create_user(
+            email='customer@example.com', username='customer', role=User.ROLE_CUSTOMER,
+        )
+        vehicle = Vehicle.objects.create(
+            owner=customer, make='Honda', model='Civic', year=2019,
+            license_plate='ABC123', vin='1HGCM82633A004352',
+        )
+        cheap = Service.objects.create(name='Wiper Swap', price=Decimal('20.00'), duration=timedelta(minutes=15))
+        dear = Service.objects.create(name='Gearbox Rebuild', price=Decimal('900.00'), duration=timedelta(hours=6))
+        cls.alice, cls.bob, cls.idle = User.objects.bulk_create([
+            User(email=f'{name}@example.com', username=name, role=User.ROLE_STAFF)
+            for name in ('alice', 'bob', 'idle')
+        ])
+
+        def book(staff, service, status=Booking.STATUS_COMPLETED, rating=None):
+            booking = Booking.objects.create(
+                customer=customer, vehicle=vehicle, service=service, assigned_staff=staff,
+                scheduled_date=timezone.now(), status=status,
+            )
+            if rating:
+                Feedback.objects.create(booking=booking, rating=rating)
+            return booking
+
+        book(cls.alice, cheap, rating=4)
+        book(cls.alice, dear, rating=2)
+        book(cls.bob, dear)
+        book(None, cheap, rating=5)
+        book(cls.bob, dear, status=Booking.STATUS_PENDING)
+        last_month = book(cls.alice, dear, rating=1)
+        Booking.objects.filter(pk=last_month.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+    def test_month_and_staff_totals(self):
+        report = generate_monthly_reports(self.month)
+        self.assertEqual(report.month, self.month)
+        self.assertEqual(report.total_revenue, Decimal('1840.00'))
+        self.assertEqual(report.total_bookings, 4)
+        self.assertAlmostEqual(report.average_rating, 11 / 3)
+
+        performances = {p.staff_id: p for p in StaffPerformance.objects.filter(month=self.month)}
+        self.assertEqual(performances[self.alice.pk].completed_bookings, 2)
+        self.assertEqual(performances[self.alice.pk].total_revenue, Decimal('920.00'))
+        self.assertEqual(performances[self.alice.pk].average_rating, 3)
+        self.assertEqual(performances[self.bob.pk].total_revenue, Decimal('900.00'))
+        self.assertEqual(performances[self.bob.pk].average_rating, 0)
+        self.assertEqual(performances[self.idle.pk].completed_bookings, 0)
+
+    def test_query_count_is_independent_of_staff_count(self):
+        with self.assertNumQueries(6):
+            generate_monthly_reports(self.month)
+        User.objects.bulk_create([
+            User(email=f'tech{i}@example.com', username=f'tech{i}', role=User.ROLE_STAFF)
+            for i in range(50)
+        ])
+        with self.assertNumQueries(6):
+            generate_monthly_reports(self.month)
+
+    def test_regenerating_updates_in_place(self):
+        generate_monthly_reports(self.month)
+        generate_monthly_reports(date(self.month.year, self.month.month, 15))
+        self.assertEqual(RevenueReport.objects.count(), 1)
+        self.assertEqual(StaffPerformance.objects.count(), 3)
+
+
+class IncrementalRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.month = timezone.localdate().replace(day=1)
+        customer = User.objects.create_user(
+            email='customer@example.com', username='customer', role=User.ROLE_CUSTOMER,
+        )
+        cls.vehicle = Vehicle.objects.create(
+            owner=customer, make='Honda', model='Civic', year=2019,
+            license_plate='ABC123', vin='1HGCM82633A004352',
+        )
+        cls.service = Service.objects.create(name='Gearbox Rebuild', price=Decimal('900.00'), duration=timedelta(hours=6))
+        cls.alice, cls.bob = User.objects.bulk_create([
+            User(email=f'{name}@example.com', username=name, role=User.ROLE_STAFF)
+            for name in ('alice', 'bob')
+        ])
+
+    def setUp(self):
+        self.booking = Booking.objects.create(
+            customer=self.vehicle.owner, vehicle=self.vehicle, service=self.service,
+            assigned_staff=self.alice, scheduled_date=timezone.now(),
+        )
+
+    def assertRollups(self, revenue, bookings, average_rating, staff=None):
+        report = RevenueReport.objects.get(month=self.month)
+        self.assertEqual((report.total_revenue, report.total_bookings), (revenue, bookings))
+        self.assertEqual(report.average_rating, average_rating)
+        if staff:
+            performance = StaffPerformance.objects.get(month=self.month, staff=staff)
+            self.assertEqual((performance.total_revenue, performance.completed_bookings), (revenue, bookings))
+        self.assertEqual(reconcile_month(self.month), [])
+
+    def test_pending_booking_does_not_touch_rollups(self):
+        self.assertFalse(RevenueReport.objects.exists())
+
+    def test_completion_feedback_and_reopening(self):
+        self.booking.status = Booking.STATUS_COMPLETED
+        self.booking.save()
+        self.assertRollups(Decimal('900.00'), 1, 0, staff=self.alice)
+
+        Feedback.objects.create(booking=self.booking, rating=4)
+        self.assertRollups(Decimal('900.00'), 1, 4, staff=self.alice)
+
+        self.booking.status = Booking.STATUS_IN_PROGRESS
+        self.booking.save()
+        self.assertRollups(Decimal('0.00'), 0, 0, staff=self.alice)
+
+    def test_reassignment_moves_staff_credit(self):
+        self.booking.status = Booking.STATUS_COMPLETED
+        self.booking.save()
+        Feedback.objects.create(booking=self.booking, rating=5)
+        self.booking.assigned_staff = self.bob
+        self.booking.save()
+        self.assertRollups(Decimal('900.00'), 1, 5, staff=self.bob)
+        self.assertEqual(StaffPerformance.objects.get(staff=self.alice).completed_bookings, 0)
+
+    def test_deleting_booking_and_feedback(self):
+        self.booking.status = Booking.STATUS_COMPLETED
+        self.booking.save()
+        feedback = Feedback.objects.create(booking=self.booking, rating=3)
+        feedback.delete()
+        self.assertRollups(Decimal('900.00'), 1, 0)
+        Feedback.objects.create(booking=self.booking, rating=2)
+        self.booking.delete()
+        self.assertRollups(Decimal('0.00'), 0, 0)
+
+    def test_reconcile_command_detects_and_fixes_drift(self):
+        self.booking.status = Booking.STATUS_COMPLETED
+        self.booking.save()
+        RevenueReport.objects.update(total_bookings=7)
+        with self.assertRaises(CommandError):
+            call_command('reconcile_reports', stdout=StringIO())
+        call_command('reconcile_reports', '--fix', stdout=StringIO())
+        self.assertEqual(reconcile_month(self.month), [])
+
+
+class BackfillReportsCommandTests(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.checkpoint = os.path.join(tmp_dir.name, 'checkpoint.json')
+
+    def test_builds_every_month_in_range(self):
+        out = StringIO()
+        call_command('backfill_reports', '--from', '2024-11', '--to', '2025-02',
+                     '--checkpoint', self.checkpoint, stdout=out)
+        self.assertEqual(
+            list(RevenueReport.objects.order_by('month').values_list('month', flat=True)),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)],
+        )
+        self.assertIn('2025-01: ', out.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_checkpoint(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'done': ['2024-11-01', '2024-12-01']}, f)
+        out = StringIO()
+        call_command('backfill_reports', '--from', '2024-11', '--to', '2025-01',
+                     '--checkpoint', self.checkpoint, stdout=out)
+        self.assertIn('2 of 3 month(s) already built', out.getvalue())
+        self.assertEqual(list(RevenueReport.objects.values_list('month', flat=True)), [date(2025, 1, 1)])
+
+
+class DataExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = User.objects.create_user(
+            email='customer@example.com', username='customer', first_name='Ada, "the" driver',
+            role=User.ROLE_CUSTOMER,
+        )
+        vehicle = Vehicle.objects.create(
+            owner=customer, make='Honda', model='Civic', year=2019, license_plate='EXP1', vin='E' * 17,
+        )
+        service = Service.objects.create(name='Wiper Swap', price=Decimal('20.00'), duration=timedelta(minutes=15))
+        cls.day = date(2026, 3, 31)
+        moment = timezone.make_aware(timezone.datetime(2026, 3, 31, 23, 30))
+        bookings = Booking.objects.bulk_create([
+            Booking(customer=customer, vehicle=vehicle, service=service, status=status,
+                    scheduled_date=moment + timedelta(days=offset))
+            for offset, status in [(0, Booking.STATUS_COMPLETED), (0, Booking.STATUS_CANCELLED),
+                                   (1, Booking.STATUS_COMPLETED)]
+        ])
+        Feedback.objects.create(booking=bookings[0], rating=5, comments='Line one\nline two')
+        CommunicationLog.objects.create(recipient=customer, booking=bookings[0], message_type='EMAIL',
+                                        subject='Done', message='Your car is ready', status='FAILED')
+
+    def export(self, name, fmt, **filters):
+        return ''.join(iter_export(DATASETS[name], fmt, **filters))
+
+    def test_csv_filters_by_day_and_status(self):
+        with self.assertNumQueries(1):
+            text = self.export('bookings', 'csv', date_from=self.day, date_to=self.day,
+                               status=Booking.STATUS_COMPLETED)
+        rows = list(csv.DictReader(StringIO(text)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['status'], Booking.STATUS_COMPLETED)
+        self.assertEqual(rows[0]['price'], '20.00')
+        self.assertEqual(rows[0]['customer_first_name'], 'Ada, "the" driver')
+        self.assertTrue(rows[0]['scheduled_date'].startswith('2026-03-31T23:30'))
+        self.assertEqual(len(list(csv.DictReader(StringIO(self.export('bookings', 'csv'))))), 3)
+
+    def test_jsonl(self):
+        lines = self.export('feedback', 'jsonl').splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['rating'], 5)
+        self.assertEqual(record['comments'], 'Line one\nline two')
+        self.assertEqual(record['customer_email'], 'customer@example.com')
+        self.assertEqual(json.loads(self.export('communication', 'jsonl', status='FAILED'))['subject'], 'Done')
+
+    def test_chunks_bound_rows_in_memory(self):
+        chunks = list(iter_export(DATASETS['bookings'], 'csv', chunk_size=2))
+        # Header, then chunks of at most two rows
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [1, 2, 1])
 
-# Create your tests here.
+    def test_command_writes_gzip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'march.csv.gz')
+            call_command('export_data', 'bookings', month=date(2026, 3, 1), output=path, stdout=StringIO())
+            with gzip.open(path, 'rt', newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 2)
+            self.assertFalse(os.path.exists(f'{path}.tmp'))
+            with self.assertRaises(CommandError):
+                call_command('export_data', 'feedback', status='SENT', output=path, stdout=StringIO())
@@ -0,0 +1,185 @@
+# apps/api/resources.py
+"""
+Read side of the JSON API.
+
+Each Resource maps public field names to values_list() lookups, scopes its
+queryset to what the requesting user may see and pages it by keyset. Rows go
+straight from values_list() tuples into dicts, so no model instance is built
+and only the columns (and joins) of the requested fields are selected.
+"""
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.translation import gettext as _
+
+from apps.bookings.models import Booking, Feedback
+from apps.bookings.pagination import DEFAULT_PAGE_SIZE, after_cursor, encode_position
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.staff.forms import BookingFilterForm
+
+MAX_PAGE_SIZE = 200
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Resource:
+    """
+    A list endpoint's fields, scope and ordering. Subclasses set `fields`
+    (public name -> lookup) and implement get_queryset().
+    """
+    fields = {}
+    # Always fetched, as the next cursor is built from them
+    cursor_fields = ('id',)
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def filter(self, queryset, params):
+        return queryset
+
+    def order(self, queryset, cursor):
+        """
+        Order `queryset` by primary key and keep the rows after `cursor`.
+        """
+        queryset = queryset.order_by('pk')
+        try:
+            return queryset.filter(pk__gt=int(force_str(urlsafe_base64_decode(cursor)))) if cursor else queryset
+        except (TypeError, ValueError):
+            # A malformed cursor yields the first page, as on the HTML lists
+            return queryset
+
+    def encode_cursor(self, row):
+        return urlsafe_base64_encode(force_bytes(row['id']))
+
+    def parse_fields(self, value):
+        """
+        The field names listed in a ?fields= value, or all of them.
+        """
+        if not value:
+            return list(self.fields)
+        names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ApiError(_('Unknown fields: %(fields)s. Available: %(available)s.') % {
+                'fields': ', '.join(unknown), 'available': ', '.join(self.fields),
+            })
+        return names
+
+    def page(self, names, params, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Return (rows, next_cursor) for the page of `names` after `cursor`.
+        """
+        queryset = self.order(self.filter(self.get_queryset(), params), cursor)
+        fetched = list(dict.fromkeys([*names, *self.cursor_fields]))
+        rows = [
+            dict(zip(fetched, values))
+            for values in queryset.values_list(*(self.fields[name] for name in fetched))[:limit + 1]
+        ]
+        next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        rows = rows[:limit]
+        if len(fetched) > len(names):
+            rows = [{name: row[name] for name in names} for row in rows]
+        return rows, next_cursor
+
+
+class BookingResource(Resource):
+    fields = {
+        'id': 'id',
+        'status': 'status',
+        'scheduled_date': 'scheduled_date',
+        'notes': 'notes',
+        'feedback_submitted': 'feedback_submitted',
+        'customer_id': 'customer_id',
+        'customer_first_name': 'customer__first_name',
+        'customer_last_name': 'customer__last_name',
+        'vehicle_id': 'vehicle_id',
+        'vehicle_make': 'vehicle__make',
+        'vehicle_model': 'vehicle__model',
+        'license_plate': 'vehicle__license_plate',
+        'service_id': 'service_id',
+        'service_name': 'service__name',
+        'assigned_staff_id': 'assigned_staff_id',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    cursor_fields = ('id', 'scheduled_date')
+
+    def get_queryset(self):
+        # The same scopes as the booking management, staff booking and customer booking lists
+        if self.user.is_admin:
+            return Booking.objects.all()
+        if self.user.is_staff_member:
+            return Booking.objects.filter(assigned_staff=self.user)
+        return Booking.objects.filter(customer=self.user)
+
+    def filter(self, queryset, params):
+        return BookingFilterForm(params, include_staff=self.user.is_admin).filter(queryset)
+
+    def order(self, queryset, cursor):
+        # Newest first on (scheduled_date, id), as on the HTML lists
+        return after_cursor(queryset, cursor)
+
+    def encode_cursor(self, row):
+        return encode_position(row['scheduled_date'], row['id'])
+
+
+class VehicleResource(Resource):
+    fields = {
+        'id': 'id',
+        'owner_id': 'owner_id',
+        'make': 'make',
+        'model': 'model',
+        'year': 'year',
+        'license_plate': 'license_plate',
+        'vin': 'vin',
+        'updated_at': 'updated_at',
+    }
+
+    def get_queryset(self):
+        if self.user.is_admin:
+            return Vehicle.objects.all()
+        if self.user.is_staff_member:
+            # The vehicles of the staff member's assigned bookings
+            return Vehicle.objects.filter(pk__in=Booking.objects.filter(assigned_staff=self.user).values('vehicle'))
+        return Vehicle.objects.filter(owner=self.user)
+
+
+class ServiceResource(Resource):
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'price': 'price',
+        'duration': 'duration',
+        'updated_at': 'updated_at',
+    }
+
+    def get_queryset(self):
+        return Service.objects.all()
+
+
+class FeedbackResource(Resource):
+    fields = {
+        'id': 'id',
+        'booking_id': 'booking_id',
+        'rating': 'rating',
+        'comments': 'comments',
+        'service_name': 'booking__service__name',
+        'staff_id': 'booking__assigned_staff_id',
+        'created_at': 'created_at',
+    }
+
+    def get_queryset(self):
+        if self.user.is_admin:
+            return Feedback.objects.all()
+        if self.user.is_staff_member:
+            return Feedback.objects.filter(booking__assigned_staff=self.user)
+        return Feedback.objects.filter(booking__customer=self.user)
@@ -0,0 +1,171 @@
+# apps/api/tests.py
+import json
+from datetime import datetime, time, timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.models import Booking, Feedback
+from apps.bookings.tests import create_listing_bookings
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.other_staff = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Casey', role=User.ROLE_CUSTOMER,
+        )
+        cls.bookings = create_listing_bookings(cls.customer, cls.staff, 7)
+        cls.others = create_listing_bookings(cls.customer, cls.other_staff, 2, prefix='other')
+        Feedback.objects.create(booking=cls.bookings[0], rating=5, comments='Great')
+
+    def get(self, user, name, **params):
+        self.client.force_login(user)
+        response = self.client.get(reverse(f'api:{name}'), params)
+        return response, response.json()
+
+    def post_status(self, user, updates):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse('api:booking_status'), json.dumps({'updates': updates}), content_type='application/json',
+        )
+
+    def test_requires_login(self):
+        response = self.client.get(reverse('api:bookings'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('error', response.json())
+
+    def test_sparse_fieldset_in_one_query(self):
+        self.client.force_login(self.staff)
+        # Session, user and the page
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api:bookings'), {'fields': 'id,status,service_name'})
+        rows = response.json()['results']
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(set(rows[0]), {'id', 'status', 'service_name'})
+        self.assertEqual(rows[0]['id'], Booking.objects.filter(assigned_staff=self.staff).latest('scheduled_date').pk)
+
+    def test_unknown_fields_are_rejected(self):
+        response, body = self.get(self.staff, 'bookings', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', body['error'])
+
+    def test_keyset_pages_cover_every_row_once(self):
+        self.client.force_login(self.admin)
+        url, seen = reverse('api:bookings') + '?fields=id&limit=4', []
+        while url:
+            body = self.client.get(url).json()
+            seen.extend(row['id'] for row in body['results'])
+            url = body['next']
+        self.assertEqual(seen, list(Booking.objects.order_by('-scheduled_date', '-pk').values_list('pk', flat=True)))
+
+        _response, first = self.get(self.admin, 'vehicles', limit=5)
+        self.assertEqual(len(first['results']), 5)
+        self.client.force_login(self.admin)
+        second = self.client.get(first['next']).json()
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            list(Vehicle.objects.order_by('pk').values_list('pk', flat=True)),
+        )
+        self.assertIsNone(second['next'])
+
+    def test_booking_filters(self):
+        Booking.objects.filter(pk=self.bookings[1].pk).update(status=Booking.STATUS_COMPLETED)
+        _response, body = self.get(self.admin, 'bookings', fields='id', status=Booking.STATUS_COMPLETED)
+        self.assertEqual([row['id'] for row in body['results']], [self.bookings[1].pk])
+
+    def test_rows_are_scoped_to_the_user(self):
+        _response, body = self.get(self.other_staff, 'vehicles', fields='id')
+        self.assertEqual(
+            {row['id'] for row in body['results']}, {booking.vehicle_id for booking in self.others},
+        )
+        _response, body = self.get(self.other_staff, 'feedback')
+        self.assertEqual(body['results'], [])
+        _response, body = self.get(self.customer, 'feedback', fields='rating,comments')
+        self.assertEqual(body['results'], [{'rating': 5, 'comments': 'Great'}])
+        # Every user sees the whole catalog, including the seeded services
+        _response, body = self.get(self.customer, 'services', fields='name,price')
+        self.assertEqual(len(body['results']), Service.objects.count())
+
+    def test_bulk_status_update(self):
+        first, second = self.bookings[1], self.bookings[2]
+        response = self.post_status(self.staff, [
+            {'id': first.pk, 'status': Booking.STATUS_IN_PROGRESS},
+            {'id': second.pk, 'status': Booking.STATUS_PENDING},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['updated'], [first.pk])
+        self.assertEqual(
+            {row['id']: row['status'] for row in body['results']},
+            {first.pk: Booking.STATUS_IN_PROGRESS, second.pk: Booking.STATUS_PENDING},
+        )
+        first.refresh_from_db()
+        self.assertEqual(first.status, Booking.STATUS_IN_PROGRESS)
+
+    def test_bulk_status_update_is_all_or_nothing(self):
+        mine, theirs = self.bookings[1], self.others[0]
+        response = self.post_status(self.staff, [
+            {'id': mine.pk, 'status': Booking.STATUS_COMPLETED},
+            {'id': theirs.pk, 'status': Booking.STATUS_COMPLETED},
+        ])
+        self.assertEqual(response.status_code, 404)
+        self.assertIn(str(theirs.pk), response.json()['error'])
+        mine.refresh_from_db()
+        self.assertEqual(mine.status, Booking.STATUS_PENDING)
+
+        response = self.post_status(self.staff, [{'id': mine.pk, 'status': Booking.STATUS_CANCELLED}])
+        self.assertEqual(response.status_code, 400)
+        response = self.post_status(self.admin, [{'id': theirs.pk, 'status': Booking.STATUS_CANCELLED}])
+        self.assertEqual(response.status_code, 200)
+
+    def test_customers_and_malformed_bodies_are_rejected(self):
+        self.assertEqual(
+            self.post_status(self.customer, [{'id': self.bookings[1].pk, 'status': Booking.STATUS_COMPLETED}]).status_code,
+            403,
+        )
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse('api:booking_status'), 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        first, second = self.bookings[1], self.bookings[2]
+        for updates in (
+            [{'id': first.pk, 'status': [Booking.STATUS_COMPLETED]}],
+            [{'id': first.pk, 'status': {}}],
+            [{'id': first.pk, 'status': 1}, {'id': second.pk, 'status': 'DONE'}],
+        ):
+            with self.subTest(updates=updates):
+                response = self.post_status(self.staff, updates)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'Each status must be a string.'})
+
+    @override_settings(WORKSHOP_BAYS=1, WORKSHOP_OPEN_WEEKDAYS=range(7))
+    def test_reinstating_a_cancelled_booking_rechecks_its_slot(self):
+        start = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time(9)))
+        cancelled, taken = self.bookings[3], self.bookings[4]
+        Booking.objects.filter(pk=cancelled.pk).update(scheduled_date=start, status=Booking.STATUS_CANCELLED)
+        Booking.objects.filter(pk=taken.pk).update(scheduled_date=start)
+        response = self.post_status(self.admin, [{'id': cancelled.pk, 'status': Booking.STATUS_PENDING}])
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('All service bays are booked at that time.', response.json()['error'])
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, Booking.STATUS_CANCELLED)
+
+        Booking.objects.filter(pk=taken.pk).update(status=Booking.STATUS_CANCELLED)
+        response = self.post_status(self.admin, [{'id': cancelled.pk, 'status': Booking.STATUS_PENDING}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], [cancelled.pk])
@@ -0,0 +1,13 @@
+# apps/api/urls.py
+from django.urls import path
+from .views import BookingListView, BookingStatusView, FeedbackListView, ServiceListView, VehicleListView
+
+app_name = 'api'
+
+urlpatterns = [
+    path('bookings/', BookingListView.as_view(), name='bookings'),
+    path('bookings/status/', BookingStatusView.as_view(), name='booking_status'),
+    path('vehicles/', VehicleListView.as_view(), name='vehicles'),
+    path('services/', ServiceListView.as_view(), name='services'),
+    path('feedback/', FeedbackListView.as_view(), name='feedback'),
+]
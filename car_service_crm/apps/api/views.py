@@ -0,0 +1,149 @@
+# apps/api/views.py
+import json
+
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.translation import gettext as _
+from django.views.generic import View
+
+from apps.bookings.models import Booking
+from apps.bookings.scheduling import SlotUnavailable, save_booking
+from .resources import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ApiError, BookingResource, FeedbackResource, Resource, ServiceResource,
+    VehicleResource,
+)
+
+# Statuses a staff member may set, as on the staff booking update page
+STAFF_STATUSES = {Booking.STATUS_PENDING, Booking.STATUS_IN_PROGRESS, Booking.STATUS_COMPLETED}
+MAX_BULK_UPDATES = 200
+
+
+class ApiView(View):
+    """
+    JSON endpoints for logged-in users. Errors are answered as
+    {"error": message} with a 4xx status instead of redirects.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': _('Authentication required.')}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse({'error': exc.message}, status=exc.status)
+
+
+class ResourceListView(ApiView):
+    """
+    GET a page of `resource_class` rows: ?fields=a,b picks the fields,
+    ?limit= the page size and ?cursor= (from the previous page's "next")
+    the position.
+    """
+    resource_class = Resource
+
+    def get(self, request, *args, **kwargs):
+        resource = self.resource_class(request.user)
+        names = resource.parse_fields(request.GET.get('fields'))
+        rows, next_cursor = resource.page(names, request.GET, request.GET.get('cursor'), self.get_limit())
+        next_url = None
+        if next_cursor:
+            params = request.GET.copy()
+            params['cursor'] = next_cursor
+            next_url = f'{request.path}?{params.urlencode()}'
+        return JsonResponse({'results': rows, 'next': next_url})
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(_('limit must be a number.'))
+        return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+class BookingListView(ResourceListView):
+    resource_class = BookingResource
+
+
+class VehicleListView(ResourceListView):
+    resource_class = VehicleResource
+
+
+class ServiceListView(ResourceListView):
+    resource_class = ServiceResource
+
+
+class FeedbackListView(ResourceListView):
+    resource_class = FeedbackResource
+
+
+class BookingStatusView(ApiView):
+    """
+    Set the status of several bookings in one request:
+
+        POST {"updates": [{"id": 12, "status": "COMPLETED"}, ...]}
+
+    Admins may update any booking to any status, staff members only their
+    assigned bookings to pending, in progress or completed. The request is
+    all or nothing. Each changed booking is saved (not update()d) so the
+    availability, rollup, fragment and search signals still run, and a
+    cancelled booking is only reinstated if its slot still has a free bay.
+    """
+
+    def post(self, request, *args, **kwargs):
+        if not (request.user.is_admin or request.user.is_staff_member):
+            raise ApiError(_('Only staff can update bookings.'), status=403)
+        statuses = self.parse_updates(request)
+        allowed = {code for code, _label in Booking.STATUS_CHOICES}
+        if not request.user.is_admin:
+            allowed &= STAFF_STATUSES
+        invalid = sorted({status for status in statuses.values() if status not in allowed})
+        if invalid:
+            raise ApiError(_('Status not allowed: %(statuses)s.') % {'statuses': ', '.join(map(str, invalid))})
+
+        with transaction.atomic():
+            bookings = {
+                booking.pk: booking
+                for booking in BookingResource(request.user).get_queryset().select_for_update().filter(pk__in=statuses)
+            }
+            missing = sorted(set(statuses) - bookings.keys())
+            if missing:
+                raise ApiError(_('Bookings not found: %(ids)s.') % {'ids': ', '.join(map(str, missing))}, status=404)
+            updated = []
+            for pk, status in statuses.items():
+                booking = bookings[pk]
+                if booking.status == status:
+                    continue
+                reinstated = booking.status == Booking.STATUS_CANCELLED
+                booking.status = status
+                if reinstated:
+                    # Its bay may have been taken since it was cancelled
+                    try:
+                        save_booking(booking)
+                    except SlotUnavailable as exc:
+                        raise ApiError(
+                            _('Booking %(id)d: %(reason)s') % {'id': pk, 'reason': exc.message}, status=409,
+                        )
+                else:
+                    booking.save(update_fields=['status', 'updated_at'])
+                updated.append(pk)
+        return JsonResponse({
+            'updated': updated,
+            'results': list(Booking.objects.filter(pk__in=statuses).order_by('pk').values('id', 'status', 'updated_at')),
+        })
+
+    def parse_updates(self, request):
+        """
+        Return {booking id: status} from the request body.
+        """
+        try:
+            updates = json.loads(request.body)['updates']
+            statuses = {int(update['id']): update['status'] for update in updates}
+        except (ValueError, KeyError, TypeError):
+            raise ApiError(_('Expected {"updates": [{"id": ..., "status": ...}, ...]}.'))
+        if not all(isinstance(status, str) for status in statuses.values()):
+            raise ApiError(_('Each status must be a string.'))
+        if not statuses:
+            raise ApiError(_('No updates given.'))
+        if len(statuses) > MAX_BULK_UPDATES:
+            raise ApiError(_('At most %(count)d bookings can be updated at once.') % {'count': MAX_BULK_UPDATES})
+        return statuses
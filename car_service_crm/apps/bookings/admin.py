@@ -1,21 +1,29 @@
 # apps/bookings/admin.py
 from django.contrib import admin
+from apps.search.admin import IndexedSearchAdminMixin
+from apps.search.models import SearchDocument
 from .models import Booking, Feedback
 
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
     list_display = ('get_service_name', 'customer', 'vehicle', 'scheduled_date', 'status', 'assigned_staff', 'feedback_submitted')  # Added
     list_filter = ('status', 'scheduled_date', 'service')
     search_fields = ('customer__email', 'vehicle__license_plate', 'service__name')
+    search_kind = SearchDocument.KIND_BOOKING
     ordering = ('-scheduled_date',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_listing()
+
     def get_service_name(self, obj):
         return obj.service.name
     get_service_name.short_description = 'Service'
 
 @admin.register(Feedback)
-class FeedbackAdmin(admin.ModelAdmin):
+class FeedbackAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
     list_display = ('booking', 'rating', 'created_at')
+    list_select_related = ('booking__service', 'booking__vehicle')
     list_filter = ('rating', 'created_at')
     search_fields = ('booking__id', 'comments')
+    search_kind = SearchDocument.KIND_FEEDBACK
     ordering = ('-created_at',)
\ No newline at end of file
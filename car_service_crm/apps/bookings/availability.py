@@ -0,0 +1,255 @@
+# apps/bookings/availability.py
+"""
+Service-bay availability engine.
+
+Opening hours are split into WORKSHOP_SLOT_MINUTES slots, and a day is held as
+the number of bookings overlapping each slot. Bookings do not record a bay and
+bays are interchangeable, so a service of k slots fits wherever each of its k
+slots has fewer bookings than there are bays; the free starts are found with a
+handful of shifts and ANDs over a bitmask of the slots with a bay to spare.
+
+Day counts are cached per date in the shared cache under a version that is
+bumped whenever a booking on that day changes, and all at once when a
+service is saved (see signals.py). The cache only steers the booking form
+and the slot search: save_booking() re-counts the day from the database.
+"""
+import math
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import Booking
+
+CACHE_PREFIX = 'bookings:availability'
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+# Days fetched per round trip while searching forward for free slots
+SEARCH_CHUNK_DAYS = 7
+
+
+class Schedule:
+    """
+    The workshop's bays and opening hours, read from settings.
+    """
+
+    def __init__(self):
+        self.bays = getattr(settings, 'WORKSHOP_BAYS', 4)
+        self.opening = getattr(settings, 'WORKSHOP_OPENING_HOUR', 8)
+        self.closing = getattr(settings, 'WORKSHOP_CLOSING_HOUR', 18)
+        self.slot_minutes = getattr(settings, 'WORKSHOP_SLOT_MINUTES', 30)
+        self.weekdays = set(getattr(settings, 'WORKSHOP_OPEN_WEEKDAYS', range(6)))
+        self.slots_per_day = (self.closing - self.opening) * 60 // self.slot_minutes
+        self.slot = timedelta(minutes=self.slot_minutes)
+
+    def is_open(self, day):
+        return day.weekday() in self.weekdays
+
+    def day_start(self, day):
+        return timezone.make_aware(datetime.combine(day, time(self.opening)))
+
+    def slot_start(self, day, index):
+        return self.day_start(day) + index * self.slot
+
+    def slots_needed(self, duration):
+        return max(1, math.ceil(duration / self.slot))
+
+    def locate(self, moment):
+        """
+        Return (day, slot index, aligned) for `moment`. The index may fall
+        outside 0..slots_per_day for times outside opening hours.
+        """
+        moment = timezone.localtime(moment)
+        offset = moment - self.day_start(moment.date())
+        index, remainder = divmod(offset, self.slot)
+        return moment.date(), index, not remainder
+
+
+class DayAvailability:
+    """
+    How many bookings overlap each slot of one day.
+    """
+    __slots__ = ('day', 'bays', 'counts')
+
+    def __init__(self, day, bays, counts):
+        self.day = day
+        self.bays = bays
+        self.counts = list(counts)
+
+    @property
+    def slots(self):
+        return len(self.counts)
+
+    @property
+    def overbooked(self):
+        """
+        The number of slots more bookings overlap than there are bays.
+        """
+        return sum(count > self.bays for count in self.counts)
+
+    @classmethod
+    def build(cls, day, schedule, intervals):
+        """
+        Count the (start slot, length) intervals overlapping each slot.
+        """
+        counts = [0] * schedule.slots_per_day
+        for start, length in intervals:
+            # Clip bookings that start before opening or run past closing
+            for index in range(max(start, 0), min(start + length, schedule.slots_per_day)):
+                counts[index] += 1
+        return cls(day, schedule.bays, counts)
+
+    def free_starts(self, length):
+        """
+        Bitmask of slot indexes where a `length`-slot booking fits, i.e.
+        every slot it covers has a bay to spare.
+        """
+        if length > self.slots:
+            return 0
+        free = 0
+        for index, count in enumerate(self.counts):
+            if count < self.bays:
+                free |= 1 << index
+        starts = free
+        for shift in range(1, length):
+            starts &= free >> shift
+        return starts & ((1 << (self.slots - length + 1)) - 1)
+
+    def fits(self, start, length):
+        return 0 <= start and bool(self.free_starts(length) >> start & 1)
+
+
+def _version_key(day):
+    return f'{CACHE_PREFIX}:version:{day.isoformat()}'
+
+
+def _cache_key(day, generation, version):
+    return f'{CACHE_PREFIX}:{generation}:{version}:{day.isoformat()}'
+
+
+def _increment(key):
+    if not cache.add(key, 1, timeout=None):
+        cache.incr(key)
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TTL', 3600)
+
+
+def _query_days(days, schedule, exclude=None):
+    if not days:
+        return {}
+    bookings = Booking.objects.filter(
+        scheduled_date__gte=schedule.day_start(min(days)),
+        scheduled_date__lt=schedule.day_start(max(days) + timedelta(days=1)),
+    ).exclude(status=Booking.STATUS_CANCELLED)
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude)
+    intervals = {day: [] for day in days}
+    for scheduled_date, duration in bookings.order_by().values_list('scheduled_date', 'service__duration'):
+        day, start, _aligned = schedule.locate(scheduled_date)
+        if day in intervals:
+            intervals[day].append((start, schedule.slots_needed(duration)))
+    return {day: DayAvailability.build(day, schedule, intervals[day]) for day in days}
+
+
+def load_days(days, schedule=None, exclude=None, fresh=False):
+    """
+    Return {day: DayAvailability} for `days`, from the cache where possible
+    and with one query for the rest. Passing `exclude` (a booking pk) leaves
+    that booking out, for re-validating an edit; it and `fresh` bypass the cache.
+    """
+    schedule = schedule or Schedule()
+    days = list(days)
+    if fresh or exclude is not None:
+        return _query_days(days, schedule, exclude)
+
+    # The versions are read before the database is: a booking committed in
+    # between bumps its day's version, so counts built without it are stored
+    # under a key that is never read again
+    versions = cache.get_many([GENERATION_KEY, *(_version_key(day) for day in days)])
+    generation = versions.get(GENERATION_KEY, 0)
+    keys = {_cache_key(day, generation, versions.get(_version_key(day), 0)): day for day in days}
+    cached = cache.get_many(keys)
+    result = {
+        keys[key]: DayAvailability(keys[key], bays, counts)
+        for key, (bays, counts) in cached.items()
+        # Entries built under other workshop settings are rebuilt
+        if bays == schedule.bays and len(counts) == schedule.slots_per_day
+    }
+    missing = [day for day in days if day not in result]
+    built = _query_days(missing, schedule)
+    cache.set_many(
+        {key: (built[day].bays, built[day].counts) for key, day in keys.items() if day in built},
+        timeout=_timeout(),
+    )
+    result.update(built)
+    return result
+
+
+def day_availability(day, schedule=None):
+    return load_days([day], schedule)[day]
+
+
+def next_free_slots(duration, after=None, count=5, horizon_days=60):
+    """
+    Return the start times of the next `count` slots after `after` (default
+    now) where a service of `duration` fits.
+    """
+    schedule = Schedule()
+    after = after or timezone.now()
+    length = schedule.slots_needed(duration)
+    first_day = timezone.localtime(after).date()
+    slots = []
+    for offset in range(0, horizon_days, SEARCH_CHUNK_DAYS):
+        days = [
+            first_day + timedelta(days=offset + i)
+            for i in range(min(SEARCH_CHUNK_DAYS, horizon_days - offset))
+        ]
+        days = [day for day in days if schedule.is_open(day)]
+        availability = load_days(days, schedule)
+        for day in days:
+            starts = availability[day].free_starts(length)
+            while starts:
+                index = (starts & -starts).bit_length() - 1
+                starts &= starts - 1
+                start = schedule.slot_start(day, index)
+                if start > after:
+                    slots.append(start)
+                    if len(slots) == count:
+                        return slots
+    return slots
+
+
+def unavailable_reason(duration, start, exclude=None, fresh=False):
+    """
+    Return why a booking of `duration` cannot start at `start`, or None if
+    a bay is free. `exclude` leaves an existing booking out of the check, and
+    `fresh` reads the day from the database rather than the cache.
+    """
+    schedule = Schedule()
+    day, index, aligned = schedule.locate(start)
+    length = schedule.slots_needed(duration)
+    if not schedule.is_open(day):
+        return _('The workshop is closed on that day.')
+    if index < 0 or index + length > schedule.slots_per_day:
+        return _('The service must fit between %(opening)02d:00 and %(closing)02d:00.') % {
+            'opening': schedule.opening, 'closing': schedule.closing,
+        }
+    if not aligned:
+        return _('Appointments start every %(minutes)d minutes.') % {'minutes': schedule.slot_minutes}
+    availability = load_days([day], schedule, exclude=exclude, fresh=fresh)[day]
+    if not availability.fits(index, length):
+        return _('All service bays are booked at that time.')
+    return None
+
+
+def invalidate_days(days):
+    for day in days:
+        _increment(_version_key(day))
+
+
+def invalidate_all():
+    # Bumping the generation orphans every cached day at once
+    _increment(GENERATION_KEY)
@@ -0,0 +1,150 @@
+# apps/bookings/events.py
+"""
+In-process publish/subscribe of booking changes for the live dashboards.
+
+A Booking save publishes an event after commit (see signals.py), and every
+open event stream in this process whose viewer may see the booking gets a
+copy on its own bounded asyncio queue. Saves run on sync threads while the
+streams wait on the event loop, so delivery goes through
+call_soon_threadsafe(). An idle stream is one suspended coroutine and an
+empty queue, so a worker can hold thousands of them.
+
+Events do not cross processes: serve the stream from a single ASGI worker,
+or each stream only hears about bookings saved by its own worker.
+"""
+import asyncio
+import itertools
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+CREATED = 'booking.created'
+ASSIGNED = 'booking.assigned'
+STATUS_CHANGED = 'booking.status'
+# Sent instead of events a slow client could not keep up with; it should reload
+RESYNC = 'resync'
+
+QUEUE_SIZE = 100
+RETRY_MILLISECONDS = 5000
+
+
+class Subscription:
+    """
+    One stream's queue and the predicate selecting the events it receives.
+    Must be created on the event loop that will read it.
+    """
+
+    def __init__(self, accepts):
+        self.accepts = accepts
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': RESYNC})
+
+    async def get(self, timeout):
+        """
+        The next event, or None after `timeout` seconds without one.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, accepts):
+        subscription = Subscription(accepts)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        """
+        Queue `event` (a JSON-serialisable dict with a 'type') for every
+        subscription that accepts it. Safe to call from any thread.
+        """
+        event = {**event, 'id': next(self._ids)}
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.accepts(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Its event loop has closed
+                self.unsubscribe(subscription)
+
+
+broker = EventBroker()
+
+
+def booking_event(kind, booking, previous_staff_id=None):
+    return {
+        'type': kind,
+        'booking': booking.pk,
+        'status': booking.status,
+        'scheduled_date': booking.scheduled_date,
+        'customer': booking.customer_id,
+        'assigned_staff': booking.assigned_staff_id,
+        'previous_staff': previous_staff_id,
+    }
+
+
+def visible_to(user):
+    """
+    The predicate for `user`'s stream: admins see every booking, staff
+    members the ones assigned to them or just taken away from them.
+    """
+    if user.is_admin:
+        return lambda event: True
+    return lambda event: user.pk in (event.get('assigned_staff'), event.get('previous_staff'))
+
+
+def format_event(event):
+    lines = [f"event: {event['type']}"]
+    if 'id' in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f'data: {json.dumps(event, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream(accepts, keepalive=15, source=broker):
+    """
+    Yield Server-Sent Events for the events `accepts` selects, with a
+    comment line every `keepalive` seconds so proxies keep the connection
+    open. Ends after a RESYNC; the client's EventSource reconnects.
+    """
+    subscription = source.subscribe(accepts)
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            event = await subscription.get(keepalive)
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+            if event['type'] == RESYNC:
+                return
+    finally:
+        source.unsubscribe(subscription)
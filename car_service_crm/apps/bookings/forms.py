@@ -3,19 +3,24 @@ from django import forms
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from .models import Booking,Feedback
+from .availability import unavailable_reason
 from apps.customers.models import Vehicle
-from apps.services.models import Service  # Add this import
+from apps.services.forms import ServiceChoiceField
 
 class BookingForm(forms.ModelForm):
     """
     Form for creating/updating bookings by customers.
+    Service choices come from the cached catalog (apps.services.catalog); the
+    model's foreign key check still confirms the service exists on submit, as
+    another process may have deleted it since this one cached the catalog.
     """
+    service = ServiceChoiceField(label=_('Service'))
+
     class Meta:
         model = Booking
         fields = ('vehicle', 'service', 'scheduled_date', 'notes')  # Updated service_type to service
         labels = {
             'vehicle': _('Vehicle'),
-            'service': _('Service'),  # Updated label
             'scheduled_date': _('Scheduled Date and Time'),
             'notes': _('Additional Notes'),
         }
@@ -29,14 +34,24 @@ class BookingForm(forms.ModelForm):
         if user:
             # Limit vehicle choices to those owned by the customer
             self.fields['vehicle'].queryset = Vehicle.objects.filter(owner=user)
-        # Set service choices from Service model
-        self.fields['service'].queryset = Service.objects.all()
 
     def clean_scheduled_date(self):
         scheduled_date = self.cleaned_data.get('scheduled_date')
         if scheduled_date < timezone.now():
             raise forms.ValidationError(_('Scheduled date cannot be in the past.'))
         return scheduled_date
+
+    def clean(self):
+        cleaned_data = super().clean()
+        service = cleaned_data.get('service')
+        scheduled_date = cleaned_data.get('scheduled_date')
+        # Only re-check capacity when the slot itself changes, so an edit to
+        # the notes of a booking on an overbooked day still saves
+        if service and scheduled_date and {'service', 'scheduled_date'} & set(self.changed_data):
+            reason = unavailable_reason(service.duration, scheduled_date, exclude=self.instance.pk)
+            if reason:
+                self.add_error('scheduled_date', reason)
+        return cleaned_data
     
 class FeedbackForm(forms.ModelForm):
     """
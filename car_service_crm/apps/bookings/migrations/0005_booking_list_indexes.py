@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_indexes'),
+        ('customers', '0002_vehicle_indexes'),
+        ('services', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['scheduled_date', 'id'], name='booking_sched_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'scheduled_date'], name='booking_status_sched_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['assigned_staff', 'scheduled_date'], name='booking_staff_sched_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['service', 'scheduled_date'], name='booking_service_sched_idx'),
+        ),
+    ]
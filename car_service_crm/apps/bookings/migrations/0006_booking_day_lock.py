@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDayLock',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False, verbose_name='Day')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Locked At')),
+            ],
+            options={
+                'verbose_name': 'Booking Day Lock',
+                'verbose_name_plural': 'Booking Day Locks',
+            },
+        ),
+    ]
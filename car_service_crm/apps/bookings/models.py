@@ -5,6 +5,23 @@ from apps.users.models import User
 from apps.customers.models import Vehicle
 from apps.services.models import Service
 
+class BookingQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Bookings for list pages: joins everything the list templates and
+        Booking.__str__ dereference per row, and skips the free-text columns
+        they never show.
+        """
+        return self.select_related('service', 'vehicle', 'customer', 'assigned_staff').defer(
+            'notes', 'service__description',
+        )
+
+    def for_detail(self):
+        """
+        A single booking with its related rows, including any feedback.
+        """
+        return self.select_related('service', 'vehicle', 'customer', 'assigned_staff', 'feedback')
+
 class Booking(models.Model):
     STATUS_PENDING = 'PENDING'
     STATUS_IN_PROGRESS = 'IN_PROGRESS'
@@ -67,10 +84,29 @@ class Booking(models.Model):
 
     feedback_submitted = models.BooleanField(default=False, verbose_name=_('Feedback Submitted'))
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Booking')
         verbose_name_plural = _('Bookings')
         ordering = ['-scheduled_date']
+        indexes = [
+            # Customer dashboard: upcoming bookings per customer by status
+            models.Index(fields=['customer', 'status', 'scheduled_date'], name='booking_cust_status_sched_idx'),
+            # Staff dashboard: assigned bookings per technician by status
+            models.Index(fields=['assigned_staff', 'status', 'scheduled_date'], name='booking_staff_status_sched_idx'),
+            # Monthly reports: completed bookings within a created_at range
+            models.Index(fields=['status', 'created_at'], name='booking_status_created_idx'),
+            # Admin dashboard: most recently created bookings
+            models.Index(fields=['-created_at'], name='booking_created_idx'),
+            # Keyset-paginated booking lists and their filters
+            models.Index(fields=['scheduled_date', 'id'], name='booking_sched_id_idx'),
+            models.Index(fields=['status', 'scheduled_date'], name='booking_status_sched_idx'),
+            models.Index(fields=['assigned_staff', 'scheduled_date'], name='booking_staff_sched_idx'),
+            models.Index(fields=['service', 'scheduled_date'], name='booking_service_sched_idx'),
+            # Reminder scheduler: bookings changed since its last poll
+            models.Index(fields=['updated_at'], name='booking_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.service.name} for {self.vehicle} on {self.scheduled_date}"
@@ -111,4 +147,21 @@ class Feedback(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Feedback for Booking #{self.booking.id}"
\ No newline at end of file
+        return f"Feedback for Booking #{self.booking.id}"
+
+
+class BookingDayLock(models.Model):
+    """
+    One row per workshop day. Booking writes update it first, so changes to
+    the same day's bookings are serialised while other days proceed in parallel.
+    """
+    day = models.DateField(primary_key=True, verbose_name=_('Day'))
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Last Locked At'))
+
+    class Meta:
+        verbose_name = _('Booking Day Lock')
+        verbose_name_plural = _('Booking Day Locks')
+
+    def __str__(self):
+        return f"Booking lock for {self.day}"
+
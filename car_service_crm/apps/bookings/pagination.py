@@ -0,0 +1,61 @@
+# apps/bookings/pagination.py
+"""
+Keyset (cursor) pagination for booking lists.
+
+Pages are ordered newest first on (scheduled_date, id) and each page starts
+strictly after the last row of the previous one, so fetching page N costs the
+same as page 1 instead of growing with the OFFSET.
+"""
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_position(scheduled_date, pk):
+    return urlsafe_base64_encode(force_bytes(f"{scheduled_date.isoformat()}|{pk}"))
+
+
+def encode_cursor(booking):
+    return encode_position(booking.scheduled_date, booking.pk)
+
+
+def decode_cursor(cursor):
+    """
+    Return the (scheduled_date, pk) encoded in `cursor`, or None if it is malformed.
+    """
+    try:
+        scheduled_date, pk = force_str(urlsafe_base64_decode(cursor)).split('|')
+        return datetime.fromisoformat(scheduled_date), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def after_cursor(queryset, cursor):
+    """
+    Order `queryset` newest first and restrict it to rows after `cursor`.
+    The redundant scheduled_date <= bound gives the database a range to seek
+    to; the OR alone would make it walk the index from the top.
+    """
+    queryset = queryset.order_by('-scheduled_date', '-pk')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        scheduled_date, pk = position
+        queryset = queryset.filter(
+            Q(scheduled_date__lt=scheduled_date) | Q(pk__lt=pk),
+            scheduled_date__lte=scheduled_date,
+        )
+    return queryset
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for the page of `queryset` following `cursor`.
+    next_cursor is None on the last page; a malformed cursor yields the first page.
+    """
+    rows = list(after_cursor(queryset, cursor)[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
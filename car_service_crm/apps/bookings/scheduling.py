@@ -0,0 +1,93 @@
+# apps/bookings/scheduling.py
+"""
+Overlap-checked booking writes.
+
+BookingForm checks availability against the cached day counts, but two
+requests can pass that check for the last free bay at the same moment.
+save_booking() closes the gap: it takes the BookingDayLock row of every day
+the booking touches, re-checks the slot against the database and saves, all
+in one short transaction. Other days are unaffected.
+
+The lock is taken with an UPDATE rather than select_for_update(): on
+PostgreSQL both lock the row, and on SQLite, which ignores FOR UPDATE, the
+write takes the database's write lock before the availability read.
+"""
+import time
+
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from .availability import unavailable_reason
+from .models import Booking, BookingDayLock
+
+# SQLite reports lock conflicts it cannot wait out as OperationalError;
+# such attempts are rolled back and retried this many times in total
+LOCK_ATTEMPTS = 8
+LOCK_RETRY_DELAY = 0.01
+
+
+class SlotUnavailable(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def lock_days(days):
+    """
+    Lock the BookingDayLock rows for `days` until the current transaction
+    ends, creating them as needed. Rows are locked in date order so two
+    multi-day writers cannot deadlock.
+    """
+    now = timezone.now()
+    for day in sorted(set(days)):
+        if not BookingDayLock.objects.filter(day=day).update(locked_at=now):
+            # First booking write for this day
+            BookingDayLock.objects.bulk_create([BookingDayLock(day=day)], ignore_conflicts=True)
+            BookingDayLock.objects.filter(day=day).update(locked_at=now)
+
+
+def _is_lock_conflict(exc):
+    return connection.vendor == 'sqlite' and 'locked' in str(exc)
+
+
+def _booking_days(booking):
+    days = {timezone.localtime(booking.scheduled_date).date()}
+    if booking.pk:
+        # Read before the transaction so its first statement is the lock
+        previous = Booking.objects.filter(pk=booking.pk).values_list('scheduled_date', flat=True).first()
+        if previous is not None:
+            days.add(timezone.localtime(previous).date())
+    return days
+
+
+def save_booking(booking, after_save=None):
+    """
+    Save `booking` if a bay is free for it, serialised against other writes
+    to the same day. `after_save(booking)` runs in the same transaction, for
+    work that must commit or roll back with the booking. Raises
+    SlotUnavailable if the slot was taken in the meantime.
+    """
+    adding = booking._state.adding
+    days = _booking_days(booking)
+    for attempt in range(LOCK_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                lock_days(days)
+                if booking.status != Booking.STATUS_CANCELLED:
+                    reason = unavailable_reason(
+                        booking.service.duration, booking.scheduled_date, exclude=booking.pk, fresh=True,
+                    )
+                    if reason:
+                        raise SlotUnavailable(reason)
+                booking.save()
+                if after_save:
+                    after_save(booking)
+            return booking
+        except OperationalError as exc:
+            # Retrying is only safe when this call owns the whole transaction
+            if not _is_lock_conflict(exc) or connection.in_atomic_block or attempt == LOCK_ATTEMPTS - 1:
+                raise
+            if adding:
+                booking.pk = None
+                booking._state.adding = True
+            time.sleep(LOCK_RETRY_DELAY * (attempt + 1))
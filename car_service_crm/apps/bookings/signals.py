@@ -0,0 +1,102 @@
+# apps/bookings/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.fragments.cache import bump, scope
+from apps.services.models import Service
+from .availability import invalidate_all, invalidate_days
+from .events import ASSIGNED, CREATED, STATUS_CHANGED, booking_event, broker
+from .models import Booking, Feedback
+
+
+def _invalidate_on_commit(*moments):
+    days = {timezone.localtime(moment).date() for moment in moments if moment is not None}
+    # After commit, so a concurrent rebuild cannot cache the pre-commit day
+    transaction.on_commit(lambda: invalidate_days(days))
+
+
+def _booking_scopes(customer_id, staff_id):
+    scopes = {'bookings', scope('bookings', 'customer', customer_id)}
+    if staff_id is not None:
+        scopes.add(scope('bookings', 'staff', staff_id))
+    return scopes
+
+
+def _bump_fragments(scopes):
+    # Now, so this connection sees its own change straight away, and again
+    # after commit, so no process keeps a fragment rendered from pre-commit data
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+@receiver(pre_save, sender=Booking)
+def capture_previous_state(sender, instance, raw, **kwargs):
+    if raw or not instance.pk:
+        return
+    # One query for all: the old day for availability, the old owners for
+    # fragments and the old staff and status for live events
+    previous = (
+        Booking.objects.filter(pk=instance.pk)
+        .values_list('scheduled_date', 'customer_id', 'assigned_staff_id', 'status').first()
+    )
+    if previous is not None:
+        scheduled_date, customer_id, staff_id, status = previous
+        instance._availability_before = scheduled_date
+        instance._fragment_scopes_before = _booking_scopes(customer_id, staff_id)
+        instance._staff_before = staff_id
+        instance._status_before = status
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_booking_days(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    _invalidate_on_commit(getattr(instance, '_availability_before', None), instance.scheduled_date)
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_deleted_booking_day(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.scheduled_date)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_booking_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = _booking_scopes(instance.customer_id, instance.assigned_staff_id)
+    _bump_fragments(scopes | getattr(instance, '_fragment_scopes_before', set()))
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_events(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous_staff_id = getattr(instance, '_staff_before', instance.assigned_staff_id)
+    if created:
+        events = [booking_event(CREATED, instance)]
+    else:
+        events = []
+        if instance.assigned_staff_id != previous_staff_id:
+            events.append(booking_event(ASSIGNED, instance, previous_staff_id))
+        if instance.status != getattr(instance, '_status_before', instance.status):
+            events.append(booking_event(STATUS_CHANGED, instance))
+    for event in events:
+        # After commit, so streams never announce a change that was rolled back
+        transaction.on_commit(lambda event=event: broker.publish(event))
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def bump_feedback_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _bump_fragments({'feedback'})
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_service_durations(sender, **kwargs):
+    transaction.on_commit(invalidate_all)
@@ -1,3 +1,571 @@
-from django.test import TestCase
+# apps/bookings/tests.py
+from datetime import datetime, time, timedelta
+from types import SimpleNamespace
+from unittest import mock
+import asyncio
+import threading
+import time as clock
 
-# Create your tests here.
+from django.core.cache import cache
+
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from apps.communication.outbox import enqueue_email
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+from . import availability
+from .availability import (
+    DayAvailability, Schedule, day_availability, load_days, next_free_slots, unavailable_reason,
+)
+from .events import ASSIGNED, CREATED, QUEUE_SIZE, RESYNC, STATUS_CHANGED, EventBroker, broker, stream, visible_to
+from .forms import BookingForm
+from .scheduling import SlotUnavailable, save_booking
+from .models import Booking, Feedback
+
+
+def create_listing_bookings(customer, staff, count, prefix='row'):
+    """
+    Create `count` bookings for `customer`, each with its own service and
+    vehicle, so a list page that dereferences relations per row would issue
+    a query per booking.
+    """
+    services = Service.objects.bulk_create([
+        Service(name=f'{prefix} service {i}', price=50 + i, duration=timedelta(hours=1))
+        for i in range(count)
+    ])
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(owner=customer, make='Mazda', model='3', year=2019,
+                license_plate=f'{prefix}{i}'[:20], vin=f'{prefix[:3]}{i:014d}')
+        for i in range(count)
+    ])
+    now = timezone.now()
+    return Booking.objects.bulk_create([
+        Booking(customer=customer, vehicle=vehicle, service=service, assigned_staff=staff,
+                scheduled_date=now + timedelta(days=i + 1), status=Booking.STATUS_PENDING,
+                notes='Please check the brakes as well.')
+        for i, (service, vehicle) in enumerate(zip(services, vehicles))
+    ])
+
+
+class BookingListQueryCountTests(TestCase):
+    """
+    Customer booking pages must issue a fixed number of queries however many
+    bookings they show.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass',
+            first_name='Sam', last_name='Staff', role=User.ROLE_STAFF,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Casey', last_name='Customer', role=User.ROLE_CUSTOMER,
+        )
+        cls.bookings = create_listing_bookings(cls.customer, cls.staff, 30)
+
+    def setUp(self):
+        # Rendered fragments would otherwise be served without their queries
+        cache.clear()
+        self.client.force_login(self.customer)
+
+    def test_booking_list(self):
+        # Session, user, conditional GET validators and the bookings
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('bookings:booking_list'))
+        self.assertEqual(len(response.context['bookings']), 30)
+
+    def test_customer_dashboard(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('customers:customers_dashboard'))
+        self.assertEqual(len(response.context['upcoming_bookings']), 5)
+
+    def test_booking_detail(self):
+        booking = self.bookings[0]
+        booking.status = Booking.STATUS_COMPLETED
+        booking.feedback_submitted = True
+        booking.save()
+        Feedback.objects.create(booking=booking, rating=5, comments='Great')
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('bookings:booking_detail', args=[booking.pk]))
+        self.assertContains(response, 'Please check the brakes as well.')
+        self.assertContains(response, 'Great')
+
+    def test_listing_defers_notes(self):
+        booking = Booking.objects.for_listing().get(pk=self.bookings[0].pk)
+        self.assertEqual(booking.get_deferred_fields(), {'notes'})
+        with self.assertNumQueries(0):
+            str(booking)
+            booking.customer.get_full_name()
+            str(booking.assigned_staff)
+
+    def test_admin_changelist(self):
+        admin = User.objects.create_superuser(
+            email='root@example.com', username='root', password='pass', role=User.ROLE_ADMIN,
+        )
+        self.client.force_login(admin)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('admin:bookings_booking_changelist'))
+        self.assertEqual(response.context['cl'].result_count, 30)
+
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Booking pages answer a matching If-None-Match with 304 before rendering,
+    and stop matching once what they show changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.bookings = create_listing_bookings(cls.customer, None, 3)
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+
+    def assertNotModified(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+        return response
+
+    def test_list_validators(self):
+        url = reverse('bookings:booking_list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        with self.assertNumQueries(3):
+            not_modified = self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        booking = Booking.objects.get(pk=self.bookings[0].pk)
+        booking.status = Booking.STATUS_IN_PROGRESS
+        booking.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_deleting_a_booking_changes_the_etag(self):
+        url = reverse('bookings:booking_list')
+        etag = self.client.get(url)['ETag']
+        Booking.objects.filter(pk=self.bookings[0].pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # No timestamp moved, so If-Modified-Since must not be honoured
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date()).status_code, 200)
+
+    def test_detail_changes_when_feedback_is_submitted(self):
+        booking = Booking.objects.get(pk=self.bookings[1].pk)
+        booking.status = Booking.STATUS_COMPLETED
+        booking.save()
+        url = reverse('bookings:booking_detail', args=[booking.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        response = self.client.post(
+            reverse('bookings:feedback_create', args=[booking.pk]), {'rating': 4, 'comments': 'Quick job'},
+        )
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Quick job')
+
+    def test_renaming_a_service_changes_the_etag(self):
+        booking = self.bookings[2]
+        urls = [reverse('bookings:booking_list'), reverse('bookings:booking_detail', args=[booking.pk])]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        service = Service.objects.get(pk=booking.service_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            service.name = 'Renamed Service'
+            service.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url, HTTP_IF_NONE_MATCH=etag), 'Renamed Service')
+
+    def test_other_customers_booking_is_not_found(self):
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        self.client.force_login(other)
+        url = reverse('bookings:booking_detail', args=[self.bookings[0].pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+WORKSHOP = {
+    'WORKSHOP_BAYS': 2,
+    'WORKSHOP_OPENING_HOUR': 8,
+    'WORKSHOP_CLOSING_HOUR': 12,
+    'WORKSHOP_SLOT_MINUTES': 30,
+    'WORKSHOP_OPEN_WEEKDAYS': range(7),
+}
+
+
+@override_settings(**WORKSHOP)
+class DayAvailabilityTests(SimpleTestCase):
+
+    def test_counts_bookings_per_slot_and_clips_to_opening_hours(self):
+        day = DayAvailability.build(None, Schedule(), [(0, 2), (1, 2), (2, 2), (4, 1), (-2, 3), (7, 4)])
+        self.assertEqual(day.counts, [2, 2, 2, 1, 1, 0, 0, 1])
+        self.assertEqual(day.overbooked, 0)
+        self.assertEqual(DayAvailability.build(None, Schedule(), [(0, 1)] * 3).overbooked, 1)
+
+    def test_free_starts(self):
+        day = DayAvailability(None, 2, [1, 1, 1, 1, 2, 2, 1, 1])
+        # One slot: anything but slots 4-5, which both bays use
+        self.assertEqual(day.free_starts(1), 0b11001111)
+        # Three slots: only 0-2 and 1-3 avoid slots 4-5; 9 slots fit nowhere
+        self.assertEqual(day.free_starts(3), 0b00000011)
+        self.assertEqual(day.free_starts(9), 0)
+        self.assertTrue(day.fits(1, 3))
+        self.assertFalse(day.fits(2, 3))
+
+    @override_settings(WORKSHOP_BAYS=3, WORKSHOP_CLOSING_HOUR=13)
+    def test_staggered_bookings_leave_room_no_single_bay_has(self):
+        # Two of three bays are busy over slots 2-5, but never the same two
+        # throughout, so no one bay is free for all four slots
+        day = DayAvailability.build(None, Schedule(), [(0, 10), (0, 2), (0, 4), (4, 4), (6, 2)])
+        self.assertEqual(day.counts[2:6], [2, 2, 2, 2])
+        self.assertTrue(day.fits(2, 4))
+        self.assertFalse(day.fits(0, 1))
+
+
+@override_settings(**WORKSHOP)
+class AvailabilityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.customer, make='Mazda', model='3', year=2019, license_plate='AV1', vin='A' * 17,
+        )
+        cls.service = Service.objects.create(name='Gearbox Rebuild', price=500, duration=timedelta(minutes=60))
+        cls.day = timezone.localdate() + timedelta(days=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def at(self, hour, minute=0, day=None):
+        return timezone.make_aware(datetime.combine(day or self.day, time(hour, minute)))
+
+    def book(self, start):
+        return Booking.objects.create(customer=self.customer, vehicle=self.vehicle, service=self.service,
+                                      scheduled_date=start)
+
+    def form(self, start, instance=None):
+        return BookingForm(
+            {'vehicle': self.vehicle.pk, 'service': self.service.pk,
+             'scheduled_date': timezone.localtime(start).strftime('%Y-%m-%dT%H:%M')},
+            user=self.customer, instance=instance,
+        )
+
+    def test_next_free_slots_skip_full_bays(self):
+        self.book(self.at(8))
+        self.book(self.at(8, 30))
+        slots = next_free_slots(self.service.duration, after=self.at(7), count=3)
+        # Until 09:00 every start overlaps both bookings; at 09:00 the first bay frees up
+        self.assertEqual(slots, [self.at(9), self.at(9, 30), self.at(10)])
+
+    def test_next_free_slots_move_to_the_next_day(self):
+        slots = next_free_slots(self.service.duration, after=self.at(10, 45), count=3)
+        next_day = self.day + timedelta(days=1)
+        self.assertEqual(slots, [self.at(11), self.at(8, day=next_day), self.at(8, 30, day=next_day)])
+
+    def test_form_rejects_full_slot(self):
+        self.book(self.at(9))
+        self.book(self.at(9, 30))
+        form = self.form(self.at(9))
+        self.assertFalse(form.is_valid())
+        self.assertIn('All service bays are booked at that time.', form.errors['scheduled_date'])
+        self.assertTrue(self.form(self.at(10, 30)).is_valid())
+
+    def test_form_rejects_slots_outside_the_schedule(self):
+        cases = {
+            self.at(9, 10): 'Appointments start every 30 minutes.',
+            self.at(11, 30): 'The service must fit between 08:00 and 12:00.',
+            self.at(7): 'The service must fit between 08:00 and 12:00.',
+        }
+        for start, message in cases.items():
+            with self.subTest(start=start):
+                self.assertIn(message, self.form(start).errors['scheduled_date'])
+        with self.settings(WORKSHOP_OPEN_WEEKDAYS=[]):
+            self.assertEqual(unavailable_reason(self.service.duration, self.at(9)),
+                             'The workshop is closed on that day.')
+
+    def test_editing_a_booking_ignores_its_own_slot(self):
+        booking = self.book(self.at(9))
+        self.book(self.at(9))
+        self.assertTrue(self.form(self.at(9, 30), instance=booking).is_valid())
+
+    @override_settings(WORKSHOP_BAYS=3, WORKSHOP_CLOSING_HOUR=13)
+    def test_save_booking_accepts_room_left_between_staggered_bookings(self):
+        def service(hours):
+            name = f'Staggered job {Service.objects.count()}'
+            return Service.objects.create(name=name, price=100, duration=timedelta(hours=hours))
+
+        for (hour, minute), hours in [((8, 0), 5), ((8, 0), 1), ((8, 0), 2), ((10, 0), 2), ((11, 0), 1)]:
+            Booking.objects.create(customer=self.customer, vehicle=self.vehicle, service=service(hours),
+                                   scheduled_date=self.at(hour, minute))
+        # 09:00-11:00 has two of three bays busy throughout, though never the same two
+        booking = Booking(customer=self.customer, vehicle=self.vehicle, service=service(2),
+                          scheduled_date=self.at(9))
+        save_booking(booking)
+        self.assertIsNotNone(booking.pk)
+        with self.assertRaises(SlotUnavailable):
+            save_booking(Booking(customer=self.customer, vehicle=self.vehicle, service=self.service,
+                                 scheduled_date=self.at(9)))
+
+    def test_day_cache_is_invalidated_by_booking_changes(self):
+        self.assertEqual(day_availability(self.day).counts, [0] * 8)
+        with self.assertNumQueries(0):
+            day_availability(self.day)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.at(8))
+        self.assertEqual(day_availability(self.day).counts, [1, 1] + [0] * 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.scheduled_date = self.at(8, day=self.day + timedelta(days=1))
+            booking.save()
+        self.assertEqual(day_availability(self.day).counts, [0] * 8)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.duration = timedelta(minutes=90)
+            self.service.save()
+        self.assertEqual(day_availability(self.day + timedelta(days=1)).counts, [1, 1, 1] + [0] * 5)
+
+    def test_counts_read_before_a_commit_are_not_served_after_it(self):
+        query_days = availability._query_days
+
+        def query_then_book(*args, **kwargs):
+            result = query_days(*args, **kwargs)
+            # Another worker books and commits before this one caches the day
+            with self.captureOnCommitCallbacks(execute=True):
+                self.book(self.at(8))
+            return result
+
+        with mock.patch.object(availability, '_query_days', side_effect=query_then_book):
+            self.assertEqual(day_availability(self.day).counts, [0] * 8)
+        self.assertEqual(day_availability(self.day).counts, [1, 1] + [0] * 6)
+
+    def test_save_booking_does_not_trust_the_cached_day(self):
+        self.assertEqual(day_availability(self.day).counts, [0] * 8)
+        # Not committed, so the cached day still shows both bays free
+        self.book(self.at(9))
+        self.book(self.at(9))
+        self.assertTrue(self.form(self.at(9)).is_valid())
+        with self.assertRaises(SlotUnavailable):
+            save_booking(Booking(customer=self.customer, vehicle=self.vehicle, service=self.service,
+                                 scheduled_date=self.at(9)))
+
+    def test_availability_endpoint(self):
+        self.client.force_login(self.customer)
+        self.book(self.at(8))
+        self.book(self.at(8))
+        response = self.client.get(reverse('bookings:availability'), {
+            'service': self.service.pk, 'count': 2, 'after': self.at(7).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [slot['value'] for slot in response.json()['slots']],
+            [f'{self.day:%Y-%m-%d}T09:00', f'{self.day:%Y-%m-%d}T09:30'],
+        )
+        response = self.client.get(reverse('bookings:availability'), {'service': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('bookings:availability'), {
+            'service': self.service.pk, 'after': '2026-02-30T10:00',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(**WORKSHOP)
+class ConcurrentBookingTests(TransactionTestCase):
+    """
+    Parallel writers must never put more bookings in a slot than there are bays.
+    """
+    threads = 12
+    attempts_per_thread = 8
+
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        self.vehicle = Vehicle.objects.create(
+            owner=self.customer, make='Mazda', model='3', year=2019, license_plate='ST1', vin='S' * 17,
+        )
+        self.service = Service.objects.create(name='Gearbox Rebuild', price=500, duration=timedelta(minutes=60))
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def run_threads(self, target):
+        errors = []
+
+        def worker(n):
+            try:
+                target(n)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+        started = clock.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        self.assertEqual(errors, [])
+        return clock.perf_counter() - started
+
+    def booking(self, day, hour, minute=0, service=None):
+        return Booking(
+            customer=self.customer, vehicle=self.vehicle, service=service or self.service,
+            scheduled_date=timezone.make_aware(datetime.combine(day, time(hour, minute))),
+        )
+
+    def test_no_double_booking_under_contention(self):
+        outcomes = {'saved': 0, 'rejected': 0}
+        lock = threading.Lock()
+
+        def contend(n):
+            # Every thread goes after the same few slots of the same day
+            for i in range(self.attempts_per_thread):
+                try:
+                    save_booking(self.booking(self.day, 8 + (n + i) % 3))
+                    result = 'saved'
+                except SlotUnavailable:
+                    result = 'rejected'
+                with lock:
+                    outcomes[result] += 1
+
+        self.run_threads(contend)
+        # 2 bays x 3 hour-long slots between 08:00 and 11:00
+        self.assertEqual(outcomes['saved'], 6)
+        self.assertEqual(outcomes['saved'] + outcomes['rejected'], self.threads * self.attempts_per_thread)
+        day = load_days([self.day], fresh=True)[self.day]
+        self.assertEqual(day.overbooked, 0)
+
+    def test_throughput_close_to_unchecked_inserts(self):
+        # Each thread fills its own day with back-to-back half-hour bookings
+        service = Service.objects.create(name='Wiper Swap', price=20, duration=timedelta(minutes=30))
+        days = [self.day + timedelta(days=n) for n in range(self.threads)]
+        slots = [(hour, minute) for hour in range(8, 12) for minute in (0, 30)][:self.attempts_per_thread]
+
+        def confirm(booking):
+            enqueue_email(self.customer, 'Booking Confirmation', 'Confirmed', booking=booking)
+
+        def unchecked(n):
+            # The create view's write before save_booking(): booking and email in one transaction
+            for hour, minute in slots:
+                booking = self.booking(days[n], hour, minute, service)
+                with transaction.atomic():
+                    booking.save()
+                    confirm(booking)
+
+        def checked(n):
+            for hour, minute in slots:
+                save_booking(self.booking(days[n] + timedelta(days=self.threads), hour, minute, service), confirm)
+
+        unchecked_seconds = self.run_threads(unchecked)
+        checked_seconds = self.run_threads(checked)
+        self.assertEqual(Booking.objects.count(), 2 * self.threads * len(slots))
+        # The lock and re-check add two short statements per write; allow
+        # generous headroom so a loaded machine does not make this flaky
+        self.assertLess(checked_seconds, unchecked_seconds * 3)
+
+
+class BookingEventStreamTests(SimpleTestCase):
+
+    async def test_delivers_accepted_events_published_from_other_threads(self):
+        source = EventBroker()
+        events = stream(lambda event: event['assigned_staff'] == 1, keepalive=5, source=source)
+        self.assertTrue((await anext(events)).startswith('retry: '))
+        self.assertEqual(len(source), 1)
+        await asyncio.to_thread(source.publish, {'type': ASSIGNED, 'assigned_staff': 2, 'booking': 6})
+        await asyncio.to_thread(source.publish, {'type': ASSIGNED, 'assigned_staff': 1, 'booking': 7})
+        chunk = await anext(events)
+        self.assertTrue(chunk.startswith('event: booking.assigned\nid: 2\ndata: '))
+        self.assertIn('"booking": 7', chunk)
+        await events.aclose()
+        self.assertEqual(len(source), 0)
+
+    async def test_keepalive_while_idle(self):
+        events = stream(lambda event: True, keepalive=0.01, source=EventBroker())
+        await anext(events)
+        self.assertEqual(await anext(events), ': keepalive\n\n')
+        await events.aclose()
+
+    async def test_slow_client_is_told_to_resync(self):
+        source = EventBroker()
+        events = stream(lambda event: True, keepalive=5, source=source)
+        await anext(events)
+        for n in range(QUEUE_SIZE + 1):
+            source.publish({'type': CREATED, 'booking': n})
+        self.assertTrue((await anext(events)).startswith(f'event: {RESYNC}\n'))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(events)
+        self.assertEqual(len(source), 0)
+
+    def test_staff_see_bookings_assigned_to_or_taken_from_them(self):
+        accepts = visible_to(SimpleNamespace(pk=3, is_admin=False))
+        self.assertTrue(accepts({'assigned_staff': 3, 'previous_staff': None}))
+        self.assertTrue(accepts({'assigned_staff': 4, 'previous_staff': 3}))
+        self.assertFalse(accepts({'assigned_staff': 4, 'previous_staff': None}))
+        self.assertTrue(visible_to(SimpleNamespace(pk=1, is_admin=True))({'assigned_staff': 4}))
+
+
+class BookingEventSignalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.other_staff = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.booking = create_listing_bookings(cls.customer, cls.staff, 1)[0]
+
+    def published(self, change):
+        with mock.patch.object(broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+        return [call.args[0] for call in publish.call_args_list]
+
+    def test_created(self):
+        booking = Booking(
+            customer=self.customer, vehicle=self.booking.vehicle, service=self.booking.service,
+            scheduled_date=self.booking.scheduled_date + timedelta(days=30),
+        )
+        [event] = self.published(booking.save)
+        self.assertEqual((event['type'], event['booking'], event['customer']), (CREATED, booking.pk, self.customer.pk))
+
+    def test_reassignment_and_status_change(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.assigned_staff = self.other_staff
+        booking.status = Booking.STATUS_IN_PROGRESS
+        assigned, status = self.published(booking.save)
+        self.assertEqual(assigned['type'], ASSIGNED)
+        self.assertEqual((assigned['assigned_staff'], assigned['previous_staff']), (self.other_staff.pk, self.staff.pk))
+        self.assertEqual((status['type'], status['status']), (STATUS_CHANGED, Booking.STATUS_IN_PROGRESS))
+
+    def test_other_edits_and_rollbacks_publish_nothing(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.notes = 'Also rotate the tyres.'
+        self.assertEqual(self.published(booking.save), [])
+
+        def rolled_back():
+            with transaction.atomic():
+                booking.status = Booking.STATUS_COMPLETED
+                booking.save()
+                transaction.set_rollback(True)
+        self.assertEqual(self.published(rolled_back), [])
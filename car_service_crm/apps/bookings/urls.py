@@ -6,6 +6,7 @@ from .views import (
     BookingUpdateView,
     BookingDetailView,
     FeedbackCreateView,
+    AvailabilityView,
 )
 
 app_name = 'bookings'
@@ -16,4 +17,5 @@ urlpatterns = [
     path('<int:pk>/edit/', BookingUpdateView.as_view(), name='booking_update'),
     path('<int:pk>/', BookingDetailView.as_view(), name='booking_detail'),
     path('<int:pk>/feedback/', FeedbackCreateView.as_view(), name='feedback_create'),
+    path('availability/', AvailabilityView.as_view(), name='availability'),
 ]
\ No newline at end of file
@@ -1,22 +1,30 @@
 # apps/bookings/views.py
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import ListView, CreateView, UpdateView, DetailView
+from django.views.generic import ListView, CreateView, UpdateView, DetailView, View
 from django.urls import reverse_lazy
 from django.shortcuts import redirect, get_object_or_404
 from django.utils.translation import gettext_lazy as _
-from django.core.mail import send_mail
-from django.template import Template, Context
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
 from .models import Booking, Feedback
 from .forms import BookingForm, FeedbackForm
-from apps.communication.models import NotificationTemplate, CommunicationLog
-
-class BookingListView(LoginRequiredMixin, ListView):
+from .availability import next_free_slots
+from .scheduling import SlotUnavailable, save_booking
+from apps.services.catalog import get_catalog
+from apps.communication.notifications import render_notification
+from apps.communication.outbox import enqueue_email
+from apps.users.mixins import ConditionalGetMixin
+
+class BookingListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Booking
     template_name = 'bookings/booking_list.html'
     context_object_name = 'bookings'
+    # Each row also shows its vehicle and service
+    validator_fields = ('updated_at', 'vehicle__updated_at', 'service__updated_at')
 
     def get_queryset(self):
-        return Booking.objects.filter(customer=self.request.user)
+        return Booking.objects.for_listing().filter(customer=self.request.user)
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_customer:
@@ -36,49 +44,29 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.customer = self.request.user
-        response = super().form_valid(form)
-        # Send confirmation email
-        template = NotificationTemplate.objects.filter(name='Booking Confirmation', is_active=True).first()
-        if not template:
-            template = NotificationTemplate.objects.create(
-                name='Booking Confirmation',
-                subject='Your iCars Booking Confirmation',
-                message='Dear {customer}, your booking for {service} on {date} has been confirmed.',
-                is_active=True
-            )
-        rendered_message = Template(template.message).render(Context({
-            'customer': self.request.user.get_full_name(),
-            'service': form.instance.service.name,
-            'date': form.instance.scheduled_date.strftime('%Y-%m-%d %H:%M')
-        }))
+        # The booking and its confirmation email commit together, under the
+        # day's lock; the dispatch_outbox worker delivers the email later.
         try:
-            send_mail(
-                subject=template.subject,
-                message=rendered_message,
-                from_email='no-reply@icars.com',
-                recipient_list=[self.request.user.email],
-                fail_silently=False
-            )
-            CommunicationLog.objects.create(
-                recipient=self.request.user,
-                booking=form.instance,
-                message_type='EMAIL',
-                subject=template.subject,
-                message=rendered_message,
-                template=template,
-                status='SENT'
-            )
-        except Exception as e:
-            CommunicationLog.objects.create(
+            self.object = save_booking(form.instance, after_save=self.queue_confirmation)
+        except SlotUnavailable as exc:
+            form.add_error('scheduled_date', exc.message)
+            return self.form_invalid(form)
+        return redirect(self.get_success_url())
+
+    def queue_confirmation(self, booking):
+        notification = render_notification('Booking Confirmation', {
+            'customer': self.request.user.get_full_name(),
+            'service': booking.service.name,
+            'date': booking.scheduled_date.strftime('%Y-%m-%d %H:%M')
+        })
+        if notification:
+            enqueue_email(
                 recipient=self.request.user,
-                booking=form.instance,
-                message_type='EMAIL',
-                subject=template.subject,
-                message=rendered_message,
-                template=template,
-                status='FAILED'
+                subject=notification.subject,
+                message=notification.message,
+                template=notification.template,
+                booking=booking,
             )
-        return response
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_customer:
@@ -99,18 +87,30 @@ class BookingUpdateView(LoginRequiredMixin, UpdateView):
         kwargs['user'] = self.request.user
         return kwargs
 
+    def form_valid(self, form):
+        try:
+            self.object = save_booking(form.instance)
+        except SlotUnavailable as exc:
+            form.add_error('scheduled_date', exc.message)
+            return self.form_invalid(form)
+        return redirect(self.get_success_url())
+
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_customer:
             return redirect('users:home')
         return super().dispatch(request, *args, **kwargs)
 
-class BookingDetailView(LoginRequiredMixin, DetailView):
+class BookingDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = Booking
     template_name = 'bookings/booking_detail.html'
     context_object_name = 'booking'
+    validator_fields = ('updated_at', 'vehicle__updated_at', 'service__updated_at', 'feedback__created_at')
 
     def get_queryset(self):
-        return Booking.objects.filter(customer=self.request.user)
+        return Booking.objects.for_detail().filter(customer=self.request.user)
+
+    def get_validator_queryset(self):
+        return self.get_queryset().filter(pk=self.kwargs['pk'])
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_customer:
@@ -128,7 +128,9 @@ class FeedbackCreateView(LoginRequiredMixin, CreateView):
 
     def dispatch(self, request, *args, **kwargs):
 
-        self.booking = get_object_or_404(Booking, pk=self.kwargs['pk'], customer=request.user)
+        self.booking = get_object_or_404(
+            Booking.objects.select_related('service', 'vehicle'), pk=self.kwargs['pk'], customer=request.user
+        )
         # Check if booking is completed and feedback not already submitted
         if self.booking.status != Booking.STATUS_COMPLETED or self.booking.feedback_submitted:
             return redirect('bookings:booking_detail', pk=self.booking.pk)
@@ -160,7 +162,9 @@ class FeedbackCreateView(LoginRequiredMixin, CreateView):
     template_name = 'bookings/feedback_form.html'
 
     def dispatch(self, request, *args, **kwargs):
-        self.booking = get_object_or_404(Booking, pk=self.kwargs['pk'], customer=request.user)
+        self.booking = get_object_or_404(
+            Booking.objects.select_related('service', 'vehicle'), pk=self.kwargs['pk'], customer=request.user
+        )
         if self.booking.status != Booking.STATUS_COMPLETED or self.booking.feedback_submitted:
             return redirect('bookings:booking_detail', pk=self.booking.pk)
         if not request.user.is_customer:
@@ -175,4 +179,47 @@ class FeedbackCreateView(LoginRequiredMixin, CreateView):
         return response
 
     def get_success_url(self):
-        return reverse_lazy('bookings:booking_detail', kwargs={'pk': self.booking.pk}) 
\ No newline at end of file
+        return reverse_lazy('bookings:booking_detail', kwargs={'pk': self.booking.pk})
+
+
+class AvailabilityView(LoginRequiredMixin, View):
+    """
+    JSON list of the next free start times for a service, used by the booking form.
+    Query parameters: service (pk), after (ISO datetime, optional), count (1-20).
+    """
+    max_count = 20
+
+    def get(self, request, *args, **kwargs):
+        service = get_catalog().get(request.GET.get('service'))
+        if service is None:
+            return JsonResponse({'error': _('Unknown service.')}, status=400)
+        try:
+            count = min(max(int(request.GET.get('count', 5)), 1), self.max_count)
+        except ValueError:
+            return JsonResponse({'error': _('count must be a number.')}, status=400)
+        after = timezone.now()
+        if request.GET.get('after'):
+            try:
+                requested = parse_datetime(request.GET['after'])
+            except ValueError:
+                # Well formed but not a real date, such as February 30th
+                requested = None
+            if requested is None:
+                return JsonResponse({'error': _('after must be an ISO 8601 datetime.')}, status=400)
+            if timezone.is_naive(requested):
+                requested = timezone.make_aware(requested)
+            after = max(after, requested)
+
+        slots = next_free_slots(service.duration, after=after, count=count)
+        return JsonResponse({
+            'service': service.pk,
+            'slots': [
+                {
+                    'start': timezone.localtime(slot).isoformat(),
+                    'value': timezone.localtime(slot).strftime('%Y-%m-%dT%H:%M'),
+                    'label': timezone.localtime(slot).strftime('%a %d %b %H:%M'),
+                }
+                for slot in slots
+            ],
+        })
+
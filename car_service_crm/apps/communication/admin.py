@@ -1,6 +1,6 @@
 # apps/communication/admin.py
 from django.contrib import admin
-from .models import NotificationTemplate, CommunicationLog
+from .models import Broadcast, NotificationTemplate, CommunicationLog, OutboxMessage
 
 @admin.register(NotificationTemplate)
 class NotificationTemplateAdmin(admin.ModelAdmin):
@@ -12,6 +12,22 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
 @admin.register(CommunicationLog)
 class CommunicationLogAdmin(admin.ModelAdmin):
     list_display = ('recipient', 'booking', 'message_type', 'status', 'sent_at')
+    list_select_related = ('recipient', 'booking__service', 'booking__vehicle')
     list_filter = ('message_type', 'status', 'sent_at')
     search_fields = ('recipient__email', 'subject', 'message')
-    ordering = ('-sent_at',)
\ No newline at end of file
+    ordering = ('-sent_at',)
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'status', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'last_error')
+    ordering = ('next_attempt_at',)
+    raw_id_fields = ('log',)
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('template_name', 'status', 'sent', 'failed', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    raw_id_fields = ('requested_by',)
@@ -0,0 +1,266 @@
+# apps/communication/archive.py
+"""
+Monthly archives of old CommunicationLog rows.
+
+archive_old_logs() moves every month older than
+COMMUNICATION_LOG_RETENTION_MONTHS out of the table into compressed JSON
+Lines files under COMMUNICATION_ARCHIVE_DIR, so the hot table only holds
+recent months. A month is written as one or more parts:
+
+    2025-03.part001.jsonl.gz     rows ordered by recipient, in independently
+                                 compressed blocks of a fixed number of rows
+                                 (COMMUNICATION_ARCHIVE_BLOCK_ROWS)
+    2025-03.part001.index.json   recipient id -> [[offset, length], ...] of
+                                 the blocks holding their rows, and max_pk
+
+The index is written last, so a part without one is incomplete and is
+overwritten by the next run. Rows are deleted only after their part is
+complete, in chunks of one short transaction each; a run interrupted while
+deleting finishes the deletes on the next run instead of archiving those
+rows again. recipient_history() reads a recipient's rows back by
+decompressing only the blocks the index lists for them.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CommunicationLog
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+EXTENSIONS = {'gzip': 'gz', 'zstd': 'zst'}
+
+# Archived columns: output name -> values_list() lookup
+COLUMNS = [
+    ('id', 'pk'),
+    ('recipient_id', 'recipient_id'),
+    ('recipient_email', 'recipient__email'),
+    ('booking_id', 'booking_id'),
+    ('template', 'template__name'),
+    ('message_type', 'message_type'),
+    ('subject', 'subject'),
+    ('message', 'message'),
+    ('sent_at', 'sent_at'),
+    ('status', 'status'),
+    ('idempotency_key', 'idempotency_key'),
+]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def archive_dir():
+    return Path(_setting('COMMUNICATION_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'communication'))
+
+
+def compress(method, data):
+    if method == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured('zstd archives need the zstandard package.')
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data)
+
+
+def decompress(method, data):
+    if method == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured('zstd archives need the zstandard package.')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def month_start(month):
+    return timezone.make_aware(datetime(month.year, month.month, 1))
+
+
+def month_queryset(month):
+    return CommunicationLog.objects.filter(
+        sent_at__gte=month_start(month), sent_at__lt=month_start(add_months(month, 1)),
+    )
+
+
+class ArchiveResult:
+    def __init__(self):
+        self.months = []
+        self.archived = 0
+        self.deleted = 0
+
+
+def archive_old_logs(retention_months=None, directory=None, now=None):
+    """
+    Archive and delete the logs of every month before the last
+    `retention_months` whole months. Returns an ArchiveResult.
+    """
+    if retention_months is None:
+        retention_months = _setting('COMMUNICATION_LOG_RETENTION_MONTHS', 12)
+    directory = Path(directory) if directory else archive_dir()
+    now = timezone.localtime(now or timezone.now())
+    cutoff = add_months(now.date().replace(day=1), -retention_months)
+    result = ArchiveResult()
+    oldest = (
+        CommunicationLog.objects.filter(sent_at__lt=month_start(cutoff)).aggregate(oldest=Min('sent_at'))['oldest']
+    )
+    if oldest is None:
+        return result
+    month = timezone.localtime(oldest).date().replace(day=1)
+    while month < cutoff:
+        archived, deleted = archive_month(month, directory)
+        if archived or deleted:
+            result.months.append(month)
+            result.archived += archived
+            result.deleted += deleted
+        month = add_months(month, 1)
+    return result
+
+
+def archive_month(month, directory):
+    """
+    Write the month's remaining logs as a new part, then delete them.
+    Returns (rows archived, rows deleted).
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    parts = month_indexes(month, directory)
+    # Rows an earlier, interrupted run archived but did not get to delete
+    deleted = delete_archived(month, max((part['max_pk'] for part in parts), default=0))
+    max_pk = month_queryset(month).aggregate(max_pk=Max('pk'))['max_pk']
+    if max_pk is None:
+        return 0, deleted
+    archived = write_part(month, len(parts) + 1, max_pk, directory)
+    return archived, deleted + delete_archived(month, max_pk)
+
+
+def write_part(month, number, max_pk, directory):
+    method = _setting('COMMUNICATION_ARCHIVE_COMPRESSION', 'gzip')
+    if method not in EXTENSIONS:
+        raise ImproperlyConfigured(f'Unknown COMMUNICATION_ARCHIVE_COMPRESSION {method!r}.')
+    block_rows = _setting('COMMUNICATION_ARCHIVE_BLOCK_ROWS', 1000)
+    stem = f'{month:%Y-%m}.part{number:03d}'
+    data_path = directory / f'{stem}.jsonl.{EXTENSIONS[method]}'
+    names = [name for name, _lookup in COLUMNS]
+    rows = (
+        month_queryset(month).filter(pk__lte=max_pk)
+        .order_by('recipient_id', 'pk')
+        .values_list(*[lookup for _name, lookup in COLUMNS])
+        .iterator(chunk_size=block_rows)
+    )
+    recipients, count, block, block_recipients = {}, 0, [], set()
+
+    def flush(f):
+        offset = f.tell()
+        f.write(compress(method, ''.join(block).encode('utf-8')))
+        for recipient_id in block_recipients:
+            recipients.setdefault(str(recipient_id), []).append([offset, f.tell() - offset])
+        block.clear()
+        block_recipients.clear()
+
+    # Write to a temporary name so an interrupted run never leaves a part that looks complete
+    tmp_path = data_path.with_name(data_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        for row in rows:
+            row = dict(zip(names, row))
+            block.append(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            block_recipients.add(row['recipient_id'])
+            count += 1
+            if len(block) >= block_rows:
+                flush(f)
+        if block:
+            flush(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, data_path)
+    _write_json(directory / f'{stem}.index.json', {
+        'month': f'{month:%Y-%m}',
+        'file': data_path.name,
+        'compression': method,
+        'rows': count,
+        'max_pk': max_pk,
+        'recipients': recipients,
+    })
+    return count
+
+
+def _write_json(path, data):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def delete_archived(month, max_pk):
+    """
+    Delete the month's logs up to `max_pk` in chunks, each in its own
+    short transaction so no lock is held for the whole month.
+    """
+    chunk_size = _setting('COMMUNICATION_ARCHIVE_DELETE_CHUNK', 1000)
+    queryset = month_queryset(month).filter(pk__lte=max_pk).order_by('pk')
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            # Also drops the logs' delivered outbox rows
+            CommunicationLog.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def month_indexes(month, directory):
+    return [_load_index(path) for path in sorted(directory.glob(f'{month:%Y-%m}.part*.index.json'))]
+
+
+def _load_index(path):
+    return _read_index(str(path), os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _read_index(path, _mtime_ns):
+    # Keyed on the modification time as well, so a rewritten index is re-read
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def recipient_history(recipient_id, directory=None):
+    """
+    The archived logs of `recipient_id` as dicts (sent_at parsed back into
+    a datetime), newest first. Only the blocks holding their rows are read
+    and decompressed.
+    """
+    directory = Path(directory) if directory else archive_dir()
+    rows = []
+    for path in sorted(directory.glob('*.index.json')):
+        index = _load_index(path)
+        blocks = index['recipients'].get(str(recipient_id))
+        if not blocks:
+            continue
+        with open(directory / index['file'], 'rb') as f:
+            for offset, length in blocks:
+                f.seek(offset)
+                for line in decompress(index['compression'], f.read(length)).decode('utf-8').splitlines():
+                    row = json.loads(line)
+                    if row['recipient_id'] == recipient_id:
+                        row['sent_at'] = parse_datetime(row['sent_at'])
+                        rows.append(row)
+    rows.sort(key=lambda row: (row['sent_at'], row['id']), reverse=True)
+    return rows
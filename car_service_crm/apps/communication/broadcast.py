@@ -0,0 +1,181 @@
+# apps/communication/broadcast.py
+"""
+Streaming broadcast engine.
+
+Customers are streamed from the database in chunks; each chunk is rendered
+from the compiled template fetched once at the start of the run (see
+notifications.py), sent through a single reused mail connection and logged
+with one bulk INSERT, so memory and round trips stay bounded by the chunk
+size rather than the customer base. A template disabled while a broadcast
+runs takes effect from the next broadcast.
+
+The broadcast page only queues a Broadcast row with queue_broadcast(); the
+send_broadcasts command claims and sends queued broadcasts one at a time.
+A broadcast whose worker died is left RUNNING rather than restarted, since
+a restart would mail the customers already reached a second time.
+"""
+import logging
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from apps.users.models import User
+from .models import Broadcast, CommunicationLog
+from .notifications import notification_cache
+from .outbox import DEFAULT_FROM_EMAIL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class BroadcastResult:
+    """
+    Totals for one broadcast run.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        return self.sent + self.failed
+
+    @property
+    def rate(self):
+        """Messages per second."""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"{self.sent} sent, {self.failed} failed in {self.elapsed:.2f}s ({self.rate:.1f} msg/s)"
+
+
+def _send_chunk(connection, notification, chunk, extra_context, from_email):
+    emails = []
+    logs = []
+    for customer in chunk:
+        message = notification.render({'customer': customer.get_full_name(), **extra_context})
+        emails.append(EmailMessage(
+            subject=notification.subject,
+            body=message,
+            from_email=from_email,
+            to=[customer.email],
+        ))
+        logs.append(CommunicationLog(
+            recipient=customer,
+            message_type='EMAIL',
+            subject=notification.subject,
+            message=message,
+            template=notification.template,
+        ))
+
+    try:
+        connection.send_messages(emails)
+        status = 'SENT'
+    except Exception:
+        # The backend does not report which messages of a failed batch got
+        # through, so the whole chunk is recorded as failed.
+        logger.exception('Broadcast chunk of %d messages failed', len(emails))
+        status = 'FAILED'
+    for log in logs:
+        log.status = status
+    CommunicationLog.objects.bulk_create(logs)
+    return (len(logs), 0) if status == 'SENT' else (0, len(logs))
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def send_broadcast(template_name, extra_context=None, recipients=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                   from_email=DEFAULT_FROM_EMAIL):
+    """
+    Render the template `template_name` for every recipient (all customers by
+    default) and send it. Returns a BroadcastResult with counts and throughput,
+    or None if the template is disabled.
+    """
+    notification = notification_cache.get(template_name)
+    if notification is None:
+        return None
+    if recipients is None:
+        recipients = User.objects.filter(role=User.ROLE_CUSTOMER)
+    recipients = recipients.only('id', 'email', 'first_name', 'last_name').order_by('pk')
+    extra_context = extra_context or {}
+    result = BroadcastResult()
+    started = time.perf_counter()
+
+    # Opened up front so send_messages() reuses it instead of reconnecting per chunk
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception:
+        logger.exception('Could not open mail connection for broadcast')
+    try:
+        for chunk in _chunks(recipients.iterator(chunk_size=chunk_size), chunk_size):
+            sent, failed = _send_chunk(connection, notification, chunk, extra_context, from_email)
+            result.sent += sent
+            result.failed += failed
+    finally:
+        connection.close()
+
+    result.elapsed = time.perf_counter() - started
+    logger.info('Broadcast "%s": %s', template_name, result)
+    return result
+
+
+def queue_broadcast(template_name, extra_context=None, requested_by=None):
+    """
+    Queue a broadcast of `template_name` for the send_broadcasts command.
+    `extra_context` must be JSON serialisable.
+    """
+    return Broadcast.objects.create(
+        template_name=template_name, context=extra_context or {}, requested_by=requested_by,
+    )
+
+
+def claim_broadcast():
+    """
+    Mark the oldest pending broadcast as running and return it, or None if
+    nothing is queued. Concurrent workers never claim the same one.
+    """
+    with transaction.atomic():
+        broadcast = (
+            Broadcast.objects.select_for_update(skip_locked=True)
+            .filter(status=Broadcast.STATUS_PENDING)
+            .order_by('created_at', 'pk')
+            .first()
+        )
+        if broadcast is None:
+            return None
+        broadcast.status = Broadcast.STATUS_RUNNING
+        broadcast.started_at = timezone.now()
+        broadcast.save(update_fields=['status', 'started_at'])
+    return broadcast
+
+
+def run_broadcast(broadcast, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Send a claimed broadcast and record its totals. Returns the
+    BroadcastResult, or None if the template was disabled.
+    """
+    result = send_broadcast(broadcast.template_name, broadcast.context, chunk_size=chunk_size)
+    if result is None:
+        broadcast.status = Broadcast.STATUS_SKIPPED
+    else:
+        broadcast.status = Broadcast.STATUS_DONE
+        broadcast.sent = result.sent
+        broadcast.failed = result.failed
+    broadcast.finished_at = timezone.now()
+    broadcast.save(update_fields=['status', 'sent', 'failed', 'finished_at'])
+    return result
@@ -0,0 +1,32 @@
+# apps/communication/management/commands/archive_communication_logs.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.communication.archive import archive_dir, archive_old_logs
+
+
+class Command(BaseCommand):
+    help = (
+        'Move communication logs older than the retention period into monthly compressed '
+        'JSON Lines archives and delete them from the table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int,
+                            help='Whole months to keep in the table (default: COMMUNICATION_LOG_RETENTION_MONTHS).')
+        parser.add_argument('--directory', metavar='PATH',
+                            help='Archive directory (default: COMMUNICATION_ARCHIVE_DIR).')
+
+    def handle(self, *args, **options):
+        if options['retention_months'] is not None and options['retention_months'] < 0:
+            raise CommandError('--retention-months must not be negative.')
+        directory = options['directory'] or archive_dir()
+        started = time.perf_counter()
+        result = archive_old_logs(options['retention_months'], directory)
+        for month in result.months:
+            self.stdout.write(f'Archived {month:%Y-%m}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {result.archived} and deleted {result.deleted} logs to {directory} '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
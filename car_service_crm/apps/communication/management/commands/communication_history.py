@@ -0,0 +1,33 @@
+# apps/communication/management/commands/communication_history.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.communication.archive import COLUMNS, recipient_history
+from apps.communication.models import CommunicationLog
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Print a recipient's communication logs, from the table and the archives, newest first, as JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('--directory', metavar='PATH',
+                            help='Archive directory (default: COMMUNICATION_ARCHIVE_DIR).')
+
+    def handle(self, *args, **options):
+        recipient = User.objects.filter(email=options['email']).first()
+        if recipient is None:
+            raise CommandError(f'No user with email {options["email"]}.')
+        names = [name for name, _lookup in COLUMNS]
+        recent = (
+            CommunicationLog.objects.filter(recipient=recipient)
+            .order_by('-sent_at', '-pk')
+            .values_list(*[lookup for _name, lookup in COLUMNS])
+        )
+        # Archived months are all older than the rows still in the table
+        rows = [dict(zip(names, row)) for row in recent] + recipient_history(recipient.pk, options['directory'])
+        for row in rows:
+            self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
@@ -0,0 +1,31 @@
+# apps/communication/management/commands/dispatch_outbox.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.communication.outbox import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails in batches, retrying failures with exponential backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'OUTBOX_BATCH_SIZE', 100))
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'OUTBOX_POLL_INTERVAL', 5),
+                            help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain due messages once and exit.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        try:
+            while True:
+                sent, failed = dispatch_batch(batch_size)
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent}, failed {failed}')
+                if sent + failed < batch_size:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping outbox dispatcher.')
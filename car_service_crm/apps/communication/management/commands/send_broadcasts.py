@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.communication.broadcast import DEFAULT_CHUNK_SIZE, claim_broadcast, run_broadcast
+
+
+class Command(BaseCommand):
+    help = 'Send queued customer broadcasts, one at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'BROADCAST_POLL_INTERVAL', 5),
+                            help='Seconds to sleep when no broadcast is queued.')
+        parser.add_argument('--once', action='store_true', help='Send the queued broadcasts once and exit.')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                broadcast = claim_broadcast()
+                if broadcast is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                result = run_broadcast(broadcast, options['chunk_size'])
+                if result is None:
+                    self.stdout.write(f'Broadcast {broadcast.pk}: template disabled, nothing sent')
+                else:
+                    self.stdout.write(f'Broadcast {broadcast.pk}: {result}')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping broadcast sender.')
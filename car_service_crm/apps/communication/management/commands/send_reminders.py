@@ -0,0 +1,29 @@
+# apps/communication/management/commands/send_reminders.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.communication.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = 'Queue upcoming-appointment reminders at the configured offsets before each pending booking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'REMINDER_TICK_INTERVAL', 1),
+                            help='Seconds between checks for due reminders.')
+        parser.add_argument('--once', action='store_true', help='Queue the reminders due now and exit.')
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler()
+        try:
+            while True:
+                queued = scheduler.tick()
+                if queued:
+                    self.stdout.write(f'Queued {queued} reminders ({len(scheduler)} pending)')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping reminder scheduler.')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communicationlog',
+            index=models.Index(fields=['-sent_at'], name='commlog_sent_at_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0003_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communicationlog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, help_text='Set on messages that must be sent at most once, such as appointment reminders.', max_length=100, null=True, unique=True, verbose_name='Idempotency Key'),
+        ),
+    ]
@@ -78,15 +78,129 @@ class CommunicationLog(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(
         max_length=20,
-        choices=[('SENT', 'Sent'), ('FAILED', 'Failed')],
+        choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')],
         default='SENT',
         verbose_name=_('Status')
     )
+    idempotency_key = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('Idempotency Key'),
+        help_text=_('Set on messages that must be sent at most once, such as appointment reminders.')
+    )
 
     class Meta:
         verbose_name = _('Communication Log')
         verbose_name_plural = _('Communication Logs')
         ordering = ['-sent_at']
+        indexes = [
+            # Communication dashboard and admin: latest logs first
+            models.Index(fields=['-sent_at'], name='commlog_sent_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.message_type} to {self.recipient} on {self.sent_at}"
+
+class OutboxMessage(models.Model):
+    """
+    Model to queue outgoing emails so they are written in the same transaction
+    as the record that triggered them and delivered later by dispatch_outbox.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_SENT = 'SENT'
+    STATUS_FAILED = 'FAILED'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_SENT, _('Sent')),
+        (STATUS_FAILED, _('Failed')),
+    ]
+
+    log = models.OneToOneField(
+        CommunicationLog,
+        on_delete=models.CASCADE,
+        verbose_name=_('Communication Log'),
+        related_name='outbox_message'
+    )
+    from_email = models.CharField(max_length=254, verbose_name=_('From'))
+    to_email = models.EmailField(verbose_name=_('To'))
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name=_('Status')
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('Attempts'))
+    next_attempt_at = models.DateTimeField(
+        verbose_name=_('Next Attempt'),
+        help_text=_('Earliest time the dispatcher will (re)try this message.')
+    )
+    last_error = models.TextField(blank=True, verbose_name=_('Last Error'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Outbox Message')
+        verbose_name_plural = _('Outbox Messages')
+        ordering = ['next_attempt_at']
+        indexes = [
+            # Dispatcher: due messages in the order they should be sent
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.log.subject} to {self.to_email} ({self.status})"
+
+class Broadcast(models.Model):
+    """
+    Model to queue a message to every customer. The broadcast page only
+    records it; the send_broadcasts command sends it in the background.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_SKIPPED = 'SKIPPED'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_DONE, _('Done')),
+        (STATUS_SKIPPED, _('Skipped (template disabled)')),
+    ]
+
+    template_name = models.CharField(max_length=100, verbose_name=_('Template Name'))
+    context = models.JSONField(default=dict, blank=True, verbose_name=_('Context'))
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Requested By'),
+        related_name='+'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name=_('Status')
+    )
+    sent = models.PositiveIntegerField(default=0, verbose_name=_('Sent'))
+    failed = models.PositiveIntegerField(default=0, verbose_name=_('Failed'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished'))
+
+    class Meta:
+        verbose_name = _('Broadcast')
+        verbose_name_plural = _('Broadcasts')
+        ordering = ['-created_at']
+        indexes = [
+            # Worker: the oldest pending broadcast
+            models.Index(fields=['status', 'created_at'], name='broadcast_status_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.message_type} to {self.recipient} on {self.sent_at}"
\ No newline at end of file
+        return f"{self.template_name} ({self.status})"
@@ -0,0 +1,155 @@
+# apps/communication/notifications.py
+"""
+Rendering of NotificationTemplates through a process-wide compiled-template cache.
+
+Every call site renders through render_notification(name, context). Active
+templates are looked up and compiled once, then served from a bounded LRU
+until the template is saved or deleted (see signals.py). Signals only reach
+the process that saved the template, so entries also expire after
+NOTIFICATION_TEMPLATE_CACHE_TTL seconds to pick up edits made by other workers.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.template import Context, Template
+
+from .models import NotificationTemplate
+
+# Templates created on first use if an admin has not defined them yet
+DEFAULT_TEMPLATES = {
+    'Booking Confirmation': {
+        'subject': 'Your iCars Booking Confirmation',
+        'message': 'Dear {customer}, your booking for {service} on {date} has been confirmed.',
+    },
+    'Service Reminder': {
+        'subject': 'Reminder: your upcoming iCars appointment',
+        'message': 'Dear {customer}, this is a reminder of your {service} appointment on {date}.',
+    },
+    'Broadcast Message': {
+        'subject': 'Important Update from iCars',
+        'message': 'Dear {customer}, we have an important update: {message}',
+    },
+}
+
+# The documented {customer}-style placeholders, as opposed to {{ customer }}
+_PLACEHOLDER_RE = re.compile(r'(?<!\{)\{\s*(\w+)\s*\}(?!\})')
+
+
+class CompiledNotification:
+    """
+    An active NotificationTemplate with its message body compiled once.
+    The cache key is (pk, updated_at), so an edited template never matches
+    a stale entry.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.subject = template.subject
+        self.key = (template.pk, template.updated_at)
+        self.compiled = Template(_PLACEHOLDER_RE.sub(r'{{ \1 }}', template.message))
+
+    def render(self, context):
+        return self.compiled.render(Context(context))
+
+
+class RenderedNotification:
+    def __init__(self, template, subject, message):
+        self.template = template
+        self.subject = subject
+        self.message = message
+
+
+class NotificationCache:
+    """
+    Thread-safe LRU of CompiledNotification by template name, with hit/miss counters.
+    Inactive or missing templates are cached as None.
+    """
+    _MISSING = object()
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            loaded_at, entry = self._entries.get(name, (None, self._MISSING))
+            if entry is not self._MISSING and time.monotonic() - loaded_at < self.ttl:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry, cacheable = self._load(name)
+        if not cacheable:
+            return entry
+        with self._lock:
+            self._entries[name] = (time.monotonic(), entry)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _load(self, name):
+        """
+        Return (entry, cacheable). A default template created inside the
+        caller's transaction is not cached, since that transaction may still
+        roll back and leave the entry pointing at a missing row.
+        """
+        created = False
+        template = NotificationTemplate.objects.filter(name=name).first()
+        if template is None and name in DEFAULT_TEMPLATES:
+            template, created = NotificationTemplate.objects.get_or_create(
+                name=name, defaults=DEFAULT_TEMPLATES[name]
+            )
+        cacheable = not (created and transaction.get_connection().in_atomic_block)
+        if template is None or not template.is_active:
+            return None, cacheable
+        return CompiledNotification(template), cacheable
+
+    def invalidate(self, template):
+        """
+        Drop any entry for `template`, including one cached under a previous name.
+        """
+        with self._lock:
+            for name, (_loaded_at, entry) in list(self._entries.items()):
+                if name == template.name or (entry is not None and entry.key[0] == template.pk):
+                    del self._entries[name]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+notification_cache = NotificationCache(
+    maxsize=getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_SIZE', 128),
+    ttl=getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_TTL', 60),
+)
+
+
+def render_notification(name, context):
+    """
+    Render the active template called `name` with `context`.
+    Returns a RenderedNotification, or None if the template is disabled.
+    """
+    notification = notification_cache.get(name)
+    if notification is None:
+        return None
+    return RenderedNotification(notification.template, notification.subject, notification.render(context))
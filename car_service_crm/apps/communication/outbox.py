@@ -0,0 +1,142 @@
+# apps/communication/outbox.py
+"""
+Transactional email outbox.
+
+Views call enqueue_email() inside the transaction that creates the triggering
+record, so a message is queued if and only if that record is committed. The
+dispatch_outbox management command later drains the queue with
+dispatch_batch(), retrying failures with exponential backoff.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CommunicationLog, OutboxMessage
+
+DEFAULT_FROM_EMAIL = 'no-reply@icars.com'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_email(recipient, subject, message, template=None, booking=None, from_email=DEFAULT_FROM_EMAIL):
+    """
+    Queue an email for `recipient` and record it as a PENDING CommunicationLog.
+    Must be called inside the caller's transaction; nothing is sent here.
+    """
+    log = CommunicationLog.objects.create(
+        recipient=recipient,
+        booking=booking,
+        message_type='EMAIL',
+        subject=subject,
+        message=message,
+        template=template,
+        status='PENDING'
+    )
+    return OutboxMessage.objects.create(
+        log=log,
+        from_email=from_email,
+        to_email=recipient.email,
+        next_attempt_at=timezone.now(),
+    )
+
+
+def backoff_delay(attempts):
+    """
+    Delay before retry number `attempts`: base * 2**(attempts - 1), capped.
+    """
+    base = _setting('OUTBOX_BACKOFF_SECONDS', 30)
+    cap = _setting('OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to `batch_size` due messages to this worker.
+
+    Claimed rows have next_attempt_at pushed past the lease timeout, so
+    concurrent workers skip them and a crashed worker's messages become due
+    again once the lease expires.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=ids).update(next_attempt_at=now + lease)
+    return list(OutboxMessage.objects.filter(id__in=ids).select_related('log').order_by('id'))
+
+
+def _mark_sent(outbox_message):
+    with transaction.atomic():
+        OutboxMessage.objects.filter(pk=outbox_message.pk).update(
+            status=OutboxMessage.STATUS_SENT,
+            attempts=outbox_message.attempts + 1,
+            last_error='',
+            updated_at=timezone.now(),
+        )
+        CommunicationLog.objects.filter(pk=outbox_message.log_id).update(status='SENT')
+
+
+def _mark_failed(outbox_message, error):
+    attempts = outbox_message.attempts + 1
+    exhausted = attempts >= _setting('OUTBOX_MAX_ATTEMPTS', 5)
+    with transaction.atomic():
+        OutboxMessage.objects.filter(pk=outbox_message.pk).update(
+            status=OutboxMessage.STATUS_FAILED if exhausted else OutboxMessage.STATUS_PENDING,
+            attempts=attempts,
+            next_attempt_at=timezone.now() + backoff_delay(attempts),
+            last_error=str(error),
+            updated_at=timezone.now(),
+        )
+        if exhausted:
+            CommunicationLog.objects.filter(pk=outbox_message.log_id).update(status='FAILED')
+
+
+def dispatch_batch(batch_size=None):
+    """
+    Send one batch of due messages over a single mail connection.
+    Returns a (sent, failed) tuple.
+    """
+    batch_size = batch_size or _setting('OUTBOX_BATCH_SIZE', 100)
+    messages = claim_batch(batch_size)
+    if not messages:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for outbox_message in messages:
+            _mark_failed(outbox_message, e)
+        return 0, len(messages)
+
+    try:
+        for outbox_message in messages:
+            email = EmailMessage(
+                subject=outbox_message.log.subject,
+                body=outbox_message.log.message,
+                from_email=outbox_message.from_email,
+                to=[outbox_message.to_email],
+                connection=connection,
+            )
+            try:
+                email.send(fail_silently=False)
+            except Exception as e:
+                _mark_failed(outbox_message, e)
+                failed += 1
+            else:
+                _mark_sent(outbox_message)
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,199 @@
+# apps/communication/reminders.py
+"""
+Upcoming-appointment reminders, queued through the outbox at fixed offsets
+(REMINDER_OFFSET_HOURS) before each pending booking.
+
+The send_reminders command keeps one ReminderScheduler running. It loads
+the bookings whose reminders fall due within the next REMINDER_WINDOW_MINUTES
+into a timing wheel with one range query per window, so the table is never
+polled for due rows. Reschedules and cancellations are read incrementally
+from Booking.updated_at every REMINDER_CHANGE_POLL_SECONDS and move or drop
+the affected timers.
+
+Each reminder's CommunicationLog carries an idempotency key made of the
+booking, the offset and the appointment time. A restarted (or second)
+scheduler therefore never queues the same reminder twice, while a
+rescheduled booking gets fresh reminders for its new time.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from .models import CommunicationLog, OutboxMessage
+from .notifications import render_notification
+from .outbox import DEFAULT_FROM_EMAIL
+from .timingwheel import TimingWheel
+
+TEMPLATE_NAME = 'Service Reminder'
+TICK_SECONDS = 1
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def reminder_offsets():
+    return [timedelta(hours=hours) for hours in _setting('REMINDER_OFFSET_HOURS', (24, 2))]
+
+
+def idempotency_key(booking_id, offset, scheduled_date):
+    return f'reminder:{booking_id}:{int(offset.total_seconds())}:{int(scheduled_date.timestamp())}'
+
+
+def queue_reminders(due):
+    """
+    Queue a reminder email for each (booking id, offset, scheduled date) in
+    `due` that is still current and has not been queued before, in one
+    transaction. Returns the number queued.
+    """
+    try:
+        return _queue_reminders(due)
+    except IntegrityError:
+        # Another scheduler queued some of these first; the retry skips them
+        return _queue_reminders(due)
+
+
+def _queue_reminders(due):
+    keys = {idempotency_key(*reminder): reminder for reminder in due}
+    with transaction.atomic():
+        queued = set(
+            CommunicationLog.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True)
+        )
+        booking_ids = {booking_id for booking_id, _offset, _date in due}
+        bookings = (
+            Booking.objects.filter(pk__in=booking_ids, status=Booking.STATUS_PENDING)
+            .select_related('customer', 'service')
+            .in_bulk()
+        )
+        logs, recipients = [], []
+        for key, (booking_id, _offset, scheduled_date) in keys.items():
+            booking = bookings.get(booking_id)
+            # Skip reminders already queued and ones a change the scheduler
+            # has not seen yet made stale
+            if key in queued or booking is None or booking.scheduled_date != scheduled_date:
+                continue
+            notification = render_notification(TEMPLATE_NAME, {
+                'customer': booking.customer.get_full_name(),
+                'service': booking.service.name,
+                'date': booking.scheduled_date.strftime('%Y-%m-%d %H:%M'),
+            })
+            if notification is None:
+                # The template is disabled
+                return 0
+            logs.append(CommunicationLog(
+                recipient=booking.customer,
+                booking=booking,
+                template=notification.template,
+                message_type='EMAIL',
+                subject=notification.subject,
+                message=notification.message,
+                status='PENDING',
+                idempotency_key=key,
+            ))
+            recipients.append(booking.customer.email)
+        if not logs:
+            return 0
+        now = timezone.now()
+        logs = CommunicationLog.objects.bulk_create(logs)
+        OutboxMessage.objects.bulk_create([
+            OutboxMessage(log=log, from_email=DEFAULT_FROM_EMAIL, to_email=email, next_attempt_at=now)
+            for log, email in zip(logs, recipients)
+        ])
+    return len(logs)
+
+
+class ReminderScheduler:
+    """
+    Reminder timers for one process. Call tick() regularly with the current
+    time; it loads the next window, applies booking changes when they are
+    due to be polled, and queues the reminders that fell due since the last
+    call. Reminders missed by at most REMINDER_CATCH_UP_MINUTES, for example
+    while the scheduler was restarting, are still sent.
+    """
+
+    def __init__(self, now=None, offsets=None):
+        now = now or timezone.now()
+        self.offsets = offsets or reminder_offsets()
+        self.window = timedelta(minutes=_setting('REMINDER_WINDOW_MINUTES', 60))
+        self.catch_up = timedelta(minutes=_setting('REMINDER_CATCH_UP_MINUTES', 15))
+        self.poll_interval = timedelta(seconds=_setting('REMINDER_CHANGE_POLL_SECONDS', 30))
+        # Changes are re-read this far back, as a save's updated_at is set
+        # before its transaction commits
+        self.poll_overlap = timedelta(seconds=_setting('REMINDER_CHANGE_OVERLAP_SECONDS', 60))
+        self.batch_size = _setting('REMINDER_BATCH_SIZE', 500)
+        self.wheel = TimingWheel(self._tick(now))
+        self.now = now
+        # Reminders due before this have been loaded into the wheel
+        self.loaded_until = now - self.catch_up
+        self.changes_since = now
+        self.next_poll = now + self.poll_interval
+
+    def _tick(self, when):
+        return math.floor(when.timestamp() / TICK_SECONDS)
+
+    def tick(self, now=None):
+        """
+        Advance to `now` and return the number of reminders queued.
+        """
+        self.now = now or timezone.now()
+        if self.loaded_until < self.now + self.window / 2:
+            self.load(max(self.loaded_until, self.now - self.catch_up), self.now + self.window)
+        if self.now >= self.next_poll:
+            self.apply_changes()
+            self.next_poll = self.now + self.poll_interval
+        due = [
+            (booking_id, offset, scheduled_date)
+            for (booking_id, offset), scheduled_date in self.wheel.advance(self._tick(self.now))
+        ]
+        return sum(
+            queue_reminders(due[start:start + self.batch_size]) for start in range(0, len(due), self.batch_size)
+        )
+
+    def load(self, start, end):
+        """
+        Load the pending bookings with a reminder due in [start, end).
+        """
+        ranges = Q()
+        for offset in self.offsets:
+            ranges |= Q(scheduled_date__gte=start + offset, scheduled_date__lt=end + offset)
+        self.loaded_until = end
+        bookings = Booking.objects.filter(ranges, status=Booking.STATUS_PENDING).values_list('pk', 'scheduled_date')
+        for booking_id, scheduled_date in bookings:
+            self.schedule(booking_id, scheduled_date, start)
+
+    def apply_changes(self):
+        """
+        Move or drop the timers of bookings saved since the last poll.
+        """
+        changes = (
+            Booking.objects.filter(updated_at__gt=self.changes_since - self.poll_overlap)
+            .order_by('updated_at')
+            .values_list('pk', 'scheduled_date', 'status', 'updated_at')
+        )
+        for booking_id, scheduled_date, status, updated_at in changes:
+            self.cancel(booking_id)
+            if status == Booking.STATUS_PENDING:
+                self.schedule(booking_id, scheduled_date, self.now - self.catch_up)
+            self.changes_since = max(self.changes_since, updated_at)
+
+    def schedule(self, booking_id, scheduled_date, since):
+        """
+        Set timers for the booking's reminders due in [since, loaded_until);
+        later ones are loaded with their window.
+        """
+        for offset in self.offsets:
+            fire_at = scheduled_date - offset
+            if since <= fire_at < self.loaded_until and scheduled_date > self.now:
+                self.wheel.schedule((booking_id, offset), self._tick(fire_at), scheduled_date)
+
+    def cancel(self, booking_id):
+        for offset in self.offsets:
+            self.wheel.cancel((booking_id, offset))
+
+    def __len__(self):
+        return len(self.wheel)
@@ -0,0 +1,12 @@
+# apps/communication/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import NotificationTemplate
+from .notifications import notification_cache
+
+
+@receiver(post_save, sender=NotificationTemplate)
+@receiver(post_delete, sender=NotificationTemplate)
+def invalidate_notification_cache(sender, instance, **kwargs):
+    notification_cache.invalidate(instance)
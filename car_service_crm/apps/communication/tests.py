@@ -1,3 +1,418 @@
-from django.test import TestCase
+# apps/communication/tests.py
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+import json
+import tempfile
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.availability import next_free_slots
+from apps.bookings.models import Booking
+from apps.bookings.tests import create_listing_bookings
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+from . import broadcast
+from .archive import archive_old_logs, recipient_history, write_part
+from .broadcast import claim_broadcast, queue_broadcast, run_broadcast, send_broadcast
+from .models import Broadcast, CommunicationLog, NotificationTemplate, OutboxMessage
+from .notifications import notification_cache, render_notification
+from .outbox import backoff_delay, dispatch_batch, enqueue_email
+from .reminders import ReminderScheduler
+from .timingwheel import TimingWheel
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException('relay unavailable')
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        notification_cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Casey', last_name='Customer', role=User.ROLE_CUSTOMER,
+        )
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.customer, make='Honda', model='Civic', year=2019,
+            license_plate='ABC123', vin='1HGCM82633A004352',
+        )
+        cls.service = Service.objects.create(name='Brake Inspection', price=80, duration=timedelta(hours=1))
+
+    def test_booking_creation_queues_email_without_sending(self):
+        self.client.force_login(self.customer)
+        response = self.client.post(reverse('bookings:booking_create'), {
+            'vehicle': self.vehicle.pk,
+            'service': self.service.pk,
+            'scheduled_date': next_free_slots(self.service.duration, count=1)[0].strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertRedirects(response, reverse('bookings:booking_list'))
+        self.assertEqual(len(mail.outbox), 0)
+        booking = Booking.objects.get()
+        outbox_message = OutboxMessage.objects.select_related('log').get()
+        self.assertEqual(outbox_message.log.booking, booking)
+        self.assertEqual(outbox_message.log.status, 'PENDING')
+
+        call_command('dispatch_outbox', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['customer@example.com'])
+        self.assertEqual(CommunicationLog.objects.get().status, 'SENT')
+
+    def test_dispatch_sends_batch_over_one_connection(self):
+        for i in range(3):
+            enqueue_email(self.customer, f'Subject {i}', 'Body')
+        self.assertEqual(dispatch_batch(batch_size=2), (2, 0))
+        self.assertEqual(dispatch_batch(batch_size=2), (1, 0))
+        self.assertEqual(dispatch_batch(batch_size=2), (0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.STATUS_SENT).exists())
+
+    @override_settings(
+        EMAIL_BACKEND='apps.communication.tests.FailingEmailBackend',
+        OUTBOX_MAX_ATTEMPTS=2,
+        OUTBOX_BACKOFF_SECONDS=60,
+    )
+    def test_failures_back_off_then_give_up(self):
+        outbox_message = enqueue_email(self.customer, 'Subject', 'Body')
+        self.assertEqual(dispatch_batch(), (0, 1))
+        outbox_message.refresh_from_db()
+        self.assertEqual(outbox_message.status, OutboxMessage.STATUS_PENDING)
+        self.assertEqual(outbox_message.attempts, 1)
+        self.assertIn('relay unavailable', outbox_message.last_error)
+        self.assertGreater(outbox_message.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        # Not due yet, so nothing is retried
+        self.assertEqual(dispatch_batch(), (0, 0))
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_batch(), (0, 1))
+        outbox_message.refresh_from_db()
+        self.assertEqual(outbox_message.status, OutboxMessage.STATUS_FAILED)
+        self.assertEqual(outbox_message.log.status, 'FAILED')
+
+    @override_settings(OUTBOX_BACKOFF_SECONDS=30, OUTBOX_MAX_BACKOFF_SECONDS=100)
+    def test_backoff_is_exponential_and_capped(self):
+        self.assertEqual(
+            [backoff_delay(n).total_seconds() for n in (1, 2, 3, 4)],
+            [30, 60, 100, 100],
+        )
+
+
+class BroadcastTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([
+            User(email=f'customer{i}@example.com', username=f'customer{i}',
+                 first_name='Customer', last_name=str(i), role=User.ROLE_CUSTOMER)
+            for i in range(25)
+        ])
+        User.objects.create_user(email='staff@example.com', username='staff', role=User.ROLE_STAFF)
+        NotificationTemplate.objects.create(
+            name='Broadcast Message',
+            subject='Important Update from iCars',
+            message='Dear {customer}, we have an important update: {message}',
+        )
+
+    def setUp(self):
+        notification_cache.clear()
+
+    @override_settings(EMAIL_BACKEND='apps.communication.tests.CountingEmailBackend')
+    def test_broadcast_reuses_one_connection_and_bulk_logs(self):
+        CountingEmailBackend.opened = 0
+        result = send_broadcast('Broadcast Message', {'message': 'Closed Monday'}, chunk_size=10)
+        self.assertEqual((result.sent, result.failed), (25, 0))
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(mail.outbox[0].body, 'Dear Customer 0, we have an important update: Closed Monday')
+        self.assertEqual(CommunicationLog.objects.filter(status='SENT').count(), 25)
+        self.assertGreater(result.rate, 0)
+
+    def test_broadcast_query_count_is_bounded_by_chunks(self):
+        # Template lookup, one SELECT for the customer stream and one INSERT per chunk
+        with self.assertNumQueries(5):
+            send_broadcast('Broadcast Message', {'message': 'Hi'}, chunk_size=10)
+
+    def test_template_disabled_during_a_run(self):
+        send_chunk = broadcast._send_chunk
+
+        def send_then_disable(*args):
+            NotificationTemplate.objects.filter(name='Broadcast Message').update(is_active=False)
+            notification_cache.clear()
+            return send_chunk(*args)
+
+        with mock.patch.object(broadcast, '_send_chunk', side_effect=send_then_disable):
+            result = send_broadcast('Broadcast Message', {'message': 'Hi'}, chunk_size=10)
+        # The run keeps the template it started with; the next one sends nothing
+        self.assertEqual((result.sent, result.failed), (25, 0))
+        self.assertIsNone(send_broadcast('Broadcast Message', {'message': 'Hi'}, chunk_size=10))
+
+    def test_broadcast_page_queues_for_the_worker(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        self.client.force_login(admin)
+        response = self.client.post(reverse('staff:send_broadcast'), {'message': 'Closed Monday'})
+        self.assertRedirects(response, reverse('staff:communication_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(len(mail.outbox), 0)
+        broadcast = Broadcast.objects.get()
+        self.assertEqual((broadcast.status, broadcast.requested_by), (Broadcast.STATUS_PENDING, admin))
+
+        out = StringIO()
+        call_command('send_broadcasts', '--once', '--chunk-size', '10', stdout=out)
+        self.assertIn('25 sent, 0 failed', out.getvalue())
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(mail.outbox[0].body, 'Dear Customer 0, we have an important update: Closed Monday')
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.sent, broadcast.failed), (Broadcast.STATUS_DONE, 25, 0))
+        self.assertIsNotNone(broadcast.finished_at)
+
+    def test_broadcast_with_a_disabled_template_is_skipped(self):
+        broadcast = queue_broadcast('Broadcast Message', {'message': 'Hi'})
+        NotificationTemplate.objects.filter(name='Broadcast Message').update(is_active=False)
+        self.assertEqual(claim_broadcast(), broadcast)
+        self.assertIsNone(claim_broadcast())
+        self.assertIsNone(run_broadcast(broadcast))
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, Broadcast.STATUS_SKIPPED)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_BACKEND='apps.communication.tests.FailingEmailBackend')
+    def test_failed_chunk_is_logged_as_failed(self):
+        with self.assertLogs('apps.communication.broadcast', 'ERROR'):
+            result = send_broadcast('Broadcast Message', {'message': 'Hi'}, chunk_size=10)
+        self.assertEqual((result.sent, result.failed), (0, 25))
+        self.assertEqual(CommunicationLog.objects.filter(status='FAILED').count(), 25)
+
+
+class NotificationCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.template = NotificationTemplate.objects.create(
+            name='Service Reminder',
+            subject='Service reminder',
+            message='Hi {customer}, see you on {{ date }}.',
+        )
+
+    def setUp(self):
+        notification_cache.clear()
+
+    def test_template_is_looked_up_and_compiled_once(self):
+        with self.assertNumQueries(1):
+            first = render_notification('Service Reminder', {'customer': 'Ann', 'date': 'Monday'})
+            second = render_notification('Service Reminder', {'customer': 'Bob', 'date': 'Friday'})
+        self.assertEqual(first.message, 'Hi Ann, see you on Monday.')
+        self.assertEqual(second.message, 'Hi Bob, see you on Friday.')
+        self.assertEqual(second.template, self.template)
+        self.assertEqual(notification_cache.stats()['hits'], 1)
+        self.assertEqual(notification_cache.stats()['misses'], 1)
+
+    def test_saving_template_invalidates_cache(self):
+        render_notification('Service Reminder', {})
+        self.template.message = 'Updated for {customer}'
+        self.template.save()
+        self.assertEqual(render_notification('Service Reminder', {'customer': 'Ann'}).message, 'Updated for Ann')
+
+    def test_disabled_template_renders_nothing(self):
+        self.template.is_active = False
+        self.template.save()
+        self.assertIsNone(render_notification('Service Reminder', {}))
+
+    def test_default_template_is_created_on_first_use(self):
+        notification = render_notification('Booking Confirmation', {'customer': 'Ann', 'service': 'Oil', 'date': 'today'})
+        self.assertEqual(notification.message, 'Dear Ann, your booking for Oil on today has been confirmed.')
+        self.assertTrue(NotificationTemplate.objects.filter(name='Booking Confirmation').exists())
+
+    def test_lru_is_bounded(self):
+        cache = type(notification_cache)(maxsize=2, ttl=60)
+        for name in ('a', 'b', 'c'):
+            cache.get(name)
+        self.assertEqual(cache.stats()['size'], 2)
+
+
+class TimingWheelTests(SimpleTestCase):
+
+    def test_timers_fire_on_their_tick_across_levels(self):
+        wheel = TimingWheel(now=0, slots=4, levels=2)
+        # 3 sits on level 0, 5 and 15 on level 1, 16 and 200 past the top level
+        for tick in (3, 5, 15, 16, 200):
+            wheel.schedule(tick, tick, f'timer {tick}')
+        fired = {}
+        for tick in range(1, 201):
+            for key, payload in wheel.advance(tick):
+                fired[key] = (tick, payload)
+        self.assertEqual(fired, {tick: (tick, f'timer {tick}') for tick in (3, 5, 15, 16, 200)})
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel_reschedule_and_overdue(self):
+        wheel = TimingWheel(now=10, slots=4, levels=2)
+        wheel.schedule('a', 12)
+        wheel.schedule('b', 30)
+        wheel.schedule('b', 13)
+        wheel.schedule('late', 5)
+        self.assertTrue(wheel.cancel('a'))
+        self.assertFalse(wheel.cancel('a'))
+        self.assertEqual(wheel.advance(10), [('late', None)])
+        self.assertEqual(wheel.advance(100), [('b', None)])
+
+
+class ReminderSchedulerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Ann', role=User.ROLE_CUSTOMER,
+        )
+        cls.bookings = create_listing_bookings(cls.customer, None, 3)
+
+    def setUp(self):
+        notification_cache.clear()
+        self.now = timezone.now()
+        # Appointments 24 hours and 10, 20 and 40 minutes from now
+        for booking, minutes in zip(self.bookings, (10, 20, 40)):
+            Booking.objects.filter(pk=booking.pk).update(
+                scheduled_date=self.now + timedelta(hours=24, minutes=minutes),
+            )
+
+    def reminders(self):
+        return CommunicationLog.objects.filter(idempotency_key__startswith='reminder:')
+
+    def test_reminders_are_queued_once_when_due(self):
+        scheduler = ReminderScheduler(now=self.now, offsets=[timedelta(hours=24)])
+        with self.assertNumQueries(1):
+            self.assertEqual(scheduler.tick(self.now), 0)
+        self.assertEqual(len(scheduler), 3)
+        # Nothing due and no change poll yet: no queries at all
+        with self.assertNumQueries(0):
+            self.assertEqual(scheduler.tick(self.now + timedelta(seconds=5)), 0)
+
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=25)), 2)
+        log = self.reminders().get(booking=self.bookings[0])
+        self.assertEqual(log.subject, 'Reminder: your upcoming iCars appointment')
+        self.assertIn('Dear Ann', log.message)
+        self.assertEqual(log.outbox_message.to_email, 'customer@example.com')
+
+        # A restarted scheduler catches up but does not queue them again
+        restarted = ReminderScheduler(now=self.now + timedelta(minutes=26), offsets=[timedelta(hours=24)])
+        self.assertEqual(restarted.tick(self.now + timedelta(minutes=26)), 0)
+        self.assertEqual(restarted.tick(self.now + timedelta(minutes=41)), 1)
+        self.assertEqual(self.reminders().count(), 3)
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+
+    def test_reschedules_and_cancellations_are_picked_up(self):
+        scheduler = ReminderScheduler(now=self.now, offsets=[timedelta(hours=24)])
+        scheduler.tick(self.now)
+        cancelled, moved, _unchanged = (Booking.objects.get(pk=booking.pk) for booking in self.bookings)
+        cancelled.status = Booking.STATUS_CANCELLED
+        cancelled.save()
+        moved.scheduled_date += timedelta(hours=1)
+        moved.save()
+
+        # The next change poll moves the timers; no rescan of due rows
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=45)), 1)
+        self.assertEqual(
+            list(self.reminders().values_list('booking', flat=True)), [self.bookings[2].pk],
+        )
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=81)), 1)
+        self.assertEqual(self.reminders().filter(booking=moved).count(), 1)
+
+    def test_disabled_template_queues_nothing(self):
+        NotificationTemplate.objects.create(name='Service Reminder', subject='-', message='-', is_active=False)
+        scheduler = ReminderScheduler(now=self.now, offsets=[timedelta(hours=24)])
+        scheduler.tick(self.now)
+        self.assertEqual(scheduler.tick(self.now + timedelta(hours=1)), 0)
+        self.assertFalse(self.reminders().exists())
+
+
+@override_settings(COMMUNICATION_ARCHIVE_BLOCK_ROWS=2, COMMUNICATION_ARCHIVE_DELETE_CHUNK=2)
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = User.objects.create_user(
+            email='ann@example.com', username='ann', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.bob = User.objects.create_user(
+            email='bob@example.com', username='bob', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.now = timezone.make_aware(datetime(2026, 10, 17, 12))
+
+        def log(recipient, subject, sent_at):
+            outbox = enqueue_email(recipient, subject, f'{subject} body')
+            CommunicationLog.objects.filter(pk=outbox.log_id).update(sent_at=sent_at)
+
+        # Three months past a 12 month retention, one just inside it
+        for day in (3, 5, 7):
+            log(cls.ann, f'Ann {day}', timezone.make_aware(datetime(2025, 6, day)))
+        log(cls.bob, 'Bob old', timezone.make_aware(datetime(2025, 6, 4)))
+        log(cls.bob, 'Bob older', timezone.make_aware(datetime(2025, 4, 1)))
+        log(cls.ann, 'Ann recent', timezone.make_aware(datetime(2025, 10, 2)))
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_old_months_move_to_archives(self):
+        result = archive_old_logs(12, self.directory.name, now=self.now)
+        self.assertEqual((result.archived, result.deleted), (5, 5))
+        self.assertEqual([f'{month:%Y-%m}' for month in result.months], ['2025-04', '2025-06'])
+        self.assertEqual(list(CommunicationLog.objects.values_list('subject', flat=True)), ['Ann recent'])
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        history = recipient_history(self.ann.pk, self.directory.name)
+        self.assertEqual([row['subject'] for row in history], ['Ann 7', 'Ann 5', 'Ann 3'])
+        self.assertEqual(history[0]['message'], 'Ann 7 body')
+        self.assertEqual(history[0]['sent_at'], timezone.make_aware(datetime(2025, 6, 7)))
+        self.assertEqual(
+            [row['subject'] for row in recipient_history(self.bob.pk, self.directory.name)], ['Bob old', 'Bob older'],
+        )
+        # A second run has nothing left to do
+        self.assertEqual(archive_old_logs(12, self.directory.name, now=self.now).months, [])
+
+    def test_lookup_reads_only_the_recipients_blocks(self):
+        archive_old_logs(12, self.directory.name, now=self.now)
+        with open(f'{self.directory.name}/2025-06.part001.index.json') as f:
+            index = json.load(f)
+        self.assertEqual(index['rows'], 4)
+        # Ann's three rows fill the first block and share the second with Bob's
+        self.assertEqual(len(index['recipients'][str(self.ann.pk)]), 2)
+        self.assertEqual(index['recipients'][str(self.bob.pk)], index['recipients'][str(self.ann.pk)][1:])
+
+    def test_interrupted_run_finishes_deleting_without_archiving_twice(self):
+        directory = Path(self.directory.name)
+        june = datetime(2025, 6, 1).date()
+        write_part(june, 1, CommunicationLog.objects.order_by('-pk').first().pk, directory)
+        result = archive_old_logs(12, directory, now=self.now)
+        self.assertEqual((result.archived, result.deleted), (1, 5))
+        self.assertEqual(len(list(directory.glob('2025-06.*.index.json'))), 1)
+        self.assertEqual(len(recipient_history(self.ann.pk, directory)), 3)
+
+    def test_history_command_merges_table_and_archives(self):
+        archive_old_logs(12, self.directory.name, now=self.now)
+        out = StringIO()
+        call_command('communication_history', 'ann@example.com', directory=self.directory.name, stdout=out)
+        subjects = [json.loads(line)['subject'] for line in out.getvalue().splitlines()]
+        self.assertEqual(subjects, ['Ann recent', 'Ann 7', 'Ann 5', 'Ann 3'])
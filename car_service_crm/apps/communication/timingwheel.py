@@ -0,0 +1,99 @@
+# apps/communication/timingwheel.py
+"""
+Hierarchical timing wheel (Varghese & Lauck).
+
+Timers are keyed, so scheduling and cancelling are O(1) dict operations, and
+advancing the clock costs O(levels) per tick however many timers are
+pending. Time is counted in integer ticks; the caller picks what a tick is.
+
+Read in base `slots`, a timer's tick sits on the lowest level above which
+its digits agree with the current tick's, in the slot named by its digit on
+that level. When the clock reaches a slot on an upper level, that slot's
+timers cascade down a level or more; reaching a slot on level 0 fires it.
+Timers further ahead than the top level wait in an overflow bucket that is
+sorted again each time the top level wraps.
+"""
+
+
+class TimingWheel:
+
+    def __init__(self, now, slots=64, levels=4):
+        self.now = now
+        self.slots = slots
+        self.levels = levels
+        self._wheels = [[{} for _slot in range(slots)] for _level in range(levels)]
+        self._overflow = {}
+        # Timers at or before the current tick, fired by the next advance()
+        self._due = {}
+        # key -> (tick, the bucket holding it)
+        self._timers = {}
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def schedule(self, key, tick, payload=None):
+        """
+        Fire `payload` at `tick`, replacing any timer under `key`. A tick
+        that has already passed fires on the next advance().
+        """
+        self.cancel(key)
+        self._place(key, tick, payload)
+
+    def cancel(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del timer[1][key]
+        return True
+
+    def advance(self, to):
+        """
+        Move the clock forward to tick `to` and return the (key, payload)
+        pairs of the timers that fired, in tick order.
+        """
+        fired = self._pop(self._due)
+        if not self._timers:
+            # Nothing to cascade; placement only depends on the new time
+            self.now = max(self.now, to)
+            return fired
+        while self.now < to:
+            self.now += 1
+            if self.now % self.slots ** self.levels == 0:
+                self._cascade(self._overflow)
+            for level in range(self.levels - 1, 0, -1):
+                width = self.slots ** level
+                if self.now % width == 0:
+                    self._cascade(self._wheels[level][self.now // width % self.slots])
+            fired.extend(self._pop(self._due))
+            fired.extend(self._pop(self._wheels[0][self.now % self.slots]))
+        return fired
+
+    def _bucket(self, tick):
+        if tick <= self.now:
+            return self._due
+        for level in range(self.levels):
+            span = self.slots ** (level + 1)
+            if tick // span == self.now // span:
+                return self._wheels[level][tick // self.slots ** level % self.slots]
+        return self._overflow
+
+    def _place(self, key, tick, payload):
+        bucket = self._bucket(tick)
+        bucket[key] = payload
+        self._timers[key] = (tick, bucket)
+
+    def _cascade(self, bucket):
+        timers = list(bucket.items())
+        bucket.clear()
+        for key, payload in timers:
+            self._place(key, self._timers[key][0], payload)
+
+    def _pop(self, bucket):
+        timers = list(bucket.items())
+        bucket.clear()
+        for key, _payload in timers:
+            del self._timers[key]
+        return timers
@@ -1,14 +1,72 @@
 # apps/customers/admin.py
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from apps.search.admin import IndexedSearchAdminMixin
+from apps.search.models import SearchDocument
+from .forms import VehicleImportForm
+from .importer import ImportFileError, VehicleImporter
 from .models import Vehicle
 
+# Row errors listed on the import result page
+SHOWN_IMPORT_ERRORS = 200
+
+
 @admin.register(Vehicle)
-class VehicleAdmin(admin.ModelAdmin):
+class VehicleAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
     """
     Admin interface for Vehicle model.
     """
     list_display = ('license_plate', 'make', 'model', 'year', 'owner', 'created_at')
     list_filter = ('make', 'year', 'owner')
     search_fields = ('license_plate', 'vin', 'make', 'model', 'owner__email')
+    search_kind = SearchDocument.KIND_VEHICLE
     ordering = ('-created_at',)
-    raw_id_fields = ('owner',)  # Improves performance for large user bases
\ No newline at end of file
+    raw_id_fields = ('owner',)  # Improves performance for large user bases
+    change_list_template = 'admin/customers/vehicle/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='customers_vehicle_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """
+        Upload a vehicle CSV. Uploads over FILE_UPLOAD_MAX_MEMORY_SIZE are
+        spooled to disk by Django and read back row by row.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        result = None
+        form = VehicleImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            importer = VehicleImporter(owner=form.cleaned_data['owner_email'], dry_run=form.cleaned_data['dry_run'])
+            stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = importer.run(stream)
+            except (ImportFileError, UnicodeDecodeError) as exc:
+                form.add_error('file', str(exc))
+            else:
+                level = messages.WARNING if result.errors else messages.SUCCESS
+                verb = 'validated' if form.cleaned_data['dry_run'] else 'imported'
+                self.message_user(
+                    request, f'{result.created} of {result.rows} row(s) {verb}; {result.failed_rows} row(s) failed.',
+                    level,
+                )
+            finally:
+                # Leave the upload open for Django's own cleanup
+                stream.detach()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import vehicles',
+            'form': form,
+            'result': result,
+            'errors': result.errors[:SHOWN_IMPORT_ERRORS] if result else [],
+        }
+        return TemplateResponse(request, 'admin/customers/vehicle/import.html', context)
@@ -3,6 +3,7 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
+from apps.users.models import User
 from .models import Vehicle
 
 class VehicleForm(forms.ModelForm):
@@ -32,4 +33,26 @@ class VehicleForm(forms.ModelForm):
         license_plate = self.cleaned_data.get('license_plate')
         if Vehicle.objects.filter(license_plate=license_plate).exclude(pk=self.instance.pk if self.instance else None).exists():
             raise forms.ValidationError(_('This license plate is already registered.'))
-        return license_plate
\ No newline at end of file
+        return license_plate
+
+class VehicleImportForm(forms.Form):
+    """
+    Admin upload form for a vehicle CSV; see importer.VehicleImporter.
+    """
+    file = forms.FileField(label=_('CSV file'))
+    owner_email = forms.EmailField(
+        label=_('Default owner'), required=False,
+        help_text=_('Customer owning rows that have no owner_email column value.'),
+    )
+    dry_run = forms.BooleanField(
+        label=_('Validate only'), required=False, help_text=_('Check every row without importing anything.'),
+    )
+
+    def clean_owner_email(self):
+        email = self.cleaned_data.get('owner_email')
+        if not email:
+            return None
+        owner = User.objects.filter(email=email, role=User.ROLE_CUSTOMER).first()
+        if owner is None:
+            raise forms.ValidationError(_('No customer with this email address.'))
+        return owner
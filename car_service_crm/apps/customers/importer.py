@@ -0,0 +1,204 @@
+# apps/customers/importer.py
+"""
+Streaming CSV import of customer vehicles.
+
+The file is read one row at a time and handled in chunks of `batch_size`
+rows. Each chunk costs a fixed number of queries however large it is: one
+`vin__in` and one `license_plate__in` lookup against existing vehicles, one
+lookup for owners not seen before, a bulk_create and the matching search
+index upsert. Rows that fail are
+collected as RowErrors (CSV line, field, message) rather than stopping the
+import, and every valid row in the file is imported.
+
+Expected columns: make, model, year, license_plate, vin and, unless a
+default owner is given, owner_email.
+"""
+import csv
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext as _
+
+from apps.fragments.cache import invalidate_all as invalidate_fragments
+from apps.search.index import index_objects
+from apps.search.models import SearchDocument
+from apps.staff.metrics import invalidate_metrics
+from apps.users.models import User
+from .models import Vehicle
+
+FIELDS = ('make', 'model', 'year', 'license_plate', 'vin')
+OWNER_COLUMN = 'owner_email'
+VIN_LENGTH = 17
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported, e.g. a required column is missing."""
+
+
+class RowError:
+    __slots__ = ('line', 'field', 'message')
+
+    def __init__(self, line, field, message):
+        self.line = line
+        self.field = field
+        self.message = message
+
+    def __repr__(self):
+        return f'RowError({self.line}, {self.field!r}, {self.message!r})'
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+
+    @property
+    def failed_rows(self):
+        return len({error.line for error in self.errors})
+
+
+def write_error_report(errors, stream):
+    writer = csv.writer(stream)
+    writer.writerow(['line', 'field', 'error'])
+    for error in errors:
+        writer.writerow([error.line, error.field, error.message])
+
+
+class VehicleImporter:
+    """
+    Import vehicles from CSV text, e.g. an open file or a TextIOWrapper around
+    an upload. Rows without an owner_email belong to `owner`. With
+    `dry_run` every row is validated but nothing is written.
+    """
+
+    def __init__(self, owner=None, batch_size=1000, dry_run=False):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.model_fields = {name: Vehicle._meta.get_field(name) for name in FIELDS}
+        # VINs and plates already taken by an earlier row of this file
+        self.seen_vins = set()
+        self.seen_plates = set()
+        self.owners = {}
+
+    def run(self, stream):
+        result = ImportResult()
+        reader = csv.reader(stream)
+        header = self.read_header(reader)
+        # Line numbers as a spreadsheet shows them: the header is line 1
+        rows = ((reader.line_num, row) for row in reader if any(cell.strip() for cell in row))
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            result.rows += len(chunk)
+            self.import_chunk(chunk, header, result)
+        if result.created:
+            transaction.on_commit(invalidate_metrics)
+            transaction.on_commit(invalidate_fragments)
+        return result
+
+    def read_header(self, reader):
+        try:
+            header = [name.strip().lower() for name in next(reader)]
+        except StopIteration:
+            raise ImportFileError(_('The file is empty.'))
+        required = list(FIELDS) if self.owner else [*FIELDS, OWNER_COLUMN]
+        missing = [name for name in required if name not in header]
+        if missing:
+            raise ImportFileError(_('Missing column(s): %(columns)s.') % {'columns': ', '.join(missing)})
+        return {name: header.index(name) for name in [*FIELDS, OWNER_COLUMN] if name in header}
+
+    def import_chunk(self, chunk, header, result):
+        parsed, chunk_errors = [], []
+        for line, row in chunk:
+            values, errors = self.clean_row(line, row, header)
+            if errors:
+                chunk_errors.extend(errors)
+            else:
+                parsed.append((line, values))
+
+        vins = {values['vin'] for _line, values in parsed}
+        plates = {values['license_plate'] for _line, values in parsed}
+        taken_vins = set(Vehicle.objects.filter(vin__in=vins).values_list('vin', flat=True))
+        taken_plates = set(Vehicle.objects.filter(license_plate__in=plates).values_list('license_plate', flat=True))
+        self.load_owners({values[OWNER_COLUMN] for _line, values in parsed if values.get(OWNER_COLUMN)})
+
+        vehicles = []
+        for line, values in parsed:
+            errors = []
+            if values['vin'] in taken_vins:
+                errors.append(RowError(line, 'vin', _('This VIN is already registered.')))
+            elif values['vin'] in self.seen_vins:
+                errors.append(RowError(line, 'vin', _('This VIN appears earlier in the file.')))
+            if values['license_plate'] in taken_plates:
+                errors.append(RowError(line, 'license_plate', _('This license plate is already registered.')))
+            elif values['license_plate'] in self.seen_plates:
+                errors.append(RowError(line, 'license_plate', _('This license plate appears earlier in the file.')))
+            owner_email = values.pop(OWNER_COLUMN, '')
+            owner_id = self.owners.get(owner_email) if owner_email else self.owner.pk
+            if owner_id is None:
+                errors.append(RowError(line, OWNER_COLUMN, _('No customer with this email address.')))
+            # A duplicate still claims its values, so a third copy is reported too
+            self.seen_vins.add(values['vin'])
+            self.seen_plates.add(values['license_plate'])
+            if errors:
+                chunk_errors.extend(errors)
+            else:
+                vehicles.append((line, Vehicle(owner_id=owner_id, **values)))
+        # Report in file order; sorted() keeps a row's errors in field order
+        result.errors.extend(sorted(chunk_errors, key=lambda error: error.line))
+
+        if vehicles and not self.dry_run:
+            self.insert(vehicles, result)
+        elif vehicles:
+            result.created += len(vehicles)
+
+    def clean_row(self, line, row, header):
+        values, errors = {}, []
+        for name, index in header.items():
+            raw = row[index].strip() if index < len(row) else ''
+            if name == OWNER_COLUMN:
+                values[name] = raw
+                continue
+            try:
+                values[name] = self.model_fields[name].clean(raw, None)
+            except ValidationError as exc:
+                errors.append(RowError(line, name, ' '.join(exc.messages)))
+        if 'vin' in values and len(values['vin']) != VIN_LENGTH:
+            errors.append(RowError(line, 'vin', _('VIN must be exactly 17 characters.')))
+        if not self.owner and not values.get(OWNER_COLUMN):
+            errors.append(RowError(line, OWNER_COLUMN, _('This field cannot be blank.')))
+        return values, errors
+
+    def load_owners(self, emails):
+        missing = emails - self.owners.keys()
+        if not missing:
+            return
+        found = dict(
+            User.objects.filter(email__in=missing, role=User.ROLE_CUSTOMER).values_list('email', 'pk')
+        )
+        for email in missing:
+            self.owners[email] = found.get(email)
+
+    def insert(self, vehicles, result):
+        try:
+            with transaction.atomic():
+                created = Vehicle.objects.bulk_create([vehicle for _line, vehicle in vehicles])
+                # bulk_create sends no post_save, so index the chunk here
+                index_objects(SearchDocument.KIND_VEHICLE, [vehicle.pk for vehicle in created])
+            result.created += len(vehicles)
+            return
+        except IntegrityError:
+            pass
+        # Another writer registered one of these since the lookup; insert the
+        # chunk row by row to find out which
+        for line, vehicle in vehicles:
+            try:
+                with transaction.atomic():
+                    vehicle.save(force_insert=True)
+                result.created += 1
+            except IntegrityError:
+                result.errors.append(RowError(line, '', _('This VIN or license plate is already registered.')))
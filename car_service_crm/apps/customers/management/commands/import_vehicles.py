@@ -0,0 +1,61 @@
+# apps/customers/management/commands/import_vehicles.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.customers.importer import ImportFileError, VehicleImporter, write_error_report
+from apps.users.models import User
+
+# Errors echoed to the console when no --errors report file is given
+SHOWN_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Import vehicles from a CSV file with columns make, model, year, license_plate, vin and, '
+        'unless --owner is given, owner_email. Valid rows are imported in batches; invalid rows are '
+        'reported by line and skipped, so a corrected file can be re-run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import, or '-' for standard input.")
+        parser.add_argument('--owner', metavar='EMAIL', help='Customer owning rows without an owner_email.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--errors', metavar='PATH', help='Write every row error to this CSV file.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without importing it.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        owner = None
+        if options['owner']:
+            owner = User.objects.filter(email=options['owner'], role=User.ROLE_CUSTOMER).first()
+            if owner is None:
+                raise CommandError(f"No customer with email {options['owner']}.")
+
+        importer = VehicleImporter(owner=owner, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        started = time.perf_counter()
+        try:
+            if options['path'] == '-':
+                result = importer.run(sys.stdin)
+            else:
+                with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                    result = importer.run(f)
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as f:
+                write_error_report(result.errors, f)
+        else:
+            for error in result.errors[:SHOWN_ERRORS]:
+                self.stdout.write(self.style.WARNING(f'line {error.line} {error.field}: {error.message}'))
+            if len(result.errors) > SHOWN_ERRORS:
+                self.stdout.write(f'... and {len(result.errors) - SHOWN_ERRORS} more; use --errors for the full report.')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.created} of {result.rows} row(s) in {elapsed:.2f}s; {result.failed_rows} row(s) failed.'
+        ))
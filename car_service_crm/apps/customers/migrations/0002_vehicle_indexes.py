@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['owner', '-created_at'], name='vehicle_owner_created_idx'),
+        ),
+    ]
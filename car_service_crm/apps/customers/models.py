@@ -49,6 +49,10 @@ class Vehicle(models.Model):
         verbose_name = _('Vehicle')
         verbose_name_plural = _('Vehicles')
         ordering = ['-created_at']
+        indexes = [
+            # Vehicle list and dashboard: a customer's vehicles, newest first
+            models.Index(fields=['owner', '-created_at'], name='vehicle_owner_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.make} {self.model} ({self.license_plate})"
\ No newline at end of file
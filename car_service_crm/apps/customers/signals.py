@@ -0,0 +1,18 @@
+# apps/customers/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.fragments.cache import bump, scope
+from .models import Vehicle
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def bump_vehicle_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Fragments listing bookings include these scopes too, as each row shows its vehicle
+    scopes = ('vehicles', scope('vehicles', 'customer', instance.owner_id))
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
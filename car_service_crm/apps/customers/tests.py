@@ -1,3 +1,196 @@
-from django.test import TestCase
+# apps/customers/tests.py
+import io
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from apps.services.models import Service
+from apps.users.models import User
+from .importer import ImportFileError, VehicleImporter
+from .models import Vehicle
+
+
+def full_table_scans(queryset):
+    """
+    Return the EXPLAIN QUERY PLAN lines that scan a table without an index.
+    """
+    plan = queryset.explain()
+    return [line for line in plan.splitlines() if ' SCAN ' in f' {line} ' and 'USING' not in line]
+
+
+class CustomerQueryPlanTests(TestCase):
+    """
+    Customer-facing querysets must be served by an index, not a full scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        service = Service.objects.create(name='Brake Inspection', price=50, duration=timedelta(hours=1))
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Casey', last_name='Customer', role=User.ROLE_CUSTOMER,
+        )
+        others = User.objects.bulk_create([
+            User(email=f'other{i}@example.com', username=f'other{i}', role=User.ROLE_CUSTOMER)
+            for i in range(20)
+        ])
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(owner=owner, make='Toyota', model='Corolla', year=2020,
+                    license_plate=f'PLATE{i}', vin=f'{i:017d}')
+            for i, owner in enumerate([cls.customer] + others)
+        ])
+        now = timezone.now()
+        statuses = [choice for choice, _label in Booking.STATUS_CHOICES]
+        Booking.objects.bulk_create([
+            Booking(customer=vehicle.owner, vehicle=vehicle, service=service,
+                    scheduled_date=now + timedelta(days=i), status=statuses[i % len(statuses)])
+            for vehicle in vehicles
+            for i in range(10)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_dashboard_querysets_use_indexes(self):
+        response = self.client.get(reverse('customers:customers_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        for key in ('vehicles', 'upcoming_bookings'):
+            with self.subTest(key=key):
+                self.assertEqual(full_table_scans(response.context[key]), [])
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_vehicle_list_queryset_uses_index(self):
+        response = self.client.get(reverse('customers:vehicle_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(full_table_scans(response.context['vehicles']), [])
+
+
+class VehicleListConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.customer, make='Mazda', model='3', year=2019, license_plate='ETAG1', vin='E' * 17,
+        )
+
+    def test_not_modified_until_a_vehicle_changes(self):
+        self.client.force_login(self.customer)
+        url = reverse('customers:vehicle_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        vehicle.license_plate = 'ETAG2'
+        vehicle.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'ETAG2')
+
+def vehicle_csv(rows, header='make,model,year,license_plate,vin,owner_email'):
+    return io.StringIO('\n'.join([header, *rows]) + '\n')
+
+
+class VehicleImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='fleet@example.com', username='fleet', role=User.ROLE_CUSTOMER,
+        )
+        cls.other = User.objects.create_user(
+            email='other@example.com', username='other', role=User.ROLE_CUSTOMER,
+        )
+        User.objects.create_user(email='staff@example.com', username='staff', role=User.ROLE_STAFF)
+        Vehicle.objects.create(
+            owner=cls.other, make='Ford', model='Focus', year=2018, license_plate='TAKEN1', vin='T' * 17,
+        )
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        result = VehicleImporter().run(vehicle_csv([
+            f'Toyota,Corolla,2020,NEW1,{"A" * 17},fleet@example.com',
+            f'Honda,Civic,2019,NEW2,{"B" * 17},other@example.com',
+            '',
+            f'Honda,Civic,not-a-year,NEW3,{"C" * 17},fleet@example.com',
+            'Honda,Civic,2019,NEW4,SHORT,fleet@example.com',
+            f'Honda,Civic,2019,TAKEN1,{"D" * 17},fleet@example.com',
+            f'Honda,Civic,2019,NEW5,{"A" * 17},fleet@example.com',
+            f'Honda,Civic,2019,NEW6,{"E" * 17},staff@example.com',
+            f',Civic,2019,NEW7,{"F" * 17},',
+        ]))
+        self.assertEqual(result.rows, 8)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.failed_rows, 6)
+        self.assertEqual(
+            [(error.line, error.field) for error in result.errors],
+            [(5, 'year'), (6, 'vin'), (7, 'license_plate'), (8, 'vin'), (9, 'owner_email'),
+             (10, 'make'), (10, 'owner_email')],
+        )
+        self.assertEqual(Vehicle.objects.get(license_plate='NEW2').owner, self.other)
+        self.assertEqual(self.customer.vehicles.count(), 1)
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        rows = [f'Toyota,Corolla,2020,BULK{i},{i:017d}' for i in range(50)]
+        # Per chunk: VIN lookup, plate lookup, bulk insert and search index
+        # build + upsert in a savepoint
+        with self.assertNumQueries(2 * 7):
+            result = VehicleImporter(owner=self.customer, batch_size=25).run(
+                vehicle_csv(rows, header='make,model,year,license_plate,vin'),
+            )
+        self.assertEqual(result.created, 50)
+        self.assertEqual(result.errors, [])
+
+    def test_dry_run_writes_nothing(self):
+        result = VehicleImporter(owner=self.customer, dry_run=True).run(vehicle_csv(
+            [f'Toyota,Corolla,2020,DRY1,{"A" * 17},', f'Toyota,Corolla,2020,DRY1,{"B" * 17},'],
+        ))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(result.errors), 1)
+        self.assertFalse(Vehicle.objects.filter(license_plate='DRY1').exists())
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(ImportFileError, 'owner_email'):
+            VehicleImporter().run(vehicle_csv([], header='make,model,year,license_plate,vin'))
+
+    def test_command_writes_error_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'fleet.csv')
+            report = os.path.join(directory, 'errors.csv')
+            with open(source, 'w') as f:
+                f.write(vehicle_csv([
+                    f'Toyota,Corolla,2020,CMD1,{"A" * 17},',
+                    f'Toyota,Corolla,2020,TAKEN1,{"B" * 17},',
+                ]).getvalue())
+            out = io.StringIO()
+            call_command('import_vehicles', source, owner='fleet@example.com', errors=report, stdout=out)
+            self.assertIn('Imported 1 of 2 row(s)', out.getvalue())
+            with open(report) as f:
+                self.assertEqual(f.read().splitlines()[1], '3,license_plate,This license plate is already registered.')
+            with self.assertRaises(CommandError):
+                call_command('import_vehicles', source, owner='staff@example.com', stdout=out)
+
+    def test_admin_upload(self):
+        admin_user = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        self.client.force_login(admin_user)
+        url = reverse('admin:customers_vehicle_import')
+        self.assertContains(self.client.get(reverse('admin:customers_vehicle_changelist')), url)
+        upload = SimpleUploadedFile('fleet.csv', vehicle_csv([
+            f'Toyota,Corolla,2020,ADM1,{"A" * 17},',
+            'Toyota,Corolla,2020,ADM2,SHORT,',
+        ]).getvalue().encode())
+        response = self.client.post(url, {'file': upload, 'owner_email': 'fleet@example.com'})
+        self.assertContains(response, 'VIN must be exactly 17 characters.')
+        self.assertTrue(self.customer.vehicles.filter(license_plate='ADM1').exists())
@@ -1,4 +1,5 @@
 # apps/customers/views.py
+import asyncio
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView
@@ -9,30 +10,29 @@ from django.utils.translation import gettext_lazy as _
 from .models import Vehicle
 from .forms import VehicleForm
 from apps.bookings.models import Booking
+from apps.users.mixins import AsyncRoleRequiredMixin, ConditionalGetMixin, evaluate
 
-class CustomerDashboardView(LoginRequiredMixin, TemplateView):
+class CustomerDashboardView(AsyncRoleRequiredMixin, TemplateView):
     """
     Dashboard for Customer role, showing overview of vehicles and upcoming bookings.
+    Async; the two queries are awaited together.
     """
     template_name = 'customers/dashboard.html'
+    required_role = 'is_customer'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        if self.request.user.is_customer:
-            context['vehicles'] = self.request.user.vehicles.all()
-            # Placeholder for bookings, to be implemented in bookings app
-            context['upcoming_bookings'] = Booking.objects.filter(
-                customer=self.request.user,
+    async def get(self, request, *args, **kwargs):
+        vehicles, upcoming_bookings = await asyncio.gather(
+            evaluate(request.user.vehicles.all()),
+            evaluate(Booking.objects.for_listing().filter(
+                customer=request.user,
                 status__in=[Booking.STATUS_PENDING, Booking.STATUS_IN_PROGRESS]
-            ).order_by('scheduled_date')[:5] #show upto 5 upcoming bookings
-        return context
+            ).order_by('scheduled_date')[:5]),  # show up to 5 upcoming bookings
+        )
+        return self.render_to_response(self.get_context_data(
+            vehicles=vehicles, upcoming_bookings=upcoming_bookings, **kwargs,
+        ))
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_customer:
-            return redirect('users:home')  # Redirect non-customers
-        return super().dispatch(request, *args, **kwargs)
-
-class VehicleListView(LoginRequiredMixin, ListView):
+class VehicleListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     """
     List all vehicles for the logged-in customer.
     """
@@ -0,0 +1,123 @@
+# apps/fragments/cache.py
+"""
+Versioned template fragment cache.
+
+A fragment is cached under its name, the versions of the scopes it shows
+and anything else it varies on, such as the page's filters. A scope names a
+set of rows, e.g. "bookings" for all bookings or "bookings:customer:42" for
+one customer's, and its version is bumped whenever one of those rows is
+saved or deleted (see the bookings and customers signals). A bump changes
+the key of every fragment showing the scope, so stale copies are never read
+again and simply expire. Code that writes rows with bulk_create() or
+update() must call bump() or invalidate_all() itself. The versions live in
+the cache, so they only reach every worker through a shared backend (see
+CACHES in settings).
+
+Hits and misses are counted per fragment name for get_stats().
+"""
+import hashlib
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+CACHE_PREFIX = 'fragments'
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+NAMES_KEY = f'{CACHE_PREFIX}:names'
+
+
+def scope(*parts):
+    """
+    Join `parts` into a scope name: scope('bookings', 'customer', 42).
+    """
+    return ':'.join(str(part) for part in parts)
+
+
+def _version_key(name):
+    return f'{CACHE_PREFIX}:version:{name}'
+
+
+def _stats_key(name, outcome):
+    return f'{CACHE_PREFIX}:stats:{name}:{outcome}'
+
+
+def _increment(key):
+    """
+    Increment the counter at `key`; return True if this created it.
+    """
+    if cache.add(key, 1, timeout=None):
+        return True
+    cache.incr(key)
+    return False
+
+
+def bump(*scopes):
+    for name in scopes:
+        _increment(_version_key(name))
+
+
+def invalidate_all():
+    _increment(GENERATION_KEY)
+
+
+def fragment_key(name, scopes, vary_on=()):
+    keys = {GENERATION_KEY: '*', **{_version_key(scope_name): scope_name for scope_name in scopes}}
+    versions = cache.get_many(list(keys))
+    # Each scope's name goes in beside its version: two users' scopes can sit
+    # at the same version, and their fragments must still not share a key
+    parts = [
+        get_language() or '',
+        *(f'{scope_name}={versions.get(key, 0)}' for key, scope_name in keys.items()),
+        *vary_on,
+    ]
+    digest = hashlib.md5(':'.join(quote(str(part)) for part in parts).encode(), usedforsecurity=False)
+    return f'{CACHE_PREFIX}:{name}:{digest.hexdigest()}'
+
+
+def _record(name, hit):
+    if _increment(_stats_key(name, 'hits' if hit else 'misses')):
+        # First count for this name since the cache was last cleared
+        names = cache.get(NAMES_KEY) or set()
+        if name not in names:
+            cache.set(NAMES_KEY, names | {name}, timeout=None)
+
+
+def get_or_render(name, scopes, vary_on, render):
+    """
+    Return the cached content of fragment `name`, calling render() to build
+    and cache it on a miss.
+    """
+    key = fragment_key(name, scopes, vary_on)
+    content = cache.get(key)
+    _record(name, hit=content is not None)
+    if content is None:
+        content = render()
+        cache.set(key, content, timeout=getattr(settings, 'FRAGMENT_CACHE_TTL', 600))
+    return content
+
+
+def get_stats():
+    """
+    Hits, misses and hit rate per fragment name, and over all of them.
+    """
+    names = sorted(cache.get(NAMES_KEY) or ())
+    counts = cache.get_many([_stats_key(name, outcome) for name in names for outcome in ('hits', 'misses')])
+    fragments = {}
+    for name in names:
+        hits = counts.get(_stats_key(name, 'hits'), 0)
+        misses = counts.get(_stats_key(name, 'misses'), 0)
+        fragments[name] = {'hits': hits, 'misses': misses, 'hit_rate': _rate(hits, misses)}
+    hits = sum(row['hits'] for row in fragments.values())
+    misses = sum(row['misses'] for row in fragments.values())
+    return {'fragments': fragments, 'total': {'hits': hits, 'misses': misses, 'hit_rate': _rate(hits, misses)}}
+
+
+def reset_stats():
+    names = cache.get(NAMES_KEY) or ()
+    cache.delete_many([_stats_key(name, outcome) for name in names for outcome in ('hits', 'misses')])
+    cache.delete(NAMES_KEY)
+
+
+def _rate(hits, misses):
+    return round(hits / (hits + misses), 4) if hits + misses else None
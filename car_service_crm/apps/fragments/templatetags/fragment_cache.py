@@ -0,0 +1,59 @@
+from django import template
+
+from ..cache import get_or_render, scope
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, scopes, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.scopes = scopes
+        self.vary_on = vary_on
+
+    def render(self, context):
+        return get_or_render(
+            self.name.resolve(context),
+            [str(expression.resolve(context)) for expression in self.scopes],
+            [expression.resolve(context) for expression in self.vary_on],
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag('cachedfragment')
+def do_cachedfragment(parser, token):
+    """
+    Cache the enclosed content until one of the listed scopes changes:
+
+        {% cachedfragment "customer_bookings" "bookings:customer"|scoped:user.pk varying request.GET.urlencode %}
+            ...
+        {% endcachedfragment %}
+
+    The first argument names the fragment for the hit-rate stats; the
+    arguments after `varying` become part of the key.
+    """
+    bits = token.split_contents()
+    if 'varying' in bits:
+        split = bits.index('varying')
+        bits, vary_on = bits[:split], bits[split + 1:]
+    else:
+        vary_on = []
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a fragment name and at least one scope.")
+    nodelist = parser.parse(('endcachedfragment',))
+    parser.delete_first_token()
+    return CachedFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+        [parser.compile_filter(bit) for bit in vary_on],
+    )
+
+
+@register.filter
+def scoped(value, arg):
+    """
+    "bookings:customer"|scoped:user.pk -> "bookings:customer:42"
+    """
+    return scope(value, arg)
@@ -0,0 +1,146 @@
+# apps/fragments/tests.py
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.analytics.reports import generate_monthly_reports
+from apps.bookings.models import Booking
+from apps.bookings.tests import create_listing_bookings
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+from .cache import bump, fragment_key, get_stats, invalidate_all, reset_stats, scope
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return str(self.calls)
+
+
+FRAGMENT = Template(
+    '{% load fragment_cache %}'
+    '{% cachedfragment "rows" "bookings:customer"|scoped:owner varying page %}{{ counter }}{% endcachedfragment %}'
+)
+
+
+class CachedFragmentTagTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.counter = Counter()
+
+    def render(self, owner=1, page=1):
+        return FRAGMENT.render(Context({'counter': self.counter, 'owner': owner, 'page': page}))
+
+    def test_cached_until_its_scope_is_bumped(self):
+        self.assertEqual(self.render(), '1')
+        self.assertEqual(self.render(), '1')
+        bump(scope('bookings', 'customer', 2))
+        self.assertEqual(self.render(), '1')
+        bump(scope('bookings', 'customer', 1))
+        self.assertEqual(self.render(), '2')
+        invalidate_all()
+        self.assertEqual(self.render(), '3')
+
+    def test_scope_and_varying_values_are_part_of_the_key(self):
+        self.assertEqual(self.render(owner=1), '1')
+        self.assertEqual(self.render(owner=2), '2')
+        self.assertEqual(self.render(owner=1, page=2), '3')
+        self.assertEqual(self.render(owner=1, page=1), '1')
+
+    def test_stats(self):
+        self.render()
+        self.render()
+        self.render(page=2)
+        self.assertEqual(get_stats(), {
+            'fragments': {'rows': {'hits': 1, 'misses': 2, 'hit_rate': 0.3333}},
+            'total': {'hits': 1, 'misses': 2, 'hit_rate': 0.3333},
+        })
+        reset_stats()
+        self.assertEqual(get_stats()['total'], {'hits': 0, 'misses': 0, 'hit_rate': None})
+
+    def test_requires_a_scope(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template('{% load fragment_cache %}{% cachedfragment "rows" %}{% endcachedfragment %}')
+
+
+class FragmentInvalidationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.other_staff = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.bookings = create_listing_bookings(cls.customer, cls.staff, 3)
+
+    def setUp(self):
+        cache.clear()
+
+    def key(self, *scopes):
+        return fragment_key('test', scopes)
+
+    def test_repeat_booking_list_skips_the_booking_query(self):
+        self.client.force_login(self.customer)
+        url = reverse('bookings:booking_list')
+        self.client.get(url)
+        # Only the session, user and conditional GET validator lookups remain
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        booking = self.bookings[0]
+        booking.status = Booking.STATUS_CANCELLED
+        booking.save()
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertContains(response, 'Cancelled')
+
+    def test_reassignment_bumps_both_staff_scopes(self):
+        old_staff = self.key(scope('bookings', 'staff', self.staff.pk))
+        new_staff = self.key(scope('bookings', 'staff', self.other_staff.pk))
+        customer = self.key(scope('bookings', 'customer', self.customer.pk))
+        booking = Booking.objects.get(pk=self.bookings[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.assigned_staff = self.other_staff
+            booking.save()
+        self.assertNotEqual(self.key(scope('bookings', 'staff', self.staff.pk)), old_staff)
+        self.assertNotEqual(self.key(scope('bookings', 'staff', self.other_staff.pk)), new_staff)
+        self.assertNotEqual(self.key(scope('bookings', 'customer', self.customer.pk)), customer)
+
+    def test_vehicle_changes_bump_owner_scope(self):
+        before = self.key(scope('vehicles', 'customer', self.customer.pk))
+        other = self.key(scope('vehicles', 'customer', self.staff.pk))
+        Vehicle.objects.create(
+            owner=self.customer, make='Ford', model='Fiesta', year=2018, license_plate='FRAG1', vin='F' * 17,
+        )
+        self.assertNotEqual(self.key(scope('vehicles', 'customer', self.customer.pk)), before)
+        self.assertEqual(self.key(scope('vehicles', 'customer', self.staff.pk)), other)
+
+    def test_report_generation_bumps_analytics(self):
+        before = self.key('analytics')
+        with self.captureOnCommitCallbacks() as callbacks:
+            generate_monthly_reports(date.today() - timedelta(days=40))
+        # Not before commit, so no request re-caches the old reports under the new version
+        self.assertEqual(self.key('analytics'), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self.key('analytics'), before)
+
+    def test_service_changes_drop_every_fragment(self):
+        before = self.key(scope('bookings', 'customer', self.customer.pk))
+        service = Service.objects.get(pk=self.bookings[0].service_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            service.name = 'Renamed Service'
+            service.save()
+        self.assertNotEqual(self.key(scope('bookings', 'customer', self.customer.pk)), before)
@@ -0,0 +1,221 @@
+# apps/monitoring/benchmark.py
+"""
+End-to-end throughput benchmark for the URLs in apps/*/urls.py.
+
+Each GET-able URL is driven through the Django test client as the first
+role (anonymous, admin, staff, customer) that gets a 200 from it. URLs that
+take a pk are given one the view's own get_queryset() lets that role see.
+Latency percentiles, queries per request and process RSS are collected per
+URL, and results can be saved as JSON and compared against an earlier run.
+"""
+import json
+import math
+import platform
+import resource
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Count
+from django.test import Client, RequestFactory
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from apps.users.models import User
+from .middleware import QueryCollector
+
+ROLES = ['anonymous', User.ROLE_ADMIN, User.ROLE_STAFF, User.ROLE_CUSTOMER]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def current_rss_kb():
+    """Resident set size of this process, falling back to the peak RSS."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def iter_app_urls():
+    """
+    Yield (url name, URLPattern) for every named pattern included from an
+    apps.* urlconf.
+    """
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver):
+            continue
+        # include() hands the resolver the imported module rather than its name
+        module = getattr(resolver.urlconf_name, '__name__', resolver.urlconf_name)
+        if not str(module).startswith('apps.'):
+            continue
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                name = f'{resolver.namespace}:{pattern.name}' if resolver.namespace else pattern.name
+                yield name, pattern
+
+
+def benchmark_users():
+    """
+    The user to benchmark each role as: the admin, and the staff member and
+    customer with the most bookings, so list pages are at their fullest.
+    """
+    users = {'anonymous': AnonymousUser()}
+    users[User.ROLE_ADMIN] = User.objects.filter(role=User.ROLE_ADMIN).order_by('pk').first()
+    users[User.ROLE_STAFF] = (
+        User.objects.filter(role=User.ROLE_STAFF)
+        .annotate(n=Count('assigned_bookings')).order_by('-n', 'pk').first()
+    )
+    users[User.ROLE_CUSTOMER] = (
+        User.objects.filter(role=User.ROLE_CUSTOMER)
+        .annotate(n=Count('bookings')).order_by('-n', 'pk').first()
+    )
+    return {role: user for role, user in users.items() if user is not None}
+
+
+def _sample_pk(pattern, user):
+    view_class = getattr(pattern.callback, 'view_class', None)
+    if view_class is None or not hasattr(view_class, 'get_queryset'):
+        return None
+    request = RequestFactory().get('/')
+    request.user = user
+    view = view_class()
+    view.setup(request)
+    try:
+        obj = view.get_queryset().order_by('-pk').first()
+    except Exception:
+        return None
+    return obj.pk if obj else None
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class BenchmarkRunner:
+    def __init__(self, requests=50, warmup=3, only=None, stdout=None):
+        self.requests = requests
+        self.warmup = warmup
+        self.only = only
+        self.stdout = stdout
+        self.users = benchmark_users()
+
+    def client_for(self, role):
+        # Views that raise are reported as skipped with their 500, not aborted on
+        client = Client(raise_request_exception=False, HTTP_HOST=_host())
+        if role != 'anonymous':
+            client.force_login(self.users[role])
+        return client
+
+    def resolve(self, name, pattern):
+        """
+        Return (role, client, path) for the first role that gets a 200, or
+        (None, None, reason) if none does.
+        """
+        args = set(pattern.pattern.converters)
+        reason = 'no role got a 200'
+        for role in ROLES:
+            if role not in self.users:
+                continue
+            kwargs = {}
+            if args == {'pk'}:
+                pk = _sample_pk(pattern, self.users[role])
+                if pk is None:
+                    continue
+                kwargs['pk'] = pk
+            elif args:
+                return None, None, f'needs {", ".join(sorted(args))}'
+            path = reverse(name, kwargs=kwargs)
+            client = self.client_for(role)
+            status = client.get(path).status_code
+            if status == 200:
+                return role, client, path
+            reason = f'{role} got {status}'
+        return None, None, reason
+
+    def measure(self, client, path):
+        latencies, queries = [], []
+        for i in range(self.warmup + self.requests):
+            collector = QueryCollector()
+            with connections['default'].execute_wrapper(collector):
+                started = time.perf_counter()
+                client.get(path)
+                elapsed = time.perf_counter() - started
+            if i >= self.warmup:
+                latencies.append(elapsed * 1000)
+                queries.append(collector.count)
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'queries': round(sum(queries) / len(queries), 1),
+            'rss_kb': current_rss_kb(),
+        }
+
+    def run(self):
+        results, skipped = {}, {}
+        for name, pattern in iter_app_urls():
+            if self.only and not any(name.startswith(prefix) for prefix in self.only):
+                continue
+            role, client, path = self.resolve(name, pattern)
+            if role is None:
+                skipped[name] = path
+                continue
+            results[name] = {'path': path, 'role': role, **self.measure(client, path)}
+            if self.stdout:
+                r = results[name]
+                self.stdout.write(
+                    f"{name:40} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} ms "
+                    f"{r['queries']:6.1f} q {r['rss_kb'] // 1024:5d} MB"
+                )
+        return {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connections['default'].vendor,
+                'requests_per_url': self.requests,
+                'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+            'results': results,
+            'skipped': skipped,
+        }
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Return a list of regression descriptions: URLs whose p95 latency grew by
+    more than `threshold` (a fraction) or whose queries per request grew at all.
+    """
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now['queries'] > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {now['queries']}")
+    return regressions
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
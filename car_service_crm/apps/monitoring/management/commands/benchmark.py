@@ -0,0 +1,49 @@
+# apps/monitoring/management/commands/benchmark.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitoring.benchmark import BenchmarkRunner, compare, load, save
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every URL in apps/*/urls.py through the test client and report latency percentiles, '
+        'queries per request and RSS. Run it against a seeded development database, not production: '
+        'it logs users in and so writes sessions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per URL.')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per URL.')
+        parser.add_argument('--only', action='append', metavar='PREFIX',
+                            help='Only benchmark URL names starting with PREFIX, e.g. staff: (repeatable).')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as a JSON baseline.')
+        parser.add_argument('--compare', metavar='PATH', help='Compare against a saved baseline.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed p95 latency growth against the baseline, as a fraction.')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if --compare finds a regression.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+        baseline = load(options['compare']) if options['compare'] else None
+
+        self.stdout.write(f"{'url':40} {'p50':>8} {'p95':>8} {'p99':>8}")
+        report = BenchmarkRunner(
+            requests=options['requests'], warmup=options['warmup'], only=options['only'], stdout=self.stdout,
+        ).run()
+        for name, reason in sorted(report['skipped'].items()):
+            self.stdout.write(f'skipped {name}: {reason}')
+
+        if options['save']:
+            save(report, options['save'])
+            self.stdout.write(f"Saved baseline to {options['save']}.")
+
+        if baseline is not None:
+            regressions = compare(baseline, report, options['threshold'])
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(f'regression {line}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}.')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitoring.benchmark import save
+from apps.monitoring.serverbench import SERVERS, ServerUnavailable, compare_servers
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the project with WSGI and ASGI servers in turn and compare dashboard tail latency under '
+        'concurrent load. Run it against a seeded development database: it logs users in and so writes sessions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['gunicorn', 'uvicorn'])
+        parser.add_argument('--requests', type=int, default=500, help='Measured requests per dashboard.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client connections.')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per dashboard.')
+        parser.add_argument('--workers', type=int, default=1, help='Server worker processes.')
+        parser.add_argument('--threads', type=int, default=8, help='Threads per WSGI worker.')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as JSON.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+        self.stdout.write(f"{'server':9} {'if':4} {'url':32} {'p50':>8} {'p95':>8} {'p99':>8}")
+        try:
+            report = compare_servers(
+                options['servers'], requests=options['requests'], concurrency=options['concurrency'],
+                warmup=options['warmup'], workers=options['workers'], threads=options['threads'],
+                stdout=self.stdout,
+            )
+        except ServerUnavailable as exc:
+            raise CommandError(str(exc))
+        if options['save']:
+            save(report, options['save'])
+            self.stdout.write(f"Saved results to {options['save']}.")
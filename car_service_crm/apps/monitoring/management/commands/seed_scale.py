@@ -0,0 +1,205 @@
+# apps/monitoring/management/commands/seed_scale.py
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.analytics.reports import generate_monthly_reports
+from apps.analytics.rollups import month_of
+from apps.bookings.availability import invalidate_all
+from apps.bookings.models import Booking, Feedback
+from apps.communication.models import CommunicationLog
+from apps.customers.models import Vehicle
+from apps.fragments.cache import invalidate_all as invalidate_fragments
+from apps.search.index import index_objects
+from apps.search.models import SearchDocument
+from apps.services.catalog import invalidate_catalog
+from apps.services.models import Service
+from apps.users.models import User
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+               'Priya', 'Wei', 'Fatima', 'Diego', 'Olga', 'Kwame', 'Yuki', 'Liam', 'Noah', 'Emma']
+LAST_NAMES = ['Smith', 'Patel', 'Garcia', 'Nguyen', 'Kim', 'Okafor', 'Müller', 'Rossi', 'Silva', 'Khan',
+              'Brown', 'Wilson', 'Lopez', 'Chen', 'Ivanova', 'Mensah', 'Sato', 'Murphy', 'Clark', 'Lewis']
+MAKES = {
+    'Toyota': ['Corolla', 'Camry', 'RAV4', 'Hilux'],
+    'Ford': ['Focus', 'Fiesta', 'Ranger', 'Mustang'],
+    'Honda': ['Civic', 'Accord', 'CR-V'],
+    'Volkswagen': ['Golf', 'Polo', 'Passat'],
+    'BMW': ['3 Series', 'X3'],
+    'Hyundai': ['i30', 'Tucson'],
+}
+SERVICES = [
+    ('Oil Change', 49, 30), ('Tire Rotation', 39, 30), ('Engine Repair', 650, 480), ('AC Service', 120, 90),
+    ('Brake Pads', 180, 120), ('Battery Replacement', 140, 30), ('Full Inspection', 90, 60),
+    ('Wheel Alignment', 75, 60), ('Transmission Service', 260, 180), ('Detailing', 110, 120),
+]
+# Cheap, frequent services are booked far more often than major repairs
+SERVICE_WEIGHTS = [30, 18, 3, 8, 9, 6, 12, 7, 3, 4]
+# Most customers own one vehicle; a few households have several
+VEHICLES_PER_CUSTOMER = [1, 1, 1, 1, 1, 1, 2, 2, 3]
+RATINGS = [1, 2, 3, 4, 5]
+RATING_WEIGHTS = [3, 4, 12, 36, 45]
+VIN_CHARS = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+HISTORY_DAYS = 540
+FUTURE_DAYS = 30
+
+
+class Command(BaseCommand):
+    help = 'Populate the database with a production-sized synthetic data set for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, required=True)
+        parser.add_argument('--bookings', type=int, required=True)
+        parser.add_argument('--staff', type=int, help='Staff members to create (default: one per 200 customers, at least 2).')
+        parser.add_argument('--seed', type=int, help='Random seed, for a reproducible distribution.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['customers'] < 1 or options['bookings'] < 0:
+            raise CommandError('--customers must be at least 1 and --bookings not negative.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Unique per run, so the command can be repeated against the same database
+        self.tag = uuid.uuid4().hex[:6]
+        self.password = make_password('password')
+        staff_count = options['staff'] or max(2, options['customers'] // 200)
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            services = self.seed_services()
+            staff = self.seed_users(staff_count, User.ROLE_STAFF)
+            customers = self.seed_users(options['customers'], User.ROLE_CUSTOMER)
+            vehicles = self.seed_vehicles(customers)
+            bookings = self.seed_bookings(options['bookings'], vehicles, services, staff)
+            feedback = self.seed_feedback(bookings)
+            logs = self.seed_logs(bookings)
+
+        # bulk_create bypasses the rollup, availability, fragment and search
+        # signals, so rebuild the touched months, drop any cached availability
+        # and fragments and index the new rows
+        months = sorted({month_of(b.created_at) for b in bookings if b.status == Booking.STATUS_COMPLETED})
+        for month in months:
+            generate_monthly_reports(month)
+        invalidate_all()
+        invalidate_fragments()
+        for kind, rows in [(SearchDocument.KIND_CUSTOMER, customers), (SearchDocument.KIND_VEHICLE, vehicles),
+                           (SearchDocument.KIND_BOOKING, bookings), (SearchDocument.KIND_FEEDBACK, feedback)]:
+            index_objects(kind, [row.pk for row in rows], self.batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded run {self.tag}: {len(staff)} staff, {len(customers)} customers, {len(vehicles)} vehicles, '
+            f'{len(bookings)} bookings, {len(feedback)} feedback, {logs} logs and {len(months)} monthly reports '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def seed_services(self):
+        existing = {s.name: s for s in Service.objects.all()}
+        missing = [
+            Service(name=name, price=Decimal(price), duration=timedelta(minutes=minutes),
+                    description=f'{name} performed by a certified technician.')
+            for name, price, minutes in SERVICES if name not in existing
+        ]
+        Service.objects.bulk_create(missing)
+        if missing:
+            invalidate_catalog()
+        by_name = {**existing, **{s.name: s for s in missing}}
+        return [by_name[name] for name, _price, _minutes in SERVICES]
+
+    def seed_users(self, count, role):
+        prefix = role.lower()
+        now = timezone.now()
+        users = []
+        for i in range(count):
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            users.append(User(
+                email=f'{prefix}-{self.tag}-{i}@seed.example.com',
+                username=f'{prefix}-{self.tag}-{i}',
+                first_name=first,
+                last_name=last,
+                role=role,
+                password=self.password,
+                phone_number=f'+1555{self.rng.randrange(10 ** 7):07d}',
+                date_joined=now - timedelta(days=self.rng.randrange(HISTORY_DAYS)),
+            ))
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def seed_vehicles(self, customers):
+        vehicles = []
+        for customer in customers:
+            for _ in range(self.rng.choice(VEHICLES_PER_CUSTOMER)):
+                make = self.rng.choice(list(MAKES))
+                n = len(vehicles)
+                vehicles.append(Vehicle(
+                    owner=customer,
+                    make=make,
+                    model=self.rng.choice(MAKES[make]),
+                    year=self.rng.randint(2005, timezone.now().year),
+                    license_plate=f'{self.tag}-{n}'.upper(),
+                    vin=(self.tag.upper() + ''.join(self.rng.choices(VIN_CHARS, k=5)) + f'{n:06d}')[-17:],
+                ))
+        return Vehicle.objects.bulk_create(vehicles, batch_size=self.batch_size)
+
+    def seed_bookings(self, count, vehicles, services, staff):
+        now = timezone.now()
+        bookings, created_dates = [], []
+        for _ in range(count):
+            vehicle = self.rng.choice(vehicles)
+            scheduled = now + timedelta(minutes=self.rng.randrange(-HISTORY_DAYS * 1440, FUTURE_DAYS * 1440))
+            scheduled = scheduled.replace(minute=self.rng.choice([0, 30]), second=0, microsecond=0)
+            # Bookings are made one to fourteen days ahead of the appointment
+            created_dates.append(min(scheduled - timedelta(days=self.rng.randint(1, 14)), now))
+            if scheduled > now:
+                status = self.rng.choices([Booking.STATUS_PENDING, Booking.STATUS_IN_PROGRESS], [85, 15])[0]
+            else:
+                status = self.rng.choices([Booking.STATUS_COMPLETED, Booking.STATUS_CANCELLED], [90, 10])[0]
+            assigned = self.rng.choice(staff) if status != Booking.STATUS_PENDING or self.rng.random() < 0.5 else None
+            bookings.append(Booking(
+                customer_id=vehicle.owner_id,
+                vehicle=vehicle,
+                service=self.rng.choices(services, SERVICE_WEIGHTS)[0],
+                scheduled_date=scheduled,
+                status=status,
+                assigned_staff=assigned,
+                notes='Customer will wait on site.' if self.rng.random() < 0.2 else None,
+            ))
+        bookings = Booking.objects.bulk_create(bookings, batch_size=self.batch_size)
+        # created_at is auto_now_add, so it is backdated in a second pass
+        for booking, created in zip(bookings, created_dates):
+            booking.created_at = created
+        return bookings
+
+    def seed_feedback(self, bookings):
+        rated = [b for b in bookings if b.status == Booking.STATUS_COMPLETED and self.rng.random() < 0.6]
+        feedback = Feedback.objects.bulk_create([
+            Feedback(booking=b, rating=self.rng.choices(RATINGS, RATING_WEIGHTS)[0],
+                     comments=self.rng.choice([None, 'Great service.', 'Quick turnaround.', 'Took longer than quoted.']))
+            for b in rated
+        ], batch_size=self.batch_size)
+        for booking in rated:
+            booking.feedback_submitted = True
+        Booking.objects.bulk_update(bookings, ['created_at', 'feedback_submitted'], batch_size=self.batch_size)
+        return feedback
+
+    def seed_logs(self, bookings):
+        logs = CommunicationLog.objects.bulk_create([
+            CommunicationLog(
+                recipient_id=b.customer_id,
+                booking=b,
+                message_type='EMAIL',
+                subject='Your iCars Booking Confirmation',
+                message=f'Your booking for {b.service.name} on {b.scheduled_date:%Y-%m-%d %H:%M} has been confirmed.',
+                status=self.rng.choices(['SENT', 'FAILED'], [98, 2])[0],
+            )
+            for b in bookings
+        ], batch_size=self.batch_size)
+        for log, booking in zip(logs, bookings):
+            log.sent_at = booking.created_at
+        CommunicationLog.objects.bulk_update(logs, ['sent_at'], batch_size=self.batch_size)
+        return len(logs)
@@ -0,0 +1,158 @@
+# apps/monitoring/middleware.py
+"""
+Per-request SQL and timing instrumentation.
+
+RequestMetricsMiddleware wraps every database connection with an
+execute_wrapper for the duration of a request and records the query count,
+total database time, repeated query fingerprints and template render time.
+The totals are sent back as a Server-Timing header and logged as one line
+per request, keyed by view name. Requests that run more queries than
+REQUEST_METRICS_QUERY_BUDGET are logged as warnings.
+
+It is opt-in: the middleware removes itself unless REQUEST_METRICS_ENABLED
+is set.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Placeholder lists such as IN (%s, %s, %s) vary in length with their input
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normalise a parametrised SQL string so repeats of the same query with
+    different parameters compare equal.
+    """
+    return _WHITESPACE_RE.sub(' ', _PLACEHOLDER_LIST_RE.sub('(%s, ...)', sql)).strip()
+
+
+class QueryCollector:
+    """
+    connection.execute_wrapper callable that counts and times queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Number of queries that repeated an earlier fingerprint."""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def most_repeated(self):
+        """(fingerprint, count) of the most repeated query, or None."""
+        if not self.fingerprints:
+            return None
+        sql, n = self.fingerprints.most_common(1)[0]
+        return (sql, n) if n > 1 else None
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = QueryCollector()
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.render = 0.0
+        self._render_started = None
+
+    def start_render(self):
+        self._render_started = time.perf_counter()
+
+    def end_render(self):
+        if self._render_started is not None:
+            self.render += time.perf_counter() - self._render_started
+            self._render_started = None
+
+    def server_timing(self, budget):
+        entries = [
+            f'db;dur={self.queries.duration * 1000:.1f};desc="{self.queries.count} queries"',
+            f'dupes;desc="{self.queries.duplicates} duplicate queries"',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ]
+        if self.over_budget(budget):
+            entries.append(f'budget;desc="exceeded {budget} queries"')
+        return ', '.join(entries)
+
+    def over_budget(self, budget):
+        return budget is not None and self.queries.count > budget
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time, duplicate queries and template render time
+    for each request. List it first in MIDDLEWARE so the totals include the
+    session and auth lookups of the other middleware.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.budget = getattr(settings, 'REQUEST_METRICS_QUERY_BUDGET', None)
+
+    def __call__(self, request):
+        metrics = request._request_metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.queries))
+            response = self.get_response(request)
+        metrics.total = time.perf_counter() - metrics.started
+
+        response['Server-Timing'] = metrics.server_timing(self.budget)
+        self.log(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # Template response middleware runs innermost-first and this one is
+        # listed first, so rendering starts right after this hook returns.
+        metrics = getattr(request, '_request_metrics', None)
+        if metrics is not None:
+            metrics.start_render()
+            response.add_post_render_callback(lambda rendered: metrics.end_render())
+        return response
+
+    def log(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else request.path
+        fields = {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': metrics.queries.count,
+            'duplicate_queries': metrics.queries.duplicates,
+            'db_ms': round(metrics.queries.duration * 1000, 1),
+            'render_ms': round(metrics.render * 1000, 1),
+            'total_ms': round(metrics.total * 1000, 1),
+            'over_budget': metrics.over_budget(self.budget),
+        }
+        message = ' '.join(f'{key}={value}' for key, value in fields.items())
+        if fields['over_budget']:
+            repeated = metrics.queries.most_repeated()
+            if repeated:
+                message += f' most_repeated={repeated[1]}x "{repeated[0][:200]}"'
+            logger.warning(message, extra={'request_metrics': fields})
+        else:
+            logger.info(message, extra={'request_metrics': fields})
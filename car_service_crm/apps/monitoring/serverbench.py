@@ -0,0 +1,210 @@
+# apps/monitoring/serverbench.py
+"""
+Tail latency of the dashboards served over WSGI and over ASGI.
+
+Each server is started as a subprocess on a free local port against the
+current database, then every dashboard is hit by `concurrency` threads over
+keep-alive connections until `requests` responses have come back. ASGI
+servers (uvicorn, daphne) run the async dashboard views on their event
+loop; a WSGI server (gunicorn) runs the same views through async_to_sync,
+one request per worker thread, which is how they were served before.
+"""
+import http.client
+import importlib.util
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from apps.users.models import User
+from .benchmark import benchmark_users, percentile
+
+HOST = '127.0.0.1'
+# server -> (interface, module run with `python -m`, arguments)
+SERVERS = {
+    'gunicorn': ('wsgi', 'gunicorn', [
+        'car_service_crm.wsgi:application', '--bind', '{host}:{port}',
+        '--workers', '{workers}', '--threads', '{threads}', '--log-level', 'warning',
+    ]),
+    'uvicorn': ('asgi', 'uvicorn', [
+        'car_service_crm.asgi:application', '--host', '{host}', '--port', '{port}',
+        '--workers', '{workers}', '--no-access-log', '--log-level', 'warning',
+    ]),
+    'daphne': ('asgi', 'daphne', ['-b', '{host}', '-p', '{port}', 'car_service_crm.asgi:application']),
+}
+# The async dashboards and the role each is requested as
+DASHBOARDS = {
+    'staff:admin_dashboard': User.ROLE_ADMIN,
+    'staff:analytics_dashboard': User.ROLE_ADMIN,
+    'staff:staff_dashboard': User.ROLE_STAFF,
+    'customers:customers_dashboard': User.ROLE_CUSTOMER,
+}
+STARTUP_TIMEOUT = 30
+
+
+class ServerUnavailable(Exception):
+    pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    """
+    Context manager that runs one of SERVERS on a free port until exit.
+    """
+
+    def __init__(self, name, workers=1, threads=8):
+        if name not in SERVERS:
+            raise ServerUnavailable(f'Unknown server "{name}".')
+        self.name = name
+        self.interface, module, arguments = SERVERS[name]
+        if importlib.util.find_spec(module) is None:
+            raise ServerUnavailable(f'{name} is not installed; pip install {name} to benchmark it.')
+        self.port = free_port()
+        values = {'host': HOST, 'port': self.port, 'workers': workers, 'threads': threads}
+        self.command = [sys.executable, '-m', module, *[argument.format(**values) for argument in arguments]]
+        self.process = None
+
+    def __enter__(self):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        self.process = subprocess.Popen(self.command, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise ServerUnavailable(f'{self.name} exited with status {self.process.returncode}.')
+            try:
+                socket.create_connection((HOST, self.port), timeout=0.5).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise ServerUnavailable(f'{self.name} did not start listening within {STARTUP_TIMEOUT}s.')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def session_cookies(users):
+    """
+    A Cookie header per role, from a session logged in as that role's user.
+    """
+    cookies = {}
+    for role, user in users.items():
+        if role == 'anonymous' or user is None:
+            continue
+        client = Client()
+        client.force_login(user)
+        cookies[role] = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    return cookies
+
+
+def run_load(port, path, cookie='', requests=500, concurrency=32, host=HOST):
+    """
+    GET `path` `requests` times from `concurrency` threads, each over its
+    own keep-alive connection. Returns a summary() of the latencies.
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers={'Cookie': cookie, 'Host': 'localhost'})
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    status = None
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    if status != 200:
+                        errors.append(status)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(min(concurrency, requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summary(latencies, len(errors), time.perf_counter() - started)
+
+
+def summary(latencies, errors, elapsed):
+    return {
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'errors': errors,
+    }
+
+
+def compare_servers(servers, requests=500, concurrency=32, warmup=20, workers=1, threads=8, stdout=None):
+    """
+    Benchmark every dashboard on each server in turn. Returns a report of
+    {'meta': ..., 'results': {server: {url name: summary}}}.
+    """
+    users = benchmark_users()
+    cookies = session_cookies(users)
+    urls = {name: role for name, role in DASHBOARDS.items() if role in cookies}
+    # The servers open their own connections; do not hold SQLite's lock meanwhile
+    connections.close_all()
+    results = {}
+    for name in servers:
+        results[name] = {}
+        with ServerProcess(name, workers=workers, threads=threads) as server:
+            for url_name, role in urls.items():
+                path = reverse(url_name)
+                if warmup:
+                    run_load(server.port, path, cookies[role], warmup, min(concurrency, warmup))
+                results[name][url_name] = result = run_load(server.port, path, cookies[role], requests, concurrency)
+                if stdout:
+                    stdout.write(
+                        f"{name:9} {server.interface:4} {url_name:32} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+                        f"{result['p99_ms']:8.2f} ms {result['rps']:8.1f} req/s {result['errors']:4d} errors"
+                    )
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'requests_per_url': requests,
+            'concurrency': concurrency,
+            'workers': workers,
+            'threads': threads,
+        },
+        'results': results,
+    }
@@ -0,0 +1,186 @@
+# apps/monitoring/tests.py
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.analytics.rollups import reconcile_month
+from apps.bookings.models import Booking, Feedback
+from apps.bookings.tests import create_listing_bookings
+from apps.communication.models import CommunicationLog
+from apps.customers.models import Vehicle
+from apps.users.models import User
+from .benchmark import percentile, save
+from .middleware import QueryCollector, fingerprint
+from .serverbench import ServerProcess, ServerUnavailable, run_load
+
+
+class FingerprintTests(SimpleTestCase):
+
+    def test_collapses_whitespace_and_placeholder_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT *\n  FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+        self.assertNotEqual(fingerprint('SELECT a FROM t'), fingerprint('SELECT b FROM t'))
+
+
+class QueryCollectorTests(TestCase):
+
+    def test_counts_duplicates(self):
+        customer = User.objects.create_user(email='customer@example.com', username='customer')
+        create_listing_bookings(customer, None, 3)
+        collector = QueryCollector()
+        with connection.execute_wrapper(collector):
+            for booking in Booking.objects.all():
+                booking.service.name
+        self.assertEqual(collector.count, 4)
+        self.assertEqual(collector.duplicates, 2)
+        self.assertIn('services_service', collector.most_repeated()[0])
+        self.assertGreater(collector.duration, 0)
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        create_listing_bookings(cls.customer, None, 3)
+
+    def setUp(self):
+        # Rendered fragments would otherwise be served without their queries
+        cache.clear()
+        self.client.force_login(self.customer)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('bookings:booking_list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_QUERY_BUDGET=10)
+    def test_server_timing_and_log(self):
+        with self.assertLogs('apps.monitoring.middleware', 'INFO') as logs:
+            response = self.client.get(reverse('bookings:booking_list'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="4 queries"', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertNotIn('budget', timing)
+
+        record = logs.records[0]
+        self.assertEqual(record.levelname, 'INFO')
+        self.assertEqual(record.request_metrics['view'], 'bookings:booking_list')
+        self.assertEqual(record.request_metrics['queries'], 4)
+        self.assertEqual(record.request_metrics['status'], 200)
+        self.assertGreater(record.request_metrics['render_ms'], 0)
+
+    @override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_QUERY_BUDGET=2)
+    def test_flags_requests_over_budget(self):
+        with self.assertLogs('apps.monitoring.middleware', 'WARNING') as logs:
+            response = self.client.get(reverse('bookings:booking_list'))
+        self.assertIn('budget;desc="exceeded 2 queries"', response['Server-Timing'])
+        self.assertTrue(logs.records[0].request_metrics['over_budget'])
+
+
+class SeedAndBenchmarkTests(TestCase):
+
+    def test_seed_scale(self):
+        out = StringIO()
+        call_command('seed_scale', customers=20, bookings=200, staff=3, seed=1, stdout=out)
+        self.assertEqual(User.objects.filter(role=User.ROLE_CUSTOMER).count(), 20)
+        self.assertEqual(User.objects.filter(role=User.ROLE_STAFF).count(), 3)
+        self.assertEqual(Booking.objects.count(), 200)
+        self.assertGreaterEqual(Vehicle.objects.count(), 20)
+        self.assertEqual(CommunicationLog.objects.count(), 200)
+        self.assertEqual(
+            Feedback.objects.count(), Booking.objects.filter(feedback_submitted=True).count(),
+        )
+        self.assertFalse(Feedback.objects.exclude(booking__status=Booking.STATUS_COMPLETED).exists())
+        self.assertFalse(Booking.objects.filter(created_at__gt=F('scheduled_date')).exists())
+        self.assertEqual(reconcile_month(Booking.objects.filter(
+            status=Booking.STATUS_COMPLETED).latest('created_at').created_at), [])
+
+        # A second run must not collide with the first
+        call_command('seed_scale', customers=5, bookings=10, stdout=out)
+        self.assertEqual(User.objects.filter(role=User.ROLE_CUSTOMER).count(), 25)
+
+    def test_benchmark_saves_and_compares_baseline(self):
+        call_command('seed_scale', customers=10, bookings=60, staff=2, seed=2, stdout=StringIO())
+        User.objects.create_user(email='admin@example.com', username='admin', role=User.ROLE_ADMIN)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command('benchmark', requests=3, warmup=1, save=path, stdout=StringIO())
+            with open(path) as f:
+                report = json.load(f)
+            results = report['results']
+            for name in ('bookings:booking_list', 'bookings:booking_detail', 'staff:booking_management',
+                         'staff:staff_booking_list', 'customers:customers_dashboard', 'users:login'):
+                with self.subTest(url=name):
+                    self.assertIn(name, results)
+                    self.assertLessEqual(results[name]['p50_ms'], results[name]['p99_ms'])
+                    self.assertGreater(results[name]['rss_kb'], 0)
+            self.assertEqual(results['staff:booking_management']['role'], User.ROLE_ADMIN)
+            self.assertIn('users:home', report['skipped'])
+
+            report['results']['bookings:booking_list']['queries'] -= 1
+            save(report, path)
+            out = StringIO()
+            with self.assertRaises(CommandError):
+                call_command('benchmark', requests=2, warmup=0, only=['bookings:booking_list'],
+                             compare=path, fail_on_regression=True, stdout=out)
+            self.assertIn('regression bookings:booking_list: queries', out.getvalue())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200 if self.path == '/ok' else 500)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServerBenchmarkTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StatusHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def test_run_load_sends_every_request_over_keep_alive_connections(self):
+        result = run_load(self.server.server_port, '/ok', requests=40, concurrency=4)
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['rps'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_run_load_counts_non_200_responses_as_errors(self):
+        result = run_load(self.server.server_port, '/fail', requests=10, concurrency=3)
+        self.assertEqual(result['errors'], 10)
+
+    def test_unknown_server_is_rejected(self):
+        with self.assertRaises(ServerUnavailable):
+            ServerProcess('mod_wsgi')
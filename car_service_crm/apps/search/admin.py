@@ -0,0 +1,19 @@
+# apps/search/admin.py
+from .query import matching_ids
+
+
+class IndexedSearchAdminMixin:
+    """
+    Answer a ModelAdmin's changelist search from the search index instead
+    of LIKE '%term%' over search_fields. Set `search_kind` to the model's
+    SearchDocument kind; search_fields must still be non-empty for Django to
+    show the search box, and are used for searches the index cannot answer,
+    such as an id or a two-letter make.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        object_ids = matching_ids(search_term, self.search_kind)
+        if object_ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=object_ids), False
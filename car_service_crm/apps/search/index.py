@@ -0,0 +1,147 @@
+# apps/search/index.py
+"""
+What each searchable row contributes to the search index, and how the
+index is written.
+
+A document is built from one values_list() row, so indexing a chunk of
+objects costs one SELECT and one upsert whatever its size. Documents also
+carry text from related rows (a booking can be found by its customer's name
+or its vehicle's plate); the signals in signals.py reindex those dependants
+when the related row changes. Service names are the exception: renaming a
+service would touch every booking it was ever used for, so run
+`manage.py rebuild_search_index` afterwards instead.
+"""
+import re
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.bookings.models import Booking, Feedback
+from apps.customers.models import Vehicle
+from apps.users.models import User
+from .models import SearchDocument
+
+CHUNK_SIZE = 1000
+TITLE_LENGTH = SearchDocument._meta.get_field('title').max_length
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def _compact(value):
+    # "AB12 CDE" and "555-0101" are also findable typed as "AB12CDE" and "5550101"
+    return re.sub(r'[\W_]+', '', value or '')
+
+
+def _customer_documents(pks):
+    rows = User.objects.filter(pk__in=pks, role=User.ROLE_CUSTOMER).values_list(
+        'pk', 'first_name', 'last_name', 'email', 'username', 'phone_number',
+    )
+    for pk, first_name, last_name, email, username, phone in rows:
+        name = _join(first_name, last_name)
+        yield pk, name or email, _join(name, email, username, phone, _compact(phone))
+
+
+def _vehicle_documents(pks):
+    rows = Vehicle.objects.filter(pk__in=pks).values_list(
+        'pk', 'make', 'model', 'year', 'license_plate', 'vin',
+        'owner__first_name', 'owner__last_name', 'owner__email',
+    )
+    for pk, make, model, year, plate, vin, first_name, last_name, email in rows:
+        title = f'{make} {model} ({plate})'
+        yield pk, title, _join(title, _compact(plate), vin, year, first_name, last_name, email)
+
+
+def _booking_documents(pks):
+    rows = Booking.objects.filter(pk__in=pks).values_list(
+        'pk', 'scheduled_date', 'service__name', 'vehicle__make', 'vehicle__model', 'vehicle__license_plate',
+        'customer__first_name', 'customer__last_name', 'customer__email', 'notes',
+    )
+    for pk, scheduled, service, make, model, plate, first_name, last_name, email, notes in rows:
+        title = f'{service} for {make} {model} ({plate}) on {timezone.localtime(scheduled):%Y-%m-%d %H:%M}'
+        yield pk, title, _join(title, _compact(plate), first_name, last_name, email, notes)
+
+
+def _feedback_documents(pks):
+    rows = Feedback.objects.filter(pk__in=pks).values_list(
+        'pk', 'booking_id', 'booking__service__name', 'booking__vehicle__license_plate',
+        'booking__customer__first_name', 'booking__customer__last_name', 'booking__customer__email', 'comments',
+    )
+    for pk, booking_id, service, plate, first_name, last_name, email, comments in rows:
+        title = f'Feedback for Booking #{booking_id} ({service})'
+        yield pk, title, _join(title, plate, _compact(plate), first_name, last_name, email, comments)
+
+
+# kind -> (indexed rows, document builder); a builder yields (pk, title, text)
+# for the given pks that belong in the index and skips the rest
+DOCUMENT_TYPES = {
+    SearchDocument.KIND_CUSTOMER: (lambda: User.objects.filter(role=User.ROLE_CUSTOMER), _customer_documents),
+    SearchDocument.KIND_VEHICLE: (lambda: Vehicle.objects.all(), _vehicle_documents),
+    SearchDocument.KIND_BOOKING: (lambda: Booking.objects.all(), _booking_documents),
+    SearchDocument.KIND_FEEDBACK: (lambda: Feedback.objects.all(), _feedback_documents),
+}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def index_objects(kind, pks, chunk_size=CHUNK_SIZE):
+    """
+    Bring the documents of `kind` for `pks` up to date: rows that exist and
+    qualify are (re)written, the others dropped from the index. Returns the
+    number of documents written.
+    """
+    build = DOCUMENT_TYPES[kind][1]
+    written = 0
+    for chunk in _chunks(pks, chunk_size):
+        documents = [
+            SearchDocument(kind=kind, object_id=pk, title=title[:TITLE_LENGTH], text=text)
+            for pk, title, text in build(chunk)
+        ]
+        # No savepoint of its own: inside a caller's transaction the index
+        # write commits or rolls back with the rows it describes
+        with transaction.atomic(savepoint=False):
+            SearchDocument.objects.bulk_create(
+                documents, update_conflicts=True,
+                unique_fields=['kind', 'object_id'], update_fields=['title', 'text'],
+            )
+            missing = set(chunk) - {document.object_id for document in documents}
+            if missing:
+                SearchDocument.objects.filter(kind=kind, object_id__in=missing).delete()
+        written += len(documents)
+    return written
+
+
+def remove_objects(kind, pks):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(pks)).delete()
+
+
+def rebuild_index(kinds=None, chunk_size=CHUNK_SIZE):
+    """
+    Reindex every row of the given kinds (default: all) and drop documents
+    whose row is gone. The index stays searchable while this runs. Returns
+    {kind: documents written}.
+    """
+    counts = {}
+    for kind in kinds or DOCUMENT_TYPES:
+        indexed = DOCUMENT_TYPES[kind][0]()
+        pks = indexed.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+        counts[kind] = index_objects(kind, pks, chunk_size)
+        SearchDocument.objects.filter(kind=kind).exclude(object_id__in=indexed.values('pk')).delete()
+    optimize_index()
+    return counts
+
+
+def optimize_index():
+    """
+    Merge the FTS5 index segments left behind by incremental writes. Only
+    SQLite needs this; PostgreSQL maintains its GIN index itself.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO search_searchdocument_fts(search_searchdocument_fts) VALUES ('optimize')")
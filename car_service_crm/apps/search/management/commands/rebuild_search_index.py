@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.index import CHUNK_SIZE, DOCUMENT_TYPES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Reindex customers, vehicles, bookings and feedback for search, in chunks, while search stays online.'
+
+    def add_arguments(self, parser):
+        # Validated in handle(): argparse before Python 3.12 rejects the empty
+        # default of nargs='*' when choices are given
+        parser.add_argument('kinds', nargs='*', metavar='kind',
+                            help=f"Document kinds to rebuild: {', '.join(DOCUMENT_TYPES)} (default: all).")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        unknown = [kind for kind in options['kinds'] if kind not in DOCUMENT_TYPES]
+        if unknown:
+            raise CommandError(f"Unknown kinds: {', '.join(unknown)}; choices: {', '.join(DOCUMENT_TYPES)}.")
+        started = time.perf_counter()
+        counts = rebuild_index(options['kinds'], options['chunk_size'])
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {summary} in {time.perf_counter() - started:.1f}s.'))
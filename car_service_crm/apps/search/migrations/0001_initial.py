@@ -0,0 +1,85 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+# SQLite: an external-content FTS5 table over search_searchdocument, kept in
+# step by triggers. The trigram tokenizer (SQLite 3.34+) matches any
+# substring of three or more characters, so plate and VIN fragments hit the
+# index as well as whole words.
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE search_searchdocument_fts USING fts5(
+        title, text, content='search_searchdocument', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER search_searchdocument_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER search_searchdocument_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER search_searchdocument_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO search_searchdocument_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+SQLITE_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS search_searchdocument_au',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ai',
+    'DROP TABLE IF EXISTS search_searchdocument_fts',
+]
+# PostgreSQL: a trigram GIN index on UPPER(text), the expression Django's
+# icontains lookup compiles to, so '%fragment%' matches use the index.
+POSTGRESQL_FORWARDS = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX search_doc_text_trgm_idx ON search_searchdocument USING gin (UPPER(text) gin_trgm_ops)',
+]
+POSTGRESQL_BACKWARDS = [
+    'DROP INDEX IF EXISTS search_doc_text_trgm_idx',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('customer', 'Customer'), ('vehicle', 'Vehicle'), ('booking', 'Booking'), ('feedback', 'Feedback')], max_length=20, verbose_name='Kind')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Object ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Title')),
+                ('text', models.TextField(help_text='Everything the row can be found by, title included.', verbose_name='Text')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_doc_kind_object_uniq')],
+            },
+        ),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARDS, 'postgresql': POSTGRESQL_FORWARDS}),
+            _run({'sqlite': SQLITE_BACKWARDS, 'postgresql': POSTGRESQL_BACKWARDS}),
+        ),
+    ]
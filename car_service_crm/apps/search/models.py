@@ -0,0 +1,37 @@
+# apps/search/models.py
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of one customer, vehicle, booking or feedback row.
+    On SQLite an FTS5 table indexes `title` and `text`; on PostgreSQL a
+    trigram index covers `text` (see migrations/0001_initial.py).
+    """
+    KIND_CUSTOMER = 'customer'
+    KIND_VEHICLE = 'vehicle'
+    KIND_BOOKING = 'booking'
+    KIND_FEEDBACK = 'feedback'
+
+    KIND_CHOICES = [
+        (KIND_CUSTOMER, _('Customer')),
+        (KIND_VEHICLE, _('Vehicle')),
+        (KIND_BOOKING, _('Booking')),
+        (KIND_FEEDBACK, _('Feedback')),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name=_('Kind'))
+    object_id = models.PositiveBigIntegerField(verbose_name=_('Object ID'))
+    title = models.CharField(max_length=255, verbose_name=_('Title'))
+    text = models.TextField(verbose_name=_('Text'), help_text=_('Everything the row can be found by, title included.'))
+
+    class Meta:
+        verbose_name = _('Search Document')
+        verbose_name_plural = _('Search Documents')
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_doc_kind_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
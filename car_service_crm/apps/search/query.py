@@ -0,0 +1,121 @@
+# apps/search/query.py
+"""
+Ranked lookups against the search index.
+
+Every term of at least MIN_TERM_LENGTH characters is matched through the
+index: FTS5 trigram MATCH ranked by bm25() on SQLite (title hits weigh
+more than body hits), and trigram-indexed ILIKE ranked by word_similarity()
+on PostgreSQL. Shorter terms only narrow the rows those already found, so a
+query needs at least one indexable term; other backends fall back to
+unindexed icontains scans.
+"""
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import SearchDocument
+
+MIN_TERM_LENGTH = 3
+DEFAULT_LIMIT = 25
+# bm25() weights of the FTS5 title and text columns
+TITLE_WEIGHT = 5.0
+TEXT_WEIGHT = 1.0
+
+SearchResult = namedtuple('SearchResult', ['kind', 'object_id', 'title', 'rank'])
+
+
+def split_terms(query):
+    """
+    Return (indexable terms, short terms) of a free-text query.
+    """
+    terms = list(dict.fromkeys(query.split()))
+    return (
+        [term for term in terms if len(term) >= MIN_TERM_LENGTH],
+        [term for term in terms if len(term) < MIN_TERM_LENGTH],
+    )
+
+
+def _like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _match_expression(terms):
+    # Each term is a quoted FTS5 string, so operators typed by the user are literal text
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _search_sqlite(terms, short_terms, kinds, limit):
+    match = _match_expression(terms)
+    sql = [
+        'SELECT d.kind, d.object_id, d.title, bm25(search_searchdocument_fts, %s, %s) AS score',
+        'FROM search_searchdocument_fts JOIN search_searchdocument d ON d.id = search_searchdocument_fts.rowid',
+        'WHERE search_searchdocument_fts MATCH %s',
+    ]
+    params = [TITLE_WEIGHT, TEXT_WEIGHT, match]
+    for term in short_terms:
+        sql.append("AND d.text LIKE %s ESCAPE '\\'")
+        params.append(_like_pattern(term))
+    if kinds:
+        sql.append(f"AND d.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+    sql.append('ORDER BY score LIMIT %s')
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute('\n'.join(sql), params)
+        return [SearchResult(*row) for row in cursor.fetchall()]
+
+
+def _search_orm(terms, short_terms, kinds, limit):
+    queryset = SearchDocument.objects.all()
+    for term in terms + short_terms:
+        queryset = queryset.filter(text__icontains=term)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if connection.vendor == 'postgresql':
+        queryset = queryset.annotate(
+            rank=RawSQL('word_similarity(%s, "search_searchdocument"."text")', (' '.join(terms),)),
+        ).order_by('-rank', 'pk')
+        fields = ['kind', 'object_id', 'title', 'rank']
+    else:
+        queryset = queryset.order_by('pk')
+        fields = ['kind', 'object_id', 'title', 'pk']
+    return [SearchResult(*row) for row in queryset.values_list(*fields)[:limit]]
+
+
+def search(query, kinds=None, limit=DEFAULT_LIMIT):
+    """
+    Return up to `limit` SearchResults for `query`, best match first,
+    optionally restricted to the given document kinds. A query without a
+    term of MIN_TERM_LENGTH characters matches nothing.
+    """
+    terms, short_terms = split_terms(query)
+    if not terms:
+        return []
+    kinds = list(kinds or [])
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(terms, short_terms, kinds, limit)
+    return _search_orm(terms, short_terms, kinds, limit)
+
+
+def matching_ids(query, kind):
+    """
+    The object ids of every match of one kind, unranked, as a subquery for
+    filtering that model's queryset; None if `query` has no indexable term.
+    """
+    terms, short_terms = split_terms(query)
+    if not terms:
+        return None
+    documents = SearchDocument.objects.filter(kind=kind)
+    if connection.vendor == 'sqlite':
+        documents = documents.filter(pk__in=RawSQL(
+            'SELECT rowid FROM search_searchdocument_fts WHERE search_searchdocument_fts MATCH %s',
+            (_match_expression(terms),),
+        ))
+        # The MATCH covers the indexable terms; short ones narrow as in search()
+        filters = short_terms
+    else:
+        filters = terms + short_terms
+    for term in filters:
+        documents = documents.filter(text__icontains=term)
+    return documents.values('object_id')
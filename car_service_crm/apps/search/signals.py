@@ -0,0 +1,75 @@
+# apps/search/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.bookings.models import Booking, Feedback
+from apps.customers.models import Vehicle
+from apps.users.models import User
+from .index import index_objects, remove_objects
+from .models import SearchDocument
+
+# Written in the same transaction as the row itself, so the index never
+# shows a change that was rolled back.
+
+
+def _pks(queryset):
+    return queryset.values_list('pk', flat=True)
+
+
+@receiver(post_save, sender=User)
+def index_customer(sender, instance, created, raw, update_fields=None, **kwargs):
+    # Logging in saves last_login, which is not indexed
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    index_objects(SearchDocument.KIND_CUSTOMER, [instance.pk])
+    if not created:
+        # Vehicles, bookings and feedback are findable by their customer's name and email
+        index_objects(SearchDocument.KIND_VEHICLE, _pks(Vehicle.objects.filter(owner=instance)))
+        index_objects(SearchDocument.KIND_BOOKING, _pks(Booking.objects.filter(customer=instance)))
+        index_objects(SearchDocument.KIND_FEEDBACK, _pks(Feedback.objects.filter(booking__customer=instance)))
+
+
+@receiver(post_save, sender=Vehicle)
+def index_vehicle(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    index_objects(SearchDocument.KIND_VEHICLE, [instance.pk])
+    if not created:
+        index_objects(SearchDocument.KIND_BOOKING, _pks(Booking.objects.filter(vehicle=instance)))
+        index_objects(SearchDocument.KIND_FEEDBACK, _pks(Feedback.objects.filter(booking__vehicle=instance)))
+
+
+@receiver(post_save, sender=Booking)
+def index_booking(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    index_objects(SearchDocument.KIND_BOOKING, [instance.pk])
+    if not created:
+        index_objects(SearchDocument.KIND_FEEDBACK, _pks(Feedback.objects.filter(booking=instance)))
+
+
+@receiver(post_save, sender=Feedback)
+def index_feedback(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    index_objects(SearchDocument.KIND_FEEDBACK, [instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def unindex_customer(sender, instance, **kwargs):
+    remove_objects(SearchDocument.KIND_CUSTOMER, [instance.pk])
+
+
+@receiver(post_delete, sender=Vehicle)
+def unindex_vehicle(sender, instance, **kwargs):
+    remove_objects(SearchDocument.KIND_VEHICLE, [instance.pk])
+
+
+@receiver(post_delete, sender=Booking)
+def unindex_booking(sender, instance, **kwargs):
+    remove_objects(SearchDocument.KIND_BOOKING, [instance.pk])
+
+
+@receiver(post_delete, sender=Feedback)
+def unindex_feedback(sender, instance, **kwargs):
+    remove_objects(SearchDocument.KIND_FEEDBACK, [instance.pk])
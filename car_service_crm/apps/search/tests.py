@@ -0,0 +1,146 @@
+# apps/search/tests.py
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.models import Booking, Feedback
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+from .index import index_objects
+from .models import SearchDocument
+from .query import search
+
+
+def found(query, **kwargs):
+    return [(result.kind, result.object_id) for result in search(query, **kwargs)]
+
+
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        service = Service.objects.create(name='Coolant Flush', price=49, duration=timedelta(minutes=30))
+        cls.jordan = User.objects.create_user(
+            email='jordan@example.com', username='jordan', first_name='Jordan', last_name='Smith',
+            phone_number='+1 555-0101', role=User.ROLE_CUSTOMER,
+        )
+        cls.quinn = User.objects.create_user(
+            email='quinn@example.com', username='quinn', first_name='Quinn', last_name='Jones',
+            role=User.ROLE_CUSTOMER,
+        )
+        cls.staff = User.objects.create_user(
+            email='tech@example.com', username='tech', first_name='Tess', last_name='Smithers',
+            role=User.ROLE_STAFF,
+        )
+        cls.focus = Vehicle.objects.create(
+            owner=cls.jordan, make='Ford', model='Focus', year=2018, license_plate='AB12 CDE', vin='1FAHP3F20CL123456',
+        )
+        civic = Vehicle.objects.create(
+            owner=cls.quinn, make='Honda', model='Civic', year=2020, license_plate='XY99 ZZZ', vin='2HGFC2F59LH000001',
+        )
+        moment = timezone.now() + timedelta(days=2)
+        cls.booking = Booking.objects.create(
+            customer=cls.jordan, vehicle=cls.focus, service=service, scheduled_date=moment,
+            notes='Rattle from the rear axle', status=Booking.STATUS_COMPLETED,
+        )
+        cls.referral = Booking.objects.create(
+            customer=cls.quinn, vehicle=civic, service=service, scheduled_date=moment, notes='Referred by Mr Smith',
+        )
+        cls.feedback = Feedback.objects.create(booking=cls.booking, rating=5, comments='Friendly front desk')
+
+    def test_finds_fragments_names_and_free_text(self):
+        self.assertIn(('vehicle', self.focus.pk), found('B12C'))
+        self.assertIn(('vehicle', self.focus.pk), found('ab12 cde'))
+        self.assertIn(('vehicle', self.focus.pk), found('P3F20'))
+        self.assertIn(('customer', self.jordan.pk), found('5550101'))
+        self.assertEqual(found('axle'), [('booking', self.booking.pk)])
+        self.assertEqual(found('friendly'), [('feedback', self.feedback.pk)])
+        self.assertEqual(found('"OR" NEAR('), [])
+
+    def test_title_matches_rank_first(self):
+        results = found('smith')
+        self.assertEqual(results[0], ('customer', self.jordan.pk))
+        self.assertIn(('booking', self.referral.pk), results)
+        # Staff accounts are not indexed
+        self.assertNotIn(('customer', self.staff.pk), results)
+
+    def test_kind_filter_and_short_terms(self):
+        self.assertEqual(
+            set(found('smith', kinds=['booking'])), {('booking', self.booking.pk), ('booking', self.referral.pk)},
+        )
+        # Short terms only narrow what the indexed terms found
+        self.assertEqual(found('smith Mr', kinds=['booking']), [('booking', self.referral.pk)])
+        self.assertEqual(found('Mr'), [])
+
+    def test_index_follows_changes(self):
+        Booking.objects.filter(pk=self.booking.pk).update(notes='Squeaky brakes')
+        self.assertEqual(found('squeaky'), [])
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.save()
+        self.assertEqual(found('squeaky'), [('booking', self.booking.pk)])
+
+        self.jordan.last_name = 'Okafor'
+        self.jordan.save()
+        self.assertEqual(
+            set(found('okafor')),
+            {('customer', self.jordan.pk), ('vehicle', self.focus.pk), ('booking', self.booking.pk),
+             ('feedback', self.feedback.pk)},
+        )
+
+        self.focus.delete()
+        self.assertEqual(found('okafor'), [('customer', self.jordan.pk)])
+        self.assertFalse(SearchDocument.objects.filter(kind='feedback').exists())
+
+    def test_role_change_drops_customer(self):
+        self.quinn.role = User.ROLE_STAFF
+        self.quinn.save()
+        self.assertNotIn(('customer', self.quinn.pk), found('quinn'))
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(kind='booking', object_id=self.referral.pk + 100, title='Gone', text='Gone')
+        out = StringIO()
+        call_command('rebuild_search_index', '--chunk-size', '2', stdout=out)
+        self.assertIn('Indexed 2 customer, 2 vehicle, 2 booking, 1 feedback', out.getvalue())
+        self.assertEqual(found('axle'), [('booking', self.booking.pk)])
+        self.assertEqual(found('gone'), [])
+        with self.assertRaisesMessage(CommandError, 'Unknown kinds: invoice'):
+            call_command('rebuild_search_index', 'invoice', stdout=out)
+
+    def test_admin_changelist_search(self):
+        admin = User.objects.create_superuser(
+            email='root@example.com', username='root', password='pass', role=User.ROLE_ADMIN,
+        )
+        self.client.force_login(admin)
+
+        def changelist(model, query):
+            response = self.client.get(reverse(f'admin:{model}_changelist'), {'q': query})
+            return set(response.context['cl'].result_list)
+
+        self.assertEqual(changelist('customers_vehicle', 'focus'), {self.focus})
+        self.assertEqual(changelist('bookings_booking', 'coolant'), {self.booking, self.referral})
+        self.assertEqual(changelist('bookings_booking', 'smith Mr'), {self.referral})
+        # Nothing long enough for the index; answered from search_fields
+        self.assertEqual(changelist('customers_vehicle', 'AB'), {self.focus})
+
+    def test_index_objects_drops_missing_rows(self):
+        self.assertEqual(index_objects('booking', [self.booking.pk, self.referral.pk + 100]), 1)
+        self.assertEqual(SearchDocument.objects.filter(kind='booking').count(), 2)
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 query plan')
+    def test_lookup_is_served_by_the_fts_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            search('rear axle')
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {ctx.captured_queries[-1]['sql']}")
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(any('VIRTUAL TABLE INDEX' in line for line in plan), plan)
+        self.assertFalse([line for line in plan if line.startswith('SCAN d')], plan)
@@ -0,0 +1,92 @@
+# apps/services/catalog.py
+"""
+Cached Service catalog.
+
+The ordered list of services (id, name, price, duration) is read once and
+kept in the cache under a version number. Saving or deleting a Service bumps
+the version (see signals.py), which orphans the cached list at once, so
+the booking form, the availability endpoint and the service list can serve
+the catalog without touching the Service table. The version is read from the
+shared cache (see CACHES in settings), so a price or name changed in the
+admin reaches every worker at once. Code that writes services with
+bulk_create or update() must call invalidate_catalog() itself.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+
+from .models import Service
+
+CACHE_PREFIX = 'services:catalog'
+VERSION_KEY = f'{CACHE_PREFIX}:version'
+FIELDS = ('pk', 'name', 'price', 'duration')
+
+
+class CatalogService:
+    """
+    One catalog row; reads like a Service in templates.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, pk, name, price, duration):
+        self.pk = pk
+        self.name = name
+        self.price = price
+        self.duration = duration
+
+    @property
+    def id(self):
+        return self.pk
+
+    def as_service(self):
+        """
+        A Service instance built from the cached row, for assigning to a
+        foreign key; its other fields load on access.
+        """
+        return Service.from_db(
+            router.db_for_read(Service), ['id', 'name', 'price', 'duration'],
+            [self.pk, self.name, self.price, self.duration],
+        )
+
+    def __str__(self):
+        return self.name
+
+
+class ServiceCatalog:
+    def __init__(self, rows):
+        self.services = [CatalogService(*row) for row in rows]
+        self._by_pk = {service.pk: service for service in self.services}
+
+    def __iter__(self):
+        return iter(self.services)
+
+    def __len__(self):
+        return len(self.services)
+
+    def get(self, pk):
+        """
+        The CatalogService with primary key `pk` (an int or a form string), or None.
+        """
+        try:
+            return self._by_pk.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+
+def _timeout():
+    return getattr(settings, 'SERVICE_CATALOG_CACHE_TTL', 3600)
+
+
+def get_catalog():
+    version = cache.get(VERSION_KEY, 0)
+    key = f'{CACHE_PREFIX}:{version}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(Service.objects.order_by('name', 'pk').values_list(*FIELDS))
+        cache.set(key, rows, timeout=_timeout())
+    return ServiceCatalog(rows)
+
+
+def invalidate_catalog():
+    if not cache.add(VERSION_KEY, 1, timeout=None):
+        cache.incr(VERSION_KEY)
@@ -0,0 +1,40 @@
+# apps/services/forms.py
+from django import forms
+
+from .catalog import get_catalog
+
+
+class ServiceChoiceField(forms.ChoiceField):
+    """
+    A Service picker whose choices and cleaned value come from the cached
+    catalog, so neither rendering nor cleaning it queries the database.
+    Cleans to a Service instance, or None when left empty. ModelForms should
+    keep the model's foreign key validation: the catalog may be cached by a
+    process that has not seen a deletion yet.
+    """
+
+    def __init__(self, *, empty_label='---------', **kwargs):
+        self.empty_label = empty_label
+        super().__init__(choices=self._catalog_choices, **kwargs)
+
+    def _catalog_choices(self):
+        return [('', self.empty_label)] + [(str(service.pk), service.name) for service in get_catalog()]
+
+    def prepare_value(self, value):
+        return getattr(value, 'pk', value)
+
+    def valid_value(self, value):
+        return get_catalog().get(value) is not None
+
+    def clean(self, value):
+        value = super().clean(value)
+        if value in self.empty_values:
+            return None
+        return get_catalog().get(value).as_service()
+
+    def has_changed(self, initial, data):
+        if self.disabled:
+            return False
+        initial = self.prepare_value(initial)
+        return str(initial if initial is not None else '') != str(data if data is not None else '')
+
@@ -0,0 +1,25 @@
+# apps/services/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.fragments.cache import invalidate_all as invalidate_fragments
+from .catalog import invalidate_catalog
+from .models import Service
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def bump_catalog_version(sender, **kwargs):
+    # Now, so this connection sees its own change straight away, and again
+    # after commit, so no process keeps a catalog it rebuilt from pre-commit data
+    invalidate_catalog()
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def drop_cached_fragments(sender, **kwargs):
+    # Service names show up in booking and dashboard fragments that have no
+    # services scope; services change rarely, so drop every fragment
+    transaction.on_commit(invalidate_fragments)
@@ -1,3 +1,109 @@
+# apps/services/tests.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.forms import BookingForm
+from apps.customers.models import Vehicle
+from apps.users.models import User
+from .catalog import get_catalog
+from .models import Service
+
+
+class ServiceCatalogTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Start from an empty catalog rather than the services seeded by bookings/0002
+        Service.objects.all().delete()
+        cls.oil = Service.objects.create(name='Oil Change', price=Decimal('49.00'), duration=timedelta(minutes=30))
+        cls.brakes = Service.objects.create(name='Brake Pads', price=Decimal('180.00'), duration=timedelta(hours=2))
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.customer, make='Mazda', model='3', year=2019, license_plate='CAT1', vin='C' * 17,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_catalog_is_ordered_and_cached(self):
+        with self.assertNumQueries(1):
+            catalog = get_catalog()
+        self.assertEqual([service.name for service in catalog], ['Brake Pads', 'Oil Change'])
+        self.assertEqual(catalog.get(str(self.oil.pk)).price, Decimal('49.00'))
+        self.assertIsNone(catalog.get('nope'))
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_catalog()), 2)
+
+    def test_save_and_delete_bump_the_version(self):
+        get_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.oil.price = Decimal('55.00')
+            self.oil.save()
+        self.assertEqual(get_catalog().get(self.oil.pk).price, Decimal('55.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brakes.delete()
+        self.assertEqual([service.name for service in get_catalog()], ['Oil Change'])
+
+    def test_booking_form_reads_services_from_the_catalog(self):
+        get_catalog()
+        day = timezone.localdate() + timedelta(days=7)
+        while day.weekday() > 4:
+            day += timedelta(days=1)
+        data = {
+            'vehicle': self.vehicle.pk,
+            'service': self.brakes.pk,
+            'scheduled_date': timezone.make_aware(datetime.combine(day, time(9))).strftime('%Y-%m-%dT%H:%M'),
+        }
+        with self.assertNumQueries(0):
+            rendered = str(BookingForm(user=self.customer)['service'])
+        self.assertIn('Brake Pads', rendered)
+        form = BookingForm(data, user=self.customer)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(form.is_valid(), form.errors)
+        # Besides the availability check's join from the day's bookings to
+        # their durations, the only services query is the foreign key check
+        self.assertEqual(
+            len([q for q in ctx.captured_queries
+                 if 'services_service' in q['sql'] and 'bookings_booking' not in q['sql']]),
+            1,
+        )
+        self.assertEqual(form.instance.service.duration, timedelta(hours=2))
+        self.assertIn('Select a valid choice', str(BookingForm({**data, 'service': 0}, user=self.customer).errors))
+
+    def test_service_deleted_by_another_process_is_rejected(self):
+        get_catalog()
+        # Another worker's delete: this process's cached catalog is not invalidated
+        with mock.patch('apps.services.signals.invalidate_catalog'):
+            Service.objects.filter(pk=self.brakes.pk).delete()
+        self.assertIsNotNone(get_catalog().get(self.brakes.pk))
+        day = timezone.localdate() + timedelta(days=7)
+        form = BookingForm({
+            'vehicle': self.vehicle.pk,
+            'service': self.brakes.pk,
+            'scheduled_date': timezone.make_aware(datetime.combine(day, time(9))).strftime('%Y-%m-%dT%H:%M'),
+        }, user=self.customer)
+        self.assertFalse(form.is_valid())
+        self.assertIn('service', form.errors)
+
+    def test_unchanged_service_is_not_reported_as_changed(self):
+        booking_form = BookingForm(
+            {'vehicle': self.vehicle.pk, 'service': str(self.oil.pk), 'scheduled_date': ''},
+            initial={'service': self.oil.pk}, user=self.customer,
+        )
+        self.assertNotIn('service', booking_form.changed_data)
 
-# Create your tests here.
+    def test_availability_endpoint_uses_the_catalog(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('bookings:availability'), {'service': self.oil.pk, 'count': 1})
+        self.assertEqual(response.json()['service'], self.oil.pk)
+        self.assertEqual(self.client.get(reverse('bookings:availability'), {'service': 0}).status_code, 400)
@@ -0,0 +1,139 @@
+# apps/staff/forms.py
+from datetime import datetime, time, timedelta
+
+from django import forms
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.analytics.exports import DATASETS
+from apps.bookings.models import Booking
+from apps.search.models import SearchDocument
+from apps.search.query import MIN_TERM_LENGTH, split_terms
+from apps.services.forms import ServiceChoiceField
+from apps.users.models import User
+
+
+class BookingFilterForm(forms.Form):
+    """
+    GET filters for the booking management and staff booking lists.
+    Each filter is backed by a (field, scheduled_date) index on Booking.
+    """
+    status = forms.ChoiceField(
+        choices=[('', _('Any status'))] + Booking.STATUS_CHOICES,
+        required=False,
+        label=_('Status'),
+    )
+    date_from = forms.DateField(
+        required=False,
+        label=_('From'),
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        label=_('To'),
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    assigned_staff = forms.ModelChoiceField(
+        queryset=User.objects.filter(role=User.ROLE_STAFF),
+        required=False,
+        empty_label=_('Any staff'),
+        label=_('Assigned Staff'),
+    )
+    service = ServiceChoiceField(
+        required=False,
+        empty_label=_('Any service'),
+        label=_('Service'),
+    )
+
+    def __init__(self, *args, include_staff=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not include_staff:
+            # Staff members only ever see their own bookings
+            self.fields.pop('assigned_staff')
+        for field in self.fields.values():
+            field.widget.attrs['class'] = 'form-select' if isinstance(field.widget, forms.Select) else 'form-control'
+
+    def filter(self, queryset):
+        """
+        Apply the valid filters to `queryset`; invalid input is ignored.
+        """
+        if not self.is_valid():
+            return queryset
+        data = self.cleaned_data
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('date_from'):
+            queryset = queryset.filter(scheduled_date__gte=timezone.make_aware(datetime.combine(data['date_from'], time.min)))
+        if data.get('date_to'):
+            # Compare against the next midnight so the column is not wrapped in a date cast
+            day_after = timezone.make_aware(datetime.combine(data['date_to'] + timedelta(days=1), time.min))
+            queryset = queryset.filter(scheduled_date__lt=day_after)
+        if data.get('assigned_staff'):
+            queryset = queryset.filter(assigned_staff=data['assigned_staff'])
+        if data.get('service'):
+            queryset = queryset.filter(service=data['service'])
+        return queryset
+
+
+class DataExportForm(forms.Form):
+    """
+    GET parameters of the staff data export; see analytics.exports.
+    """
+    dataset = forms.ChoiceField(choices=[(d.name, d.label) for d in DATASETS.values()], label=_('Data'))
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], label=_('Format'))
+    date_from = forms.DateField(required=False, label=_('From'), widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, label=_('To'), widget=forms.DateInput(attrs={'type': 'date'}))
+    status = forms.ChoiceField(required=False, label=_('Status'))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        statuses = {}
+        for dataset in DATASETS.values():
+            for value, label in dataset.statuses:
+                statuses.setdefault(value, label)
+        self.fields['status'].choices = [('', _('Any status'))] + list(statuses.items())
+        for field in self.fields.values():
+            field.widget.attrs['class'] = 'form-select' if isinstance(field.widget, forms.Select) else 'form-control'
+
+    def clean(self):
+        data = super().clean()
+        dataset = DATASETS.get(data.get('dataset'))
+        if dataset is None:
+            return data
+        data['dataset'] = dataset
+        if data.get('status') and data['status'] not in dict(dataset.statuses):
+            self.add_error('status', _('%(dataset)s cannot be filtered by status "%(status)s".') % {
+                'dataset': dataset.label, 'status': data['status'],
+            })
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            self.add_error('date_to', _('The end date is before the start date.'))
+        return data
+
+    def filters(self):
+        return {name: self.cleaned_data.get(name) for name in ('date_from', 'date_to', 'status')}
+
+
+class SearchForm(forms.Form):
+    """
+    GET parameters of the staff search page; see apps.search.query.
+    """
+    q = forms.CharField(max_length=200, label=_('Search'),
+                        widget=forms.TextInput(attrs={'placeholder': _('Plate, VIN, name, phone or notes')}))
+    kind = forms.ChoiceField(
+        choices=[('', _('Everything'))] + SearchDocument.KIND_CHOICES,
+        required=False,
+        label=_('In'),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs['class'] = 'form-select' if isinstance(field.widget, forms.Select) else 'form-control'
+
+    def clean_q(self):
+        q = self.cleaned_data['q']
+        if not split_terms(q)[0]:
+            raise forms.ValidationError(
+                _('Enter at least one word of %(count)d or more characters.') % {'count': MIN_TERM_LENGTH}
+            )
+        return q
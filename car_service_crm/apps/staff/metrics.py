@@ -0,0 +1,96 @@
+# apps/staff/metrics.py
+"""
+Admin dashboard metrics.
+
+The headline counts come from one SELECT: role counts are conditional
+aggregates over User, and the vehicle, pending-booking and service counts ride
+along as scalar subqueries. Together with the recent bookings they are cached
+for ADMIN_DASHBOARD_CACHE_TTL seconds and dropped whenever one of the counted
+models changes (see signals.py).
+
+Once an entry goes stale, a single request takes a short lock and recomputes
+it. Concurrent requests keep serving the stale copy meanwhile, so an
+expiring entry does not send every open dashboard to the database at once.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Func, Max, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.bookings.models import Booking
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+
+CACHE_KEY = 'staff:admin_dashboard_metrics'
+LOCK_KEY = f'{CACHE_KEY}:lock'
+RECENT_BOOKINGS = 5
+# How long a cold-cache request waits for another request's recompute
+LOCK_WAIT_SECONDS = 1.0
+LOCK_POLL_SECONDS = 0.05
+
+
+def _ttl():
+    return getattr(settings, 'ADMIN_DASHBOARD_CACHE_TTL', 30)
+
+
+def _scalar_count(queryset):
+    # Max() of a constant subquery is that constant; it only makes the
+    # subquery acceptable to aggregate() so it shares the User SELECT.
+    return Coalesce(Max(Subquery(queryset.order_by().values(n=Func('pk', function='COUNT')))), 0)
+
+
+def recent_bookings_queryset():
+    return Booking.objects.for_listing().order_by('-created_at')[:RECENT_BOOKINGS]
+
+
+def compute_metrics():
+    """
+    Query the dashboard metrics: a dict of counts plus 'recent_bookings'.
+    """
+    metrics = User.objects.aggregate(
+        total_customers=Count('pk', filter=Q(role=User.ROLE_CUSTOMER)),
+        total_staff=Count('pk', filter=Q(role=User.ROLE_STAFF)),
+        total_vehicles=_scalar_count(Vehicle.objects.all()),
+        pending_bookings=_scalar_count(Booking.objects.filter(status=Booking.STATUS_PENDING)),
+        total_services=_scalar_count(Service.objects.all()),
+    )
+    metrics['recent_bookings'] = list(recent_bookings_queryset())
+    return metrics
+
+
+def get_metrics():
+    """
+    Return the cached dashboard metrics, recomputing them at most once per
+    TTL across concurrent requests.
+    """
+    ttl = _ttl()
+    entry = cache.get(CACHE_KEY)
+    if entry is not None and entry['expires_at'] > time.time():
+        return entry['metrics']
+
+    if not cache.add(LOCK_KEY, True, timeout=max(ttl, 5)):
+        if entry is not None:
+            return entry['metrics']
+        # Cold cache and another request is already computing: wait for it
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            entry = cache.get(CACHE_KEY)
+            if entry is not None:
+                return entry['metrics']
+        return compute_metrics()
+
+    try:
+        metrics = compute_metrics()
+        # Kept past its TTL so it can be served while the next recompute runs
+        cache.set(CACHE_KEY, {'metrics': metrics, 'expires_at': time.time() + ttl}, timeout=ttl * 10)
+    finally:
+        cache.delete(LOCK_KEY)
+    return metrics
+
+
+def invalidate_metrics():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,26 @@
+# apps/staff/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.bookings.models import Booking
+from apps.customers.models import Vehicle
+from apps.services.models import Service
+from apps.users.models import User
+from .metrics import invalidate_metrics
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_dashboard_metrics(sender, update_fields=None, **kwargs):
+    # Logging in saves last_login, which no metric depends on
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # After commit, so a concurrent recompute cannot cache pre-commit data
+    transaction.on_commit(invalidate_metrics)
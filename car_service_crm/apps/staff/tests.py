@@ -1,3 +1,496 @@
-from django.test import TestCase
+# apps/staff/tests.py
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.analytics.models import StaffPerformance
+from apps.analytics.reports import completed_bookings_for_month
+from apps.bookings.models import Booking
+from apps.bookings.pagination import after_cursor, keyset_page
+from apps.bookings.tests import create_listing_bookings
+from apps.communication.models import CommunicationLog
+from apps.customers.models import Vehicle
+from apps.customers.tests import full_table_scans
+from apps.services.models import Service
+from apps.users.models import User
+from .forms import BookingFilterForm
+from .metrics import CACHE_KEY, LOCK_KEY, compute_metrics, get_metrics, recent_bookings_queryset
+
+
+class StaffQueryPlanTests(TestCase):
+    """
+    Staff and admin dashboard querysets must be served by an index, not a full scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        service = Service.objects.create(name='Brake Inspection', price=80, duration=timedelta(hours=1))
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        customers = User.objects.bulk_create([
+            User(email=f'customer{i}@example.com', username=f'customer{i}', role=User.ROLE_CUSTOMER)
+            for i in range(20)
+        ])
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(owner=owner, make='Ford', model='Focus', year=2018,
+                    license_plate=f'PLATE{i}', vin=f'{i:017d}')
+            for i, owner in enumerate(customers)
+        ])
+        now = timezone.now()
+        statuses = [choice for choice, _label in Booking.STATUS_CHOICES]
+        bookings = Booking.objects.bulk_create([
+            Booking(customer=vehicle.owner, vehicle=vehicle, service=service,
+                    assigned_staff=cls.staff if i % 2 else None,
+                    scheduled_date=now + timedelta(days=i), status=statuses[i % len(statuses)])
+            for vehicle in vehicles
+            for i in range(10)
+        ])
+        CommunicationLog.objects.bulk_create([
+            CommunicationLog(recipient=booking.customer, booking=booking, message_type='EMAIL',
+                             subject='Booking Confirmation', message='Confirmed')
+            for booking in bookings
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_staff_dashboard_querysets_use_indexes(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('staff:staff_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(full_table_scans(response.context['assigned_bookings']), [])
+        completed = Booking.objects.filter(assigned_staff=self.staff, status=Booking.STATUS_COMPLETED)
+        self.assertEqual(full_table_scans(completed), [])
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_admin_dashboard_recent_bookings_use_index(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('staff:admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(full_table_scans(recent_bookings_queryset()), [])
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_communication_dashboard_logs_use_index(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('staff:communication_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(full_table_scans(response.context['logs']), [])
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_monthly_report_bookings_use_index(self):
+        completed = completed_bookings_for_month(timezone.now())
+        self.assertEqual(full_table_scans(completed), [])
+
+
+class BookingListPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.service = Service.objects.create(name='Brake Inspection', price=80, duration=timedelta(hours=1))
+        cls.other_service = Service.objects.create(name='Tyre Swap', price=40, duration=timedelta(minutes=30))
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        customer = User.objects.create_user(email='customer@example.com', username='customer')
+        vehicle = Vehicle.objects.create(
+            owner=customer, make='Ford', model='Focus', year=2018, license_plate='PLATE1', vin='0' * 17,
+        )
+        cls.start = timezone.now().replace(microsecond=0)
+        # Pairs of bookings share a scheduled_date to exercise the id tie-breaker
+        Booking.objects.bulk_create([
+            Booking(customer=customer, vehicle=vehicle,
+                    service=cls.other_service if i % 5 == 0 else cls.service,
+                    assigned_staff=cls.staff if i % 2 else None,
+                    status=Booking.STATUS_COMPLETED if i % 3 == 0 else Booking.STATUS_PENDING,
+                    scheduled_date=cls.start + timedelta(days=i // 2))
+            for i in range(25)
+        ])
+
+    def walk(self, queryset, page_size):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(queryset, cursor, page_size)
+            seen.extend(rows)
+            if cursor is None:
+                return seen
+
+    def test_pages_cover_every_booking_once_in_order(self):
+        seen = self.walk(Booking.objects.all(), page_size=4)
+        expected = list(Booking.objects.order_by('-scheduled_date', '-pk'))
+        self.assertEqual(seen, expected)
+
+    def test_malformed_cursor_returns_first_page(self):
+        rows, _cursor = keyset_page(Booking.objects.all(), 'not-a-cursor', 3)
+        self.assertEqual(rows, list(Booking.objects.order_by('-scheduled_date', '-pk')[:3]))
+
+    def test_filters(self):
+        form = BookingFilterForm({
+            'status': Booking.STATUS_PENDING,
+            'service': self.service.pk,
+            'date_to': (self.start + timedelta(days=5)).date().isoformat(),
+        })
+        bookings = form.filter(Booking.objects.all())
+        self.assertTrue(bookings.exists())
+        for booking in bookings:
+            self.assertEqual(booking.status, Booking.STATUS_PENDING)
+            self.assertEqual(booking.service, self.service)
+            self.assertLessEqual(booking.scheduled_date.date(), (self.start + timedelta(days=5)).date())
+
+    def test_management_view_pages_with_filters(self):
+        self.client.force_login(self.admin)
+        url = reverse('staff:booking_management')
+        response = self.client.get(url, {'assigned_staff': self.staff.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['bookings']), 12)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_staff_list_only_shows_own_bookings(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('staff:staff_booking_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('assigned_staff', response.context['filter_form'].fields)
+        self.assertTrue(all(b.assigned_staff_id == self.staff.pk for b in response.context['bookings']))
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_filtered_pages_seek_by_index(self):
+        _rows, cursor = keyset_page(Booking.objects.all(), None, 3)
+        filters = [
+            {},
+            {'status': Booking.STATUS_PENDING},
+            {'assigned_staff': self.staff.pk},
+            {'service': self.service.pk},
+        ]
+        for data in filters:
+            with self.subTest(filters=data):
+                queryset = BookingFilterForm(data).filter(Booking.objects.all())
+                plan = after_cursor(queryset, cursor)[:4].explain()
+                self.assertIn('SEARCH bookings_booking USING INDEX', plan)
+                self.assertIn('scheduled_date<', plan)
+
+
+class StaffListQueryCountTests(TestCase):
+    """
+    Staff and admin list pages must issue a fixed number of queries however
+    many rows they show.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass',
+            first_name='Sam', last_name='Staff', role=User.ROLE_STAFF,
+        )
+        customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Casey', last_name='Customer', role=User.ROLE_CUSTOMER,
+        )
+        bookings = create_listing_bookings(customer, cls.staff, 30)
+        CommunicationLog.objects.bulk_create([
+            CommunicationLog(recipient=customer, booking=booking, message_type='EMAIL',
+                             subject='Booking Confirmation', message='Confirmed')
+            for booking in bookings
+        ])
+        others = User.objects.bulk_create([
+            User(email=f'tech{i}@example.com', username=f'tech{i}', role=User.ROLE_STAFF)
+            for i in range(10)
+        ])
+        StaffPerformance.objects.bulk_create([
+            StaffPerformance(staff=staff, month=timezone.localdate().replace(day=1),
+                             completed_bookings=1, total_revenue=50, average_rating=4)
+            for staff in others
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def assertPageQueries(self, user, url_name, num, key, rows):
+        self.client.force_login(user)
+        with self.assertNumQueries(num):
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(len(response.context[key]), rows)
+
+    def test_booking_management(self):
+        self.assertPageQueries(self.admin, 'staff:booking_management', 5, 'bookings', 30)
+
+    def test_staff_booking_list(self):
+        self.assertPageQueries(self.staff, 'staff:staff_booking_list', 5, 'bookings', 30)
+
+    def test_admin_dashboard(self):
+        self.assertPageQueries(self.admin, 'staff:admin_dashboard', 4, 'recent_bookings', 5)
+
+    def test_staff_dashboard(self):
+        self.assertPageQueries(self.staff, 'staff:staff_dashboard', 4, 'assigned_bookings', 5)
+
+    def test_communication_dashboard(self):
+        self.assertPageQueries(self.admin, 'staff:communication_dashboard', 4, 'logs', 10)
+
+    def test_analytics_dashboard(self):
+        self.assertPageQueries(self.admin, 'staff:analytics_dashboard', 4, 'staff_performances', 10)
+
+
+class AdminDashboardMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        create_listing_bookings(cls.customer, cls.staff, 7)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts(self):
+        with self.assertNumQueries(2):
+            metrics = compute_metrics()
+        self.assertEqual(metrics['total_customers'], 1)
+        self.assertEqual(metrics['total_staff'], 1)
+        self.assertEqual(metrics['total_vehicles'], Vehicle.objects.count())
+        self.assertEqual(metrics['pending_bookings'], 7)
+        self.assertEqual(metrics['total_services'], Service.objects.count())
+        self.assertEqual(metrics['recent_bookings'], list(Booking.objects.order_by('-created_at')[:5]))
+
+    def test_dashboard_served_from_cache(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('staff:admin_dashboard'))
+        # Only the session and user lookups remain
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('staff:admin_dashboard'))
+        self.assertEqual(response.context['pending_bookings'], 7)
+
+    def test_saves_invalidate_cache(self):
+        self.assertEqual(get_metrics()['total_customers'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(email='new@example.com', username='new', role=User.ROLE_CUSTOMER)
+        self.assertEqual(get_metrics()['total_customers'], 2)
+
+        booking = Booking.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = Booking.STATUS_COMPLETED
+            booking.save()
+        self.assertEqual(get_metrics()['pending_bookings'], 6)
+
+    def test_login_does_not_invalidate_cache(self):
+        get_metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(email='admin@example.com', password='pass')
+        self.assertIsNotNone(cache.get(CACHE_KEY))
+
+    def test_stale_entry_served_while_another_request_recomputes(self):
+        metrics = get_metrics()
+        cache.set(CACHE_KEY, {'metrics': metrics, 'expires_at': 0})
+        cache.add(LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_metrics(), metrics)
+        cache.delete(LOCK_KEY)
+        with self.assertNumQueries(2):
+            get_metrics()
+        self.assertGreater(cache.get(CACHE_KEY)['expires_at'], 0)
+
+
+class DataExportViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        create_listing_bookings(cls.customer, None, 3)
+
+    def test_streams_csv_to_admins(self):
+        self.client.force_login(self.admin)
+        url = reverse('staff:data_export')
+        self.assertContains(self.client.get(url), 'Download')
+        response = self.client.get(url, {'dataset': 'bookings', 'format': 'csv', 'status': Booking.STATUS_PENDING})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bookings-pending.csv"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('id,scheduled_date,status'))
+
+    def test_rejects_invalid_filters_and_non_admins(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('staff:data_export'), {'dataset': 'feedback', 'format': 'csv', 'status': 'SENT'})
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'cannot be filtered by status')
+        self.client.force_login(self.customer)
+        self.assertRedirects(
+            self.client.get(reverse('staff:data_export')), reverse('users:home'), fetch_redirect_response=False,
+        )
+
+
+class SearchViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass',
+            first_name='Casey', last_name='Customer', role=User.ROLE_CUSTOMER,
+        )
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.customer, make='Mazda', model='3', year=2019, license_plate='KL77 MNO', vin='JM1BL1S58A1234567',
+        )
+
+    def test_admins_get_ranked_results_with_links(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('staff:search'), {'q': 'kl77'})
+        self.assertContains(response, 'Mazda 3 (KL77 MNO)')
+        self.assertContains(response, reverse('admin:customers_vehicle_change', args=[self.vehicle.pk]))
+        response = self.client.get(reverse('staff:search'), {'q': 'casey', 'kind': 'customer'})
+        self.assertEqual([result['kind'] for result in response.context['results']], ['Customer'])
+
+    def test_staff_can_search_and_short_queries_are_rejected(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('staff:search'), {'q': 'kl77'})
+        self.assertContains(response, 'Mazda 3 (KL77 MNO)')
+        self.assertNotContains(response, 'Open in Admin')
+        response = self.client.get(reverse('staff:search'), {'q': 'kl'})
+        self.assertContains(response, 'at least one word of 3 or more characters')
+        self.assertEqual(response.context['results'], [])
+
+    def test_customers_are_redirected(self):
+        self.client.force_login(self.customer)
+        self.assertRedirects(
+            self.client.get(reverse('staff:search')), reverse('users:home'), fetch_redirect_response=False,
+        )
+
+
+class StaffBookingListConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.other_staff = User.objects.create_user(
+            email='other@example.com', username='other', password='pass', role=User.ROLE_STAFF,
+        )
+        customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+        cls.bookings = create_listing_bookings(customer, cls.staff, 3)
+
+    def etag(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse('staff:staff_booking_list'))
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def revalidate(self, user, etag):
+        self.client.force_login(user)
+        return self.client.get(reverse('staff:staff_booking_list'), HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_reassignment_changes_both_staff_lists(self):
+        staff_etag, other_etag = self.etag(self.staff), self.etag(self.other_staff)
+        self.assertEqual(self.revalidate(self.staff, staff_etag), 304)
+        self.assertEqual(self.revalidate(self.other_staff, other_etag), 304)
+
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse('staff:booking_assign', args=[self.bookings[0].pk]), {'assigned_staff': self.other_staff.pk},
+        )
+        self.assertEqual(self.revalidate(self.staff, staff_etag), 200)
+        self.assertEqual(self.revalidate(self.other_staff, other_etag), 200)
+
+    def test_status_change(self):
+        etag = self.etag(self.staff)
+        self.assertEqual(self.revalidate(self.staff, etag), 304)
+        self.client.post(
+            reverse('staff:staff_booking_update', args=[self.bookings[0].pk]),
+            {'status': Booking.STATUS_IN_PROGRESS, 'notes': 'Started'},
+        )
+        self.assertEqual(self.revalidate(self.staff, etag), 200)
+
+class FragmentCacheStatsViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass', role=User.ROLE_ADMIN,
+        )
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_reports_hit_rate_per_fragment(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('staff:booking_management'))
+        self.client.get(reverse('staff:booking_management'))
+        stats = self.client.get(reverse('staff:fragment_cache_stats')).json()
+        self.assertEqual(stats['fragments']['booking_management'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        self.assertEqual(stats['total']['hits'], 1)
+
+    def test_staff_are_redirected(self):
+        self.client.force_login(self.staff)
+        self.assertRedirects(
+            self.client.get(reverse('staff:fragment_cache_stats')), reverse('users:home'),
+            fetch_redirect_response=False,
+        )
+
+
+class BookingEventStreamViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', role=User.ROLE_STAFF,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', username='customer', password='pass', role=User.ROLE_CUSTOMER,
+        )
+
+    async def test_streams_events_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('staff:booking_events'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        content = response.streaming_content
+        self.assertTrue((await anext(content)).startswith(b'retry: '))
+        await content.aclose()
+
+    def test_not_available_under_wsgi(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('staff:booking_events')).status_code, 501)
+
+    def test_customers_are_redirected(self):
+        self.client.force_login(self.customer)
+        self.assertRedirects(
+            self.client.get(reverse('staff:booking_events')), reverse('users:home'),
+            fetch_redirect_response=False,
+        )
@@ -8,12 +8,16 @@ from .views import (
     BookingAssignStaffView,
     StaffDashboardView,
     StaffBookingListView,
+    BookingEventStreamView,
     StaffBookingUpdateView,
     ServiceListView,
     ServiceCreateView,
     ServiceUpdateView,
     AnalyticsDashboardView,
     GenerateReportsView,
+    DataExportView,
+    SearchView,
+    FragmentCacheStatsView,
     CommunicationDashboardView,
     NotificationTemplateCreateView,
     SendBroadcastView,
@@ -29,12 +33,16 @@ urlpatterns = [
     path('bookings/<int:pk>/assign/', BookingAssignStaffView.as_view(), name='booking_assign'),
     path('staff-dashboard/', StaffDashboardView.as_view(), name='staff_dashboard'),
     path('staff-bookings/', StaffBookingListView.as_view(), name='staff_booking_list'),
+    path('events/', BookingEventStreamView.as_view(), name='booking_events'),
     path('staff-bookings/<int:pk>/update/', StaffBookingUpdateView.as_view(), name='staff_booking_update'),
     path('services/', ServiceListView.as_view(), name='service_list'),
     path('services/add/', ServiceCreateView.as_view(), name='service_create'),
     path('services/<int:pk>/edit/', ServiceUpdateView.as_view(), name='service_update'),
     path('analytics/', AnalyticsDashboardView.as_view(), name='analytics_dashboard'),
     path('analytics/generate/', GenerateReportsView.as_view(), name='generate_reports'),
+    path('analytics/export/', DataExportView.as_view(), name='data_export'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('cache/fragments/', FragmentCacheStatsView.as_view(), name='fragment_cache_stats'),
     path('communication/', CommunicationDashboardView.as_view(), name='communication_dashboard'),
     path('communication/template/add/', NotificationTemplateCreateView.as_view(), name='notification_template_create'),
     path('communication/broadcast/', SendBroadcastView.as_view(), name='send_broadcast'),
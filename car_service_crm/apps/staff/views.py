@@ -1,43 +1,75 @@
 # apps/staff/views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import TemplateView, ListView, UpdateView, CreateView, FormView
-from django.urls import reverse_lazy
+from django.views.generic import TemplateView, ListView, UpdateView, CreateView, FormView, View
+from django.urls import reverse, reverse_lazy
 from django.shortcuts import redirect
+from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Sum, Avg, Count
-from django.db.models.functions import TruncMonth
-from datetime import datetime
+from django.utils import timezone
 from apps.users.models import User
-from apps.customers.models import Vehicle
+from apps.bookings.events import stream, visible_to
 from apps.bookings.models import Booking
 from apps.services.models import Service
+from apps.services.catalog import get_catalog
 from apps.analytics.models import RevenueReport, StaffPerformance
+from apps.analytics.exports import FORMATS, export_filename, iter_export
+from apps.analytics.reports import generate_monthly_reports
 from apps.communication.models import CommunicationLog, NotificationTemplate
-from django.template import Template, Context
-from  django.core.mail import send_mail
+from apps.communication.notifications import render_notification
+from apps.communication.broadcast import queue_broadcast
+from apps.fragments.cache import get_stats as fragment_cache_stats
+from apps.search.models import SearchDocument
+from apps.search.query import search
 from django.forms import forms
+from apps.bookings.pagination import keyset_page, DEFAULT_PAGE_SIZE
+from apps.users.mixins import AsyncRoleRequiredMixin, ConditionalGetMixin, evaluate
+from .forms import BookingFilterForm, DataExportForm, SearchForm
+from .metrics import get_metrics
 
-class AdminDashboardView(LoginRequiredMixin, TemplateView):
+class KeysetBookingListMixin:
     """
-    Admin dashboard showing key metrics and quick access to management tasks.
+    Filter a booking ListView with BookingFilterForm and paginate it by
+    (scheduled_date, id) cursor instead of OFFSET.
     """
-    template_name = 'staff/admin_dashboard.html'
+    page_size = DEFAULT_PAGE_SIZE
+    include_staff_filter = True
+
+    def get_filter_form(self):
+        if not hasattr(self, '_filter_form'):
+            self._filter_form = BookingFilterForm(self.request.GET, include_staff=self.include_staff_filter)
+        return self._filter_form
+
+    def get_base_queryset(self):
+        return Booking.objects.for_listing()
+
+    def get_queryset(self):
+        return self.get_filter_form().filter(self.get_base_queryset())
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        if self.request.user.is_admin:
-            context['total_customers'] = User.objects.filter(role=User.ROLE_CUSTOMER).count()
-            context['total_staff'] = User.objects.filter(role=User.ROLE_STAFF).count()
-            context['total_vehicles'] = Vehicle.objects.count()
-            context['pending_bookings'] = Booking.objects.filter(status=Booking.STATUS_PENDING).count()
-            context['recent_bookings'] = Booking.objects.order_by('-created_at')[:5]
-            context['total_services'] = Service.objects.count()  # Added
+        rows, next_cursor = keyset_page(self.object_list, self.request.GET.get('cursor'), self.page_size)
+        context = super().get_context_data(object_list=rows, **kwargs)
+        context['filter_form'] = self.get_filter_form()
+        context['next_cursor'] = next_cursor
+        context['is_first_page'] = not self.request.GET.get('cursor')
         return context
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_admin:
-            return redirect('users:home')
-        return super().dispatch(request, *args, **kwargs)
+class AdminDashboardView(AsyncRoleRequiredMixin, TemplateView):
+    """
+    Admin dashboard showing key metrics and quick access to management tasks.
+    Async; the metrics come from one cached query (see metrics.py).
+    """
+    template_name = 'staff/admin_dashboard.html'
+    required_role = 'is_admin'
+
+    async def get(self, request, *args, **kwargs):
+        metrics = await sync_to_async(get_metrics)()
+        return self.render_to_response(self.get_context_data(**metrics, **kwargs))
 
 class CustomerListView(LoginRequiredMixin, ListView):
     """
@@ -71,17 +103,14 @@ class StaffListView(LoginRequiredMixin, ListView):
             return redirect('users:home')
         return super().dispatch(request, *args, **kwargs)
 
-class BookingManagementView(LoginRequiredMixin, ListView):
+class BookingManagementView(LoginRequiredMixin, KeysetBookingListMixin, ListView):
     """
-    List all bookings for Admin oversight and management.
+    List all bookings for Admin oversight and management, filtered and paginated.
     """
     model = Booking
     template_name = 'staff/booking_management.html'
     context_object_name = 'bookings'
 
-    def get_queryset(self):
-        return Booking.objects.all()
-
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_admin:
             return redirect('users:home')
@@ -106,40 +135,62 @@ class BookingAssignStaffView(LoginRequiredMixin, UpdateView):
             return redirect('users:home')
         return super().dispatch(request, *args, **kwargs)
 
-class StaffDashboardView(LoginRequiredMixin, TemplateView):
+class StaffDashboardView(AsyncRoleRequiredMixin, TemplateView):
     """
-    Staff dashboard showing assigned bookings and workload.
+    Staff dashboard showing assigned bookings and workload. Async; the two
+    queries are awaited together.
     """
     template_name = 'staff/staff_dashboard.html'
+    required_role = 'is_staff_member'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        if self.request.user.is_staff_member:
-            context['assigned_bookings'] = Booking.objects.filter(
-                assigned_staff=self.request.user,
+    async def get(self, request, *args, **kwargs):
+        assigned_bookings, completed_bookings = await asyncio.gather(
+            evaluate(Booking.objects.for_listing().filter(
+                assigned_staff=request.user,
                 status__in=[Booking.STATUS_PENDING, Booking.STATUS_IN_PROGRESS]
-            ).order_by('scheduled_date')[:5]
-            context['completed_bookings'] = Booking.objects.filter(
-                assigned_staff=self.request.user,
+            ).order_by('scheduled_date')[:5]),
+            Booking.objects.filter(
+                assigned_staff=request.user,
                 status=Booking.STATUS_COMPLETED
-            ).count()
-        return context
+            ).acount(),
+        )
+        return self.render_to_response(self.get_context_data(
+            assigned_bookings=assigned_bookings, completed_bookings=completed_bookings, **kwargs,
+        ))
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_staff_member:
-            return redirect('users:home')
-        return super().dispatch(request, *args, **kwargs)
+class BookingEventStreamView(AsyncRoleRequiredMixin, View):
+    """
+    Server-Sent Events announcing bookings created, assigned or changing
+    status within the viewer's scope, so the staff dashboard and booking
+    management pages refresh only when something changed. Needs the ASGI
+    server: under WSGI the endless response would hold a worker thread.
+    """
+    required_role = ('is_admin', 'is_staff_member')
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(str(_('The event stream is only served over ASGI.')), status=501)
+        keepalive = getattr(settings, 'EVENT_STREAM_KEEPALIVE_SECONDS', 15)
+        response = StreamingHttpResponse(stream(visible_to(request.user), keepalive), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
-class StaffBookingListView(LoginRequiredMixin, ListView):
+
+class StaffBookingListView(LoginRequiredMixin, ConditionalGetMixin, KeysetBookingListMixin, ListView):
     """
-    List all bookings assigned to the logged-in staff member.
+    List bookings assigned to the logged-in staff member, filtered and paginated.
     """
     model = Booking
     template_name = 'staff/staff_booking_list.html'
     context_object_name = 'bookings'
+    include_staff_filter = False
+    # Each row also shows its vehicle and service
+    validator_fields = ('updated_at', 'vehicle__updated_at', 'service__updated_at')
 
-    def get_queryset(self):
-        return Booking.objects.filter(assigned_staff=self.request.user)
+    def get_base_queryset(self):
+        return Booking.objects.for_listing().filter(assigned_staff=self.request.user)
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_staff_member:
@@ -181,6 +232,9 @@ class ServiceListView(LoginRequiredMixin, ListView):
     template_name = 'staff/service_list.html'
     context_object_name = 'services'
 
+    def get_queryset(self):
+        return list(get_catalog())
+
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_admin:
             return redirect('users:home')
@@ -214,23 +268,22 @@ class ServiceUpdateView(LoginRequiredMixin, UpdateView):
             return redirect('users:home')
         return super().dispatch(request, *args, **kwargs)
     
-class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
+class AnalyticsDashboardView(AsyncRoleRequiredMixin, TemplateView):
     """
-    Analytics dashboard for Admins to view reports.
+    Analytics dashboard for Admins to view reports. Async; both report
+    queries are awaited together.
     """
     template_name = 'staff/analytics_dashboard.html'
+    required_role = 'is_admin'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        if self.request.user.is_admin:
-            context['revenue_reports'] = RevenueReport.objects.all()[:12]  # Last 12 months
-            context['staff_performances'] = StaffPerformance.objects.all()[:10]  # Last 10
-        return context
-
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_admin:
-            return redirect('users:home')
-        return super().dispatch(request, *args, **kwargs)
+    async def get(self, request, *args, **kwargs):
+        revenue_reports, staff_performances = await asyncio.gather(
+            evaluate(RevenueReport.objects.all()[:12]),  # Last 12 months
+            evaluate(StaffPerformance.objects.select_related('staff')[:10]),  # Last 10
+        )
+        return self.render_to_response(self.get_context_data(
+            revenue_reports=revenue_reports, staff_performances=staff_performances, **kwargs,
+        ))
 
 class GenerateReportsView(LoginRequiredMixin, FormView):
     """
@@ -241,47 +294,99 @@ class GenerateReportsView(LoginRequiredMixin, FormView):
     success_url = reverse_lazy('staff:analytics_dashboard')
 
     def form_valid(self, form):
-        # Generate revenue report for the current month
-        current_month = datetime.now().replace(day=1)
-        completed_bookings = Booking.objects.filter(status=Booking.STATUS_COMPLETED, created_at__month=current_month.month, created_at__year=current_month.year)
-        total_revenue = completed_bookings.aggregate(Sum('service__price'))['service__price__sum'] or 0
-        total_bookings = completed_bookings.count()
-        average_rating = completed_bookings.aggregate(Avg('feedback__rating'))['feedback__rating__avg'] or 0
-
-        RevenueReport.objects.update_or_create(
-            month=current_month,
-            defaults={
-                'total_revenue': total_revenue,
-                'total_bookings': total_bookings,
-                'average_rating': average_rating,
-            }
+        # Generate revenue and staff performance reports for the current month
+        generate_monthly_reports(timezone.localdate())
+        return super().form_valid(form)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_admin:
+            return redirect('users:home')
+        return super().dispatch(request, *args, **kwargs)
+    
+class DataExportView(LoginRequiredMixin, FormView):
+    """
+    View for Admins to download bookings, feedback or communication logs as
+    CSV or JSON Lines. Submitted by GET, so an export can be bookmarked; the
+    file is streamed and never held in memory.
+    """
+    template_name = 'staff/data_export.html'
+    form_class = DataExportForm
+
+    def get_form_kwargs(self):
+        return {'initial': self.get_initial(), 'prefix': self.get_prefix(), 'data': self.request.GET or None}
+
+    def get(self, request, *args, **kwargs):
+        form = self.get_form()
+        if form.is_bound:
+            return self.form_valid(form) if form.is_valid() else self.form_invalid(form)
+        return self.render_to_response(self.get_context_data(form=form))
+
+    def form_valid(self, form):
+        dataset, fmt = form.cleaned_data['dataset'], form.cleaned_data['format']
+        filters = form.filters()
+        response = StreamingHttpResponse(
+            iter_export(dataset, fmt, **filters), content_type=f'{FORMATS[fmt]}; charset=utf-8',
         )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(dataset, fmt, **filters)}"'
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_admin:
+            return redirect('users:home')
+        return super().dispatch(request, *args, **kwargs)
+
+class SearchView(LoginRequiredMixin, TemplateView):
+    """
+    Ranked search across customers, vehicles, bookings and feedback for
+    Admins and Staff, answered from the search index.
+    """
+    template_name = 'staff/search.html'
+    # Admin change page of each result kind, linked for Admins
+    admin_urls = {
+        SearchDocument.KIND_CUSTOMER: 'admin:users_user_change',
+        SearchDocument.KIND_VEHICLE: 'admin:customers_vehicle_change',
+        SearchDocument.KIND_BOOKING: 'admin:bookings_booking_change',
+        SearchDocument.KIND_FEEDBACK: 'admin:bookings_feedback_change',
+    }
 
-        # Generate staff performance
-        staff_members = User.objects.filter(role=User.ROLE_STAFF)
-        for staff in staff_members:
-            staff_bookings = completed_bookings.filter(assigned_staff=staff)
-            staff_revenue = staff_bookings.aggregate(Sum('service__price'))['service__price__sum'] or 0
-            staff_completed = staff_bookings.count()
-            staff_rating = staff_bookings.aggregate(Avg('feedback__rating'))['feedback__rating__avg'] or 0
-
-            StaffPerformance.objects.update_or_create(
-                staff=staff,
-                month=current_month,
-                defaults={
-                    'completed_bookings': staff_completed,
-                    'total_revenue': staff_revenue,
-                    'average_rating': staff_rating,
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = SearchForm(self.request.GET or None)
+        kind_labels = dict(SearchDocument.KIND_CHOICES)
+        results = []
+        if form.is_valid():
+            kind = form.cleaned_data['kind']
+            results = [
+                {
+                    'kind': kind_labels[result.kind],
+                    'title': result.title,
+                    'url': reverse(self.admin_urls[result.kind], args=[result.object_id])
+                    if self.request.user.is_admin else None,
                 }
-            )
+                for result in search(form.cleaned_data['q'], [kind] if kind else None)
+            ]
+        context['form'] = form
+        context['results'] = results
+        return context
 
-        return super().form_valid(form)
+    def dispatch(self, request, *args, **kwargs):
+        if not (request.user.is_admin or request.user.is_staff_member):
+            return redirect('users:home')
+        return super().dispatch(request, *args, **kwargs)
+
+class FragmentCacheStatsView(LoginRequiredMixin, View):
+    """
+    Hit and miss counts of the dashboard and list page fragment cache, as JSON.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(fragment_cache_stats())
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_admin:
             return redirect('users:home')
         return super().dispatch(request, *args, **kwargs)
-    
+
 class CommunicationDashboardView(LoginRequiredMixin, ListView):
     """
     Dashboard for Admins to view and manage communication templates and logs.
@@ -292,7 +397,9 @@ class CommunicationDashboardView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['logs'] = CommunicationLog.objects.all()[:10]  # Last 10 logs
+        context['logs'] = CommunicationLog.objects.select_related(
+            'recipient', 'booking__service', 'booking__vehicle'
+        )[:10]  # Last 10 logs
         return context
 
     def dispatch(self, request, *args, **kwargs):
@@ -323,48 +430,14 @@ class SendBroadcastView(LoginRequiredMixin, FormView):
     success_url = reverse_lazy('staff:communication_dashboard')
 
     def form_valid(self, form):
-        customers = User.objects.filter(role=User.ROLE_CUSTOMER)
-        template = NotificationTemplate.objects.filter(name='Broadcast Message', is_active=True).first()
-        if not template:
-            template = NotificationTemplate.objects.create(
-                name='Broadcast Message',
-                subject='Important Update from iCars',
-                message='Dear {customer}, we have an important update: {message}',
-                is_active=True
-            )
-
         message = self.request.POST.get('message', 'No message provided.')
-        for customer in customers:
-            rendered_message = Template(template.message).render(Context({
-                'customer': customer.get_full_name(),
-                'message': message
-            }))
-            try:
-                send_mail(
-                    subject=template.subject,
-                    message=rendered_message,
-                    from_email='no-reply@icars.com',
-                    recipient_list=[customer.email],
-                    fail_silently=False
-                )
-                CommunicationLog.objects.create(
-                    recipient=customer,
-                    message_type='EMAIL',
-                    subject=template.subject,
-                    message=rendered_message,
-                    template=template,
-                    status='SENT'
-                )
-            except Exception as e:
-                CommunicationLog.objects.create(
-                    recipient=customer,
-                    message_type='EMAIL',
-                    subject=template.subject,
-                    message=rendered_message,
-                    template=template,
-                    status='FAILED'
-                )
-
+        if render_notification('Broadcast Message', {}) is None:
+            messages.warning(self.request, _('The Broadcast Message template is disabled; nothing was sent.'))
+        else:
+            # Sent by the send_broadcasts command; mailing every customer
+            # would outlast the request
+            queue_broadcast('Broadcast Message', {'message': message}, requested_by=self.request.user)
+            messages.success(self.request, _('Broadcast queued; customers will receive it shortly.'))
         return super().form_valid(form)
 
     def dispatch(self, request, *args, **kwargs):
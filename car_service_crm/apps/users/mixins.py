@@ -0,0 +1,108 @@
+# apps/users/mixins.py
+"""
+Mixins shared by the apps' class-based views.
+
+Under ASGI an async view runs on the event loop, where touching
+request.user (a lazy object that queries the session and user tables)
+raises SynchronousOnlyOperation. AsyncRoleRequiredMixin loads the user with
+request.auser() instead, and does the login and role checks the sync views
+do in dispatch().
+
+Dashboards await their independent queries together with asyncio.gather().
+Django still runs the async ORM's queries one at a time on the request's
+sync thread, so this does not parallelise them within a request; it keeps
+the worker's event loop free to serve other requests while they run.
+
+ConditionalGetMixin lets clients that already hold a page revalidate it
+with one aggregate query instead of downloading it again.
+"""
+import hashlib
+
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.utils.translation import get_language
+from django.views.generic.detail import SingleObjectMixin
+
+
+class AsyncRoleRequiredMixin:
+    """
+    Redirect anonymous users to the login page and users without
+    `required_role` (a User property such as 'is_admin', or a tuple of them
+    any of which will do) to their home page. The view's handlers must be
+    async.
+    """
+    required_role = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        roles = (self.required_role,) if isinstance(self.required_role, str) else self.required_role
+        if not any(getattr(user, role) for role in roles):
+            return redirect('users:home')
+        # The loaded user, so rendering does not look it up again
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+async def evaluate(queryset):
+    """
+    Fetch `queryset` into its result cache without blocking the event loop,
+    so templates and callers can iterate it without a query. Returns it.
+    """
+    async for _row in queryset:
+        pass
+    return queryset
+
+
+class ConditionalGetMixin:
+    """
+    Send an ETag with GET responses, and answer a request whose
+    If-None-Match still matches with 304 Not Modified before the view builds
+    its context or renders anything.
+
+    The ETag comes from one aggregate over get_validator_queryset(): the
+    newest value of each of `validator_fields` and the row count, so
+    removing a row changes it even though no timestamp moved. It is per
+    user; responses are marked private and must be revalidated. No
+    Last-Modified is sent, as the newest timestamp stays put when a row is
+    deleted and If-Modified-Since would then match a stale page.
+    """
+    validator_fields = ('updated_at',)
+
+    def get_validator_queryset(self):
+        return self.get_queryset()
+
+    def get_etag(self):
+        """
+        Return the page's ETag, or None when there is nothing to match.
+        """
+        aggregates = {f'last_{i}': Max(field) for i, field in enumerate(self.validator_fields)}
+        row = self.get_validator_queryset().order_by().aggregate(rows=Count('pk'), **aggregates)
+        if not row['rows'] and isinstance(self, SingleObjectMixin):
+            # The object is missing and the view will 404; nothing can match
+            return None
+        parts = [
+            self.request.user.pk, get_language(), row['rows'],
+            *(row[name].isoformat() if row[name] else '' for name in aggregates),
+        ]
+        digest = hashlib.md5(':'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(digest)
+
+    def get(self, request, *args, **kwargs):
+        # A pending flash message has to be shown, so always render then
+        if len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        etag = self.get_etag()
+        if etag is None:
+            return super().get(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers.setdefault('ETag', etag)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -44,10 +44,15 @@ INSTALLED_APPS = [
     'apps.services',
     'apps.analytics',
     'apps.communication',
+    'apps.monitoring',
+    'apps.search',
+    'apps.fragments',
+    'apps.api',
 
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +89,61 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # EMAIL_HOST_USER = 'your-email@gmail.com'
 # EMAIL_HOST_PASSWORD = 'your-app-password'
 
+# Transactional email outbox, drained by `manage.py dispatch_outbox`
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BACKOFF_SECONDS = 30  # doubled after each failed attempt
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+OUTBOX_LEASE_SECONDS = 300  # claimed messages are retried after this if a worker dies
+OUTBOX_POLL_INTERVAL = 5
+
+# Customer broadcasts, queued by the staff broadcast page and sent by `manage.py send_broadcasts`
+BROADCAST_POLL_INTERVAL = 5  # seconds between checks for queued broadcasts
+
+# Appointment reminders, queued by `manage.py send_reminders` (apps.communication.reminders)
+REMINDER_OFFSET_HOURS = (24, 2)  # before Booking.scheduled_date
+REMINDER_WINDOW_MINUTES = 60  # how far ahead bookings are loaded into the timing wheel
+REMINDER_CHANGE_POLL_SECONDS = 30  # how often reschedules and cancellations are read from Booking.updated_at
+REMINDER_CHANGE_OVERLAP_SECONDS = 60  # re-read window for saves that committed after a poll
+REMINDER_CATCH_UP_MINUTES = 15  # reminders missed by up to this much (e.g. during a restart) are still sent
+REMINDER_BATCH_SIZE = 500
+REMINDER_TICK_INTERVAL = 1  # seconds
+
+# CommunicationLog archival, run by `manage.py archive_communication_logs` (apps.communication.archive)
+COMMUNICATION_LOG_RETENTION_MONTHS = 12  # whole months kept in the table; older months are archived
+COMMUNICATION_ARCHIVE_DIR = BASE_DIR / 'archive' / 'communication'
+COMMUNICATION_ARCHIVE_COMPRESSION = 'gzip'  # or 'zstd', with the zstandard package installed
+COMMUNICATION_ARCHIVE_BLOCK_ROWS = 1000  # rows per compressed block; a recipient lookup only reads its blocks
+COMMUNICATION_ARCHIVE_DELETE_CHUNK = 1000  # archived rows deleted per transaction
+
+# Compiled NotificationTemplate cache (apps.communication.notifications)
+NOTIFICATION_TEMPLATE_CACHE_SIZE = 128
+NOTIFICATION_TEMPLATE_CACHE_TTL = 60  # seconds; bounds staleness across worker processes
+
+# Admin dashboard metrics cache (apps.staff.metrics)
+ADMIN_DASHBOARD_CACHE_TTL = 30  # seconds
+
+# Service catalog cache (apps.services.catalog); also invalidated, in every process, whenever a service changes
+SERVICE_CATALOG_CACHE_TTL = 3600  # seconds
+
+# Template fragment cache (apps.fragments); fragments are also dropped whenever rows in their scopes change
+FRAGMENT_CACHE_TTL = 600  # seconds; bounds staleness of names (users) shown without a scope of their own
+
+# Live booking events for the staff dashboards (apps.bookings.events, served over ASGI)
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
+
+# Workshop capacity used by the booking availability engine (apps.bookings.availability)
+WORKSHOP_BAYS = 4
+WORKSHOP_OPENING_HOUR = 8
+WORKSHOP_CLOSING_HOUR = 18
+WORKSHOP_SLOT_MINUTES = 30
+WORKSHOP_OPEN_WEEKDAYS = [0, 1, 2, 3, 4, 5]  # Monday to Saturday
+AVAILABILITY_CACHE_TTL = 3600  # seconds; days are also invalidated, in every process, when their bookings change
+
+# Per-request query/timing instrumentation (apps.monitoring.middleware)
+REQUEST_METRICS_ENABLED = False  # opt-in; adds a Server-Timing header and a log line per request
+REQUEST_METRICS_QUERY_BUDGET = 30  # requests running more queries are logged as warnings
+
 WSGI_APPLICATION = 'car_service_crm.wsgi.application'
 
 
@@ -94,9 +154,35 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than SQLite's shared in-memory database, so concurrency
+        # tests see the same locking (and busy timeout) as production
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Required: the fragment, service catalog, availability and dashboard caches
+# are invalidated from signal handlers through keys held in the cache itself,
+# so every web worker and management command must share one cache for a
+# write in one process to reach the others. Create the cache table with
+# `manage.py createcachetable` before the first run. Redis or Memcached work
+# as well; a process-local backend such as LocMemCache is only correct with a
+# single process (the test runner uses one, see test_runner.py).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        # Culling past MAX_ENTRIES drops version counters along with entries,
+        # so leave room well beyond the default 300
+        'OPTIONS': {'MAX_ENTRIES': 100000},
     }
 }
 
+TEST_RUNNER = 'car_service_crm.test_runner.TestRunner'
+
 AUTH_USER_MODEL = 'users.User'
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -24,4 +24,5 @@ urlpatterns = [
     path('bookings/', include('apps.bookings.urls')),
     path('staff/', include('apps.staff.urls')),
     path('services/', include('apps.services.urls')),
+    path('api/v1/', include('apps.api.urls')),
 ]